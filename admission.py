@@ -0,0 +1,145 @@
+"""
+Admission control for model calls.
+
+At most `capacity` model calls run at once. Further requests wait in a bounded
+priority queue, with interactive (web UI) requests served before batch/API
+requests. Once the queue is full, or a request has waited longer than the
+queue timeout, it is turned away straight away with 429 and a Retry-After
+estimated from recent call durations, instead of piling onto the upstream rate
+limit.
+"""
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from fastapi import HTTPException
+
+# Priority classes; lower values are admitted first
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Request header the web UI sets to mark its requests interactive
+PRIORITY_HEADER = "X-Request-Priority"
+
+def priority_from_header(value: Optional[str]) -> int:
+    """Priority class for a request; callers that do not identify as interactive are batch"""
+    return INTERACTIVE if (value or "").strip().lower() == "interactive" else BATCH
+
+class AdmissionController:
+    """Bounded priority queue in front of a fixed number of concurrent slots"""
+
+    def __init__(self, capacity: int, max_queue: int, max_batch_queue: int, queue_timeout: float):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_batch_queue = max_batch_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: List = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._queued = {priority: 0 for priority in PRIORITY_NAMES}
+        self._admitted = {priority: 0 for priority in PRIORITY_NAMES}
+        self._rejected = {priority: 0 for priority in PRIORITY_NAMES}
+        self.timeouts = 0
+        self.peak_queue_depth = 0
+        self._wait_times = deque(maxlen=1000)
+        self._service_time = 10.0  # moving average of slot hold time, seeded with a typical model call
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    def retry_after(self) -> int:
+        """Seconds until a queued request would likely be admitted"""
+        return max(1, math.ceil(self._service_time * (self.queue_depth + 1) / max(1, self.capacity)))
+
+    def _reject(self, priority: int, detail: str) -> HTTPException:
+        self._rejected[priority] += 1
+        return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(self.retry_after())})
+
+    async def acquire(self, priority: int = BATCH):
+        """Take a slot, queueing by priority; raises HTTPException(429) when the queue is full or the wait times out"""
+        start = time.monotonic()
+        if self.in_flight < self.capacity and self.queue_depth == 0:
+            self._grant(priority, start)
+            return
+
+        queue_limit = self.max_queue if priority == INTERACTIVE else self.max_batch_queue
+        if self.queue_depth >= self.max_queue or (priority != INTERACTIVE and self._queued[priority] >= queue_limit):
+            raise self._reject(priority, "AI service is at capacity. Please retry shortly.")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._queued[priority] += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait ended; pass it on
+                self.release()
+            else:
+                future.cancel()
+                self._queued[priority] -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise self._reject(priority, "Timed out waiting for the AI service. Please retry shortly.")
+            raise
+        self._record_wait(priority, start)
+
+    def _grant(self, priority: int, start: float):
+        self.in_flight += 1
+        self._record_wait(priority, start)
+
+    def _record_wait(self, priority: int, start: float):
+        self._admitted[priority] += 1
+        self._wait_times.append(time.monotonic() - start)
+
+    def release(self, held_for: Optional[float] = None):
+        """Return a slot, handing it straight to the highest-priority waiter"""
+        if held_for is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * held_for
+        while self._waiters:
+            priority, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self._queued[priority] -= 1
+            future.set_result(None)  # in_flight is unchanged: the slot moves to the waiter
+            return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = BATCH) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block"""
+        await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict:
+        waits = sorted(self._wait_times)
+
+        def percentile(fraction: float) -> float:
+            return round(waits[min(len(waits) - 1, int(fraction * len(waits)))], 3) if waits else 0.0
+
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "queued": {PRIORITY_NAMES[p]: count for p, count in self._queued.items()},
+            "max_queue": self.max_queue,
+            "max_batch_queue": self.max_batch_queue,
+            "peak_queue_depth": self.peak_queue_depth,
+            "admitted": {PRIORITY_NAMES[p]: count for p, count in self._admitted.items()},
+            "rejected": {PRIORITY_NAMES[p]: count for p, count in self._rejected.items()},
+            "queue_timeouts": self.timeouts,
+            "wait_seconds": {"p50": percentile(0.5), "p95": percentile(0.95), "max": round(waits[-1], 3) if waits else 0.0},
+            "avg_service_seconds": round(self._service_time, 3),
+            "retry_after_seconds": self.retry_after()
+        }
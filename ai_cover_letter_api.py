@@ -1,20 +1,38 @@
+import io
 import os
+import re
+import time
+import asyncio
 from dotenv import load_dotenv
-from azure.ai.inference import ChatCompletionsClient
+from azure.ai.inference.aio import ChatCompletionsClient
 from azure.core.credentials import AzureKeyCredential
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 import json
-import tempfile
+import hashlib
 from pathlib import Path
+import zipfile
 import pdfplumber
-from docx import Document
-from docx.shared import Pt
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from caching import extraction_cache, TTLCache, SingleFlight
+from docx_template import cover_letter_template
+from extraction_pool import extraction_pool
+from extraction_streams import iter_pdf_pages, iter_docx_blocks
+from prompt_budget import fit_prompt, count_tokens
+from json_stream import JSONFieldStream
+from admission import AdmissionController, BATCH, priority_from_header
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from structured_output import response_format_extras, validate_output
+from upload_limits import buffered_upload
+from zip_stream import ZipStream
+from job_queue import JobQueue, DONE
+import metrics
+from job_scraper_api import get_job_description
 
 # Load environment variables
 load_dotenv()
@@ -36,20 +54,113 @@ app.add_middleware(
 
 # GitHub AI Models setup
 github_token = os.environ.get("GITHUB_TOKEN")
+endpoint = os.environ.get("GITHUB_MODELS_ENDPOINT", "https://models.github.ai/inference")
+model = os.environ.get("GITHUB_MODELS_MODEL", "gpt-4o")
+
+# Upper bound on model calls in flight at once; extra requests wait in a bounded
+# priority queue and are turned away with 429 once it is full
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", "4"))
+AI_QUEUE_MAX = int(os.environ.get("AI_QUEUE_MAX", "32"))
+AI_BATCH_QUEUE_MAX = int(os.environ.get("AI_BATCH_QUEUE_MAX", "16"))
+AI_QUEUE_TIMEOUT = float(os.environ.get("AI_QUEUE_TIMEOUT", "30"))
+admission_controller = AdmissionController(
+    capacity=AI_MAX_CONCURRENCY,
+    max_queue=AI_QUEUE_MAX,
+    max_batch_queue=AI_BATCH_QUEUE_MAX,
+    queue_timeout=AI_QUEUE_TIMEOUT
+)
+
+# Transient model errors (429, 5xx, timeouts) are retried with jittered exponential backoff;
+# after AI_BREAKER_THRESHOLD consecutive failures calls fail fast with 503 for AI_BREAKER_RESET seconds
+AI_RETRY_ATTEMPTS = int(os.environ.get("AI_RETRY_ATTEMPTS", "3"))
+AI_RETRY_BASE_DELAY = float(os.environ.get("AI_RETRY_BASE_DELAY", "0.5"))
+AI_RETRY_MAX_DELAY = float(os.environ.get("AI_RETRY_MAX_DELAY", "8"))
+AI_BREAKER_THRESHOLD = int(os.environ.get("AI_BREAKER_THRESHOLD", "5"))
+AI_BREAKER_RESET = float(os.environ.get("AI_BREAKER_RESET", "30"))
+# Send a second request when a non-streamed call runs past the recent p95 latency
+AI_HEDGE_ENABLED = os.environ.get("AI_HEDGE_ENABLED", "0") == "1"
+model_caller = ResilientCaller(
+    max_attempts=AI_RETRY_ATTEMPTS,
+    base_delay=AI_RETRY_BASE_DELAY,
+    max_delay=AI_RETRY_MAX_DELAY,
+    breaker=CircuitBreaker(AI_BREAKER_THRESHOLD, AI_BREAKER_RESET),
+    hedge=AI_HEDGE_ENABLED
+)
+
+# Ask the model for JSON matching the CoverLetterData schema; set to 0 for models without json_schema support
+AI_STRUCTURED_OUTPUT = os.environ.get("AI_STRUCTURED_OUTPUT", "1") == "1"
+
+# Distil each resume into a candidate profile once, cached by resume hash, and write letters from the profile
+AI_TWO_STAGE = os.environ.get("AI_TWO_STAGE", "1") == "1"
+profile_cache = TTLCache(
+    max_entries=int(os.environ.get("AI_PROFILE_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("AI_PROFILE_CACHE_TTL", "86400"))
+)
+profile_builds = SingleFlight()
+metrics.register_cache("candidate_profile", profile_cache)
+
+# Batch generation: one resume, many jobs, letters generated concurrently and streamed back as a ZIP
+AI_BATCH_MAX_JOBS = int(os.environ.get("AI_BATCH_MAX_JOBS", "25"))
+AI_BATCH_CONCURRENCY = int(os.environ.get("AI_BATCH_CONCURRENCY", "4"))
+
+# Background jobs: submitted letters are generated by a worker pool and kept in SQLite until they expire
+AI_JOB_DB = os.environ.get("AI_JOB_DB", "ai_jobs.sqlite3")
+AI_JOB_WORKERS = int(os.environ.get("AI_JOB_WORKERS", "4"))
+AI_JOB_MAX_QUEUED = int(os.environ.get("AI_JOB_MAX_QUEUED", "500"))
+AI_JOB_RESULT_TTL = float(os.environ.get("AI_JOB_RESULT_TTL", "3600"))
+AI_JOB_LEASE = float(os.environ.get("AI_JOB_LEASE", "300"))
+AI_JOB_MAX_ATTEMPTS = int(os.environ.get("AI_JOB_MAX_ATTEMPTS", "3"))
+# Longest a status request may long-poll; keep it under the load balancer's idle timeout
+AI_JOB_MAX_WAIT = float(os.environ.get("AI_JOB_MAX_WAIT", "25"))
+
+# Sampling parameters, also part of the analysis cache key
+TEMPERATURE = 0.7
+TOP_P = 0.9
+
+# Only the start of a resume is sent to the model; extraction stops once these limits are reached
+AI_EXTRACT_MAX_PAGES = int(os.environ.get("AI_EXTRACT_MAX_PAGES", "10"))
+AI_EXTRACT_MAX_CHARS = int(os.environ.get("AI_EXTRACT_MAX_CHARS", "40000"))
+
+# The prompt only needs plain text, so resumes skip pdfplumber's layout analysis by default
+AI_PDF_EXTRACTION_MODE = os.environ.get("AI_PDF_EXTRACTION_MODE", "fast")
+
+# Opt-in cache of validated analysis results for repeat resume + job pairs
+AI_RESULT_CACHE_ENABLED = os.environ.get("AI_RESULT_CACHE_ENABLED", "0") == "1"
+analysis_cache = TTLCache(
+    max_entries=int(os.environ.get("AI_RESULT_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("AI_RESULT_CACHE_TTL", "3600"))
+)
+metrics.register_cache("analysis", analysis_cache)
 
 if github_token and github_token != "your_github_token_here":
-    endpoint = "https://models.github.ai/inference"
-    model = "gpt-4o"
-    
     client = ChatCompletionsClient(
         endpoint=endpoint,
         credential=AzureKeyCredential(github_token),
+        retry_total=0,  # Retries are handled by model_caller
     )
     print("✅ Using GitHub AI Models")
 else:
     client = None
     print("❌ Warning: No valid GITHUB_TOKEN found")
 
+def circuit_open_error(e: CircuitOpenError) -> HTTPException:
+    """503 telling the caller when the model endpoint is worth trying again"""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after + 0.999))})
+
+def check_circuit():
+    """Fail fast with 503 while the circuit breaker is open, before queueing for a model slot"""
+    remaining = model_caller.breaker.open_for()
+    if remaining > 0:
+        raise circuit_open_error(CircuitOpenError(remaining))
+
+async def close_client():
+    """Close the shared AI client and its connection pool"""
+    if client:
+        await client.close()
+
+# Bump when extraction logic changes so stale cache entries are not reused
+EXTRACTOR_VERSION = f"2-pdfplumber{pdfplumber.__version__}"
+
 # Response Models
 class CoverLetterData(BaseModel):
     file_name: Optional[str] = None
@@ -63,40 +174,91 @@ class CoverLetterData(BaseModel):
     position_title: str
     body_paragraphs: List[str]
 
+# Cover letter fields filled from the candidate profile rather than generated per letter
+CONTACT_FIELDS = ["your_name", "your_address", "your_email", "your_phone"]
+LETTER_FIELDS = [name for name in CoverLetterData.model_fields if name not in CONTACT_FIELDS]
+
+class CandidateRole(BaseModel):
+    title: str
+    company: str
+    dates: str
+    highlights: List[str]
+
+class CandidateProfile(BaseModel):
+    your_name: str
+    your_address: str
+    your_email: EmailStr
+    your_phone: str
+    headline: str
+    skills: List[str]
+    roles: List[CandidateRole]
+    achievements: List[str]
+    education: List[str]
+
 class AIAnalysisResponse(BaseModel):
     success: bool
     extracted_data: Optional[CoverLetterData] = None
     error_message: Optional[str] = None
     ai_confidence: Optional[str] = None
+    cached: bool = False
+    prompt_tokens_before: Optional[int] = None
+    prompt_tokens_after: Optional[int] = None
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+    expires_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+    download_url: Optional[str] = None
 
 class TextExtractor:
     """Text extraction utility"""
     
     @staticmethod
-    def extract_from_pdf(file_path: str) -> str:
+    def extract_from_pdf(content: bytes) -> str:
         try:
-            text_content = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content += page_text + "\n\n"
-            return text_content.strip()
+            with pdfplumber.open(io.BytesIO(content)) as pdf:
+                pages = iter_pdf_pages(pdf, AI_EXTRACT_MAX_PAGES, AI_EXTRACT_MAX_CHARS, mode=AI_PDF_EXTRACTION_MODE)
+                return "\n\n".join(page_text for _, page_text in pages if page_text).strip()
         except Exception as e:
             raise Exception(f"Error extracting PDF: {str(e)}")
     
     @staticmethod
-    def extract_from_docx(file_path: str) -> str:
+    def extract_from_docx(content: bytes) -> str:
         try:
-            doc = Document(file_path)
-            full_text = ""
-            for para in doc.paragraphs:
-                para_text = para.text.strip()
-                if para_text:
-                    full_text += para_text + "\n"
-            return full_text.strip()
+            with zipfile.ZipFile(io.BytesIO(content)) as package:
+                blocks = iter_docx_blocks(package, AI_EXTRACT_MAX_CHARS)
+                return "\n".join(block for block_type, block in blocks if block_type == "paragraph")
         except Exception as e:
             raise Exception(f"Error extracting DOCX: {str(e)}")
+    
+    @staticmethod
+    async def extract_cached(content: bytes, file_extension: str) -> str:
+        """Extract text from uploaded bytes in the extraction pool, reusing the cached text for identical uploads"""
+        mode = f"{file_extension}:{AI_PDF_EXTRACTION_MODE}:max_pages={AI_EXTRACT_MAX_PAGES}:max_chars={AI_EXTRACT_MAX_CHARS}"
+        cache_key = extraction_cache.make_key(content, "ai_cover_letter_api", EXTRACTOR_VERSION, mode)
+        cached = extraction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        with metrics.stage("extraction"):
+            if file_extension == '.pdf':
+                text = await extraction_pool.run(TextExtractor.extract_from_pdf, content)
+            else:
+                text = await extraction_pool.run(TextExtractor.extract_from_docx, content)
+        
+        extraction_cache.put(cache_key, text)
+        return text
+
+LETTER_FORMATTING_RULES = """IMPORTANT FORMATTING RULES:
+- Do NOT use em dashes (—) anywhere in the text
+- Use regular hyphens (-) for compound words and ranges
+- Use commas, periods, and semicolons for punctuation
+- Keep sentences clear and professional without special characters
+- Use standard business letter formatting and language"""
 
 class AIPromptEngineer:
     """AI Prompt Engineering for structured data extraction"""
@@ -137,12 +299,7 @@ Required fields to extract/generate:
   3. Demonstrate knowledge of the company/role from the job description
   4. Include specific examples of achievements that align with the job needs
 
-IMPORTANT FORMATTING RULES:
-- Do NOT use em dashes (—) anywhere in the text
-- Use regular hyphens (-) for compound words and ranges
-- Use commas, periods, and semicolons for punctuation
-- Keep sentences clear and professional without special characters
-- Use standard business letter formatting and language
+{LETTER_FORMATTING_RULES}
 
 Return the result in this exact JSON format:
 {{
@@ -164,13 +321,250 @@ Return the result in this exact JSON format:
 }}"""
 
     @staticmethod
-    def analyze_and_extract(resume_text: str, job_description: str) -> Dict[str, Any]:
+    def create_profile_system_prompt() -> str:
+        return """You are a helpful assistant that distills resumes into compact candidate profiles used to write cover letters.
+
+IMPORTANT: Always return your response as valid JSON format with the exact structure requested. Do not include any markdown formatting or code blocks - just pure JSON."""
+
+    @staticmethod
+    def create_profile_prompt(resume_text: str) -> str:
+        return f"""Here is the resume:
+
+{resume_text}
+
+Please extract a compact candidate profile:
+- your_name, your_address, your_email, your_phone: Contact details from the resume
+- headline: One sentence on the candidate's profession and seniority
+- skills: Up to 25 of the most relevant skills, tools and technologies
+- roles: Up to 6 most recent roles, each with title, company, dates and up to 4 short highlights
+- achievements: Up to 8 concrete, preferably quantified achievements
+- education: Degrees and certifications, one short line each
+
+Keep every entry short and leave out anything the resume does not state.
+
+Return the result in this exact JSON format:
+{{
+  "your_name": "Full Name",
+  "your_address": "Complete Address",
+  "your_email": "email@example.com",
+  "your_phone": "Phone Number",
+  "headline": "Backend engineer with 8 years of experience in Python services",
+  "skills": ["Python", "PostgreSQL"],
+  "roles": [
+    {{"title": "Senior Engineer", "company": "Company", "dates": "2020 - Present", "highlights": ["Led ..."]}}
+  ],
+  "achievements": ["Cut API latency by 40% ..."],
+  "education": ["BSc Computer Science, University"]
+}}"""
+
+    @staticmethod
+    def create_letter_prompt(profile_json: str, job_description: str) -> str:
+        return f"""Here is the candidate profile:
+
+{profile_json}
+
+Here is the job description:
+
+{job_description}
+
+Please generate a personalized cover letter for this candidate:
+
+Required fields to extract/generate:
+- file_name: Generate a suitable filename (e.g., "cover_letter_CompanyName_Position.docx")
+- employer_name: Extract from job description (hiring manager name) or use "Hiring Manager"
+- company_name: Extract from job description
+- company_address: Extract from job description or use "Company Address"
+- position_title: Extract from job description
+- body_paragraphs: Generate 3-4 professional cover letter body paragraphs that:
+  1. Show enthusiasm for the specific role and company
+  2. Highlight relevant experience and skills from the profile that match the job requirements
+  3. Demonstrate knowledge of the company/role from the job description
+  4. Include specific examples of achievements that align with the job needs
+
+{LETTER_FORMATTING_RULES}
+
+Return the result in this exact JSON format:
+{{
+  "file_name": "cover_letter_example.docx",
+  "employer_name": "Hiring Manager Name or 'Hiring Manager'",
+  "company_name": "Company Name",
+  "company_address": "Company Address",
+  "position_title": "Job Title",
+  "body_paragraphs": [
+    "First paragraph expressing interest and mentioning how you learned about the position...",
+    "Second paragraph highlighting relevant experience and skills...",
+    "Third paragraph demonstrating company knowledge and cultural fit...",
+    "Fourth paragraph with call to action and closing..."
+  ]
+}}"""
+
+    @staticmethod
+    def fit_to_budget(resume_text: str, job_description: str) -> Dict[str, Any]:
+        """
+        Strip job description boilerplate and trim both texts to the prompt token budget.
+        With AI_TWO_STAGE the texts go into different prompts: the resume is fitted here to the
+        profile prompt, and the job description in letter_request, once the profile is known.
+        """
+        if AI_TWO_STAGE:
+            overhead = count_tokens(AIPromptEngineer.create_profile_system_prompt() + AIPromptEngineer.create_profile_prompt(""), model)
+            budgeted = fit_prompt(resume_text, "", overhead, model=model)
+            print(f"Profile prompt tokens: {budgeted['tokens_before']} -> {budgeted['tokens_after']}")
+            return {**budgeted, "job_description": job_description}
+        overhead = count_tokens(AIPromptEngineer.create_system_prompt() + AIPromptEngineer.create_user_prompt("", ""), model)
+        budgeted = fit_prompt(resume_text, job_description, overhead, model=model)
+        print(f"Prompt tokens: {budgeted['tokens_before']} -> {budgeted['tokens_after']}"
+              f" (removed sections: {budgeted['removed_sections'] or 'none'})")
+        return budgeted
+
+    @staticmethod
+    def cache_key(resume_text: str, job_description: str) -> str:
+        """Key an analysis on the normalized inputs, the prompt templates, the model and sampling params"""
+        def digest(text: str) -> str:
+            return hashlib.sha256(" ".join(text.split()).encode()).hexdigest()
+        
+        if AI_TWO_STAGE:
+            prompt_template = (
+                AIPromptEngineer.create_profile_system_prompt() + AIPromptEngineer.create_profile_prompt("{resume}")
+                + AIPromptEngineer.create_system_prompt() + AIPromptEngineer.create_letter_prompt("{profile}", "{job_description}")
+            )
+        else:
+            prompt_template = AIPromptEngineer.create_system_prompt() + AIPromptEngineer.create_user_prompt("{resume}", "{job_description}")
+        return ":".join([
+            digest(resume_text),
+            digest(job_description),
+            hashlib.sha256(prompt_template.encode()).hexdigest(),
+            model,
+            f"temperature={TEMPERATURE}",
+            f"top_p={TOP_P}"
+        ])
+
+    @staticmethod
+    def create_messages(resume_text: str, job_description: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": AIPromptEngineer.create_system_prompt()},
+            {"role": "user", "content": AIPromptEngineer.create_user_prompt(resume_text, job_description)},
+        ]
+
+    @staticmethod
+    def create_profile_messages(resume_text: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": AIPromptEngineer.create_profile_system_prompt()},
+            {"role": "user", "content": AIPromptEngineer.create_profile_prompt(resume_text)},
+        ]
+
+    @staticmethod
+    def create_letter_messages(profile: CandidateProfile, job_description: str) -> List[Dict[str, str]]:
+        # Contact details are filled in from the profile afterwards, so only the name goes to the model
+        profile_json = profile.model_dump_json(exclude=set(CONTACT_FIELDS) - {"your_name"})
+        return [
+            {"role": "system", "content": AIPromptEngineer.create_system_prompt()},
+            {"role": "user", "content": AIPromptEngineer.create_letter_prompt(profile_json, job_description)},
+        ]
+
+    @staticmethod
+    def output_format(model_cls: type = CoverLetterData, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """model_extras asking for JSON matching model_cls (or some of its fields), unless disabled"""
+        if not AI_STRUCTURED_OUTPUT:
+            return None
+        return response_format_extras(model_cls, model_cls.__name__, fields)
+
+    @staticmethod
+    def profile_key(resume_text: str) -> str:
+        """Key a candidate profile on the normalized resume, the profile prompt and the model"""
+        prompt_template = AIPromptEngineer.create_profile_system_prompt() + AIPromptEngineer.create_profile_prompt("{resume}")
+        return ":".join([
+            hashlib.sha256(" ".join(resume_text.split()).encode()).hexdigest(),
+            hashlib.sha256(prompt_template.encode()).hexdigest(),
+            model
+        ])
+
+    @staticmethod
+    async def build_profile(resume_text: str, key: str) -> Dict[str, Any]:
+        """First stage: distil a resume into a CandidateProfile with one model call and cache it"""
+        print("Building candidate profile...")
+        messages = AIPromptEngineer.create_profile_messages(resume_text)
+        with metrics.stage("model_call"):
+            response = await model_caller.call(lambda: client.complete(
+                messages=messages,
+                temperature=0,  # Extraction, not writing; the profile is reused for every letter
+                model=model,
+                model_extras=AIPromptEngineer.output_format(CandidateProfile)
+            ))
+        result = await AIPromptEngineer.validate_or_repair(messages, response.choices[0].message.content, CandidateProfile)
+        if result["success"]:
+            profile_cache.put(key, result["data"].model_dump())
+        return result
+
+    @staticmethod
+    async def get_profile(resume_text: str) -> Dict[str, Any]:
+        """Cached candidate profile for a resume; concurrent requests for the same resume share one build"""
+        key = AIPromptEngineer.profile_key(resume_text)
+        cached = profile_cache.get(key)
+        if cached is not None:
+            return {"success": True, "data": CandidateProfile(**cached), "cached": True}
+        return await profile_builds.do(key, lambda: AIPromptEngineer.build_profile(resume_text, key))
+
+    @staticmethod
+    async def letter_request(resume_text: str, job_description: str) -> Dict[str, Any]:
+        """
+        Messages for the letter call, the fields the model should return and the fields that
+        are already known. With AI_TWO_STAGE the resume is replaced by its candidate profile.
+        """
+        if not AI_TWO_STAGE:
+            return {
+                "success": True,
+                "messages": AIPromptEngineer.create_messages(resume_text, job_description),
+                "fields": None,
+                "fixed": None
+            }
+        
+        profile = await AIPromptEngineer.get_profile(resume_text)
+        if not profile["success"]:
+            return {
+                "success": False,
+                "error": f"Could not build candidate profile: {profile['error']}"
+            }
+        # The job description shares the letter prompt with the profile, so it is fitted against both
+        template = AIPromptEngineer.create_letter_messages(profile["data"], "")
+        overhead = count_tokens("".join(message["content"] for message in template), model)
+        budgeted = fit_prompt("", job_description, overhead, model=model)
+        messages = AIPromptEngineer.create_letter_messages(profile["data"], budgeted["job_description"])
+        print(f"Letter prompt tokens: {budgeted['tokens_before']} -> {budgeted['tokens_after']}"
+              f" (profile {'cached' if profile.get('cached') else 'built'},"
+              f" removed sections: {budgeted['removed_sections'] or 'none'})")
+        return {
+            "success": True,
+            "messages": messages,
+            "fields": LETTER_FIELDS,
+            "fixed": profile["data"].model_dump(include=set(CONTACT_FIELDS)),
+            "letter_prompt_tokens": {"before": budgeted["tokens_before"], "after": budgeted["tokens_after"]},
+            "profile_cached": bool(profile.get("cached"))
+        }
+
+    @staticmethod
+    def with_prompt_tokens(result: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+        """Add what sent_prompt_tokens needs from a two-stage letter request to a result"""
+        if "letter_prompt_tokens" in request:
+            result.update(letter_prompt_tokens=request["letter_prompt_tokens"], profile_cached=request["profile_cached"])
+        return result
+
+    @staticmethod
+    def create_repair_messages(messages: List[Dict[str, str]], ai_response: str, invalid_fields: Dict[str, str]) -> List[Dict[str, str]]:
+        problems = "\n".join(f"- {name}: {reason}" for name, reason in invalid_fields.items())
+        return messages + [
+            {"role": "assistant", "content": ai_response},
+            {"role": "user", "content": f"""These fields in your answer are missing or invalid:
+
+{problems}
+
+Return a JSON object containing only these fields with corrected values, following the same rules as before."""},
+        ]
+
+    @staticmethod
+    async def analyze_and_extract(resume_text: str, job_description: str, priority: int = BATCH) -> Dict[str, Any]:
         """Use AI to analyze resume and job description and extract structured data"""
         
         try:
-            system_prompt = AIPromptEngineer.create_system_prompt()
-            user_prompt = AIPromptEngineer.create_user_prompt(resume_text, job_description)
-            
             # Use GitHub AI Models
             if not client:
                 raise Exception("AI client not available - check GITHUB_TOKEN")
@@ -178,115 +572,37 @@ Return the result in this exact JSON format:
             print("Sending request to GitHub AI Models...")
             
             # Fix for azure-ai-inference library issue - use proper message format
-            response = client.complete(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.7,
-                top_p=0.9,
-                model=model
-            )
-            
-            
-            # Get the raw response
-            ai_response = response.choices[0].message.content
-            
-            # Debug logging with more details
-            print("AI Response received")
-            print(f"Response type: {type(ai_response)}")
-            print(f"Response length: {len(ai_response) if ai_response else 'None'}")
-            print(f"First 200 chars: {ai_response[:200] if ai_response else 'None'}...")
-            
-            # Validate we got a response
-            if not ai_response:
-                return {
-                    "success": False,
-                    "error": "AI returned empty response",
-                    "raw_response": str(ai_response)
-                }
-            
-            # Clean up the response
-            cleaned_response = ai_response.strip()
-            
-            # Remove markdown code blocks if present
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response.replace('```json', '').replace('```', '').strip()
-            elif cleaned_response.startswith('```'):
-                cleaned_response = cleaned_response.replace('```', '').strip()
-            
-            # Remove any surrounding quotes if the entire response is quoted
-            if cleaned_response.startswith('"') and cleaned_response.endswith('"') and cleaned_response.count('"') == 2:
-                cleaned_response = cleaned_response[1:-1]
-            
-            print(f"Cleaned response length: {len(cleaned_response)}")
-            print(f"Cleaned first 200 chars: {cleaned_response[:200]}...")
-            
-            # Try to parse as JSON
-            try:
-                extracted_data = json.loads(cleaned_response)
-                print("JSON parsing successful")
-                print(f"Extracted data type: {type(extracted_data)}")
-                
-                # Validate that we got a dictionary
-                if not isinstance(extracted_data, dict):
-                    return {
-                        "success": False,
-                        "error": f"AI returned {type(extracted_data).__name__} instead of expected dictionary",
-                        "raw_response": ai_response,
-                        "cleaned_response": cleaned_response
-                    }
-                
-                # Validate required fields are present
-                required_fields = ['your_name', 'your_email', 'your_phone', 'company_name', 'position_title', 'body_paragraphs']
-                missing_fields = [field for field in required_fields if field not in extracted_data]
-                
-                if missing_fields:
-                    return {
-                        "success": False,
-                        "error": f"Missing required fields: {missing_fields}",
-                        "raw_response": ai_response,
-                        "extracted_data": extracted_data
-                    }
-                
-                print("All required fields present")
-                return {
-                    "success": True,
-                    "data": extracted_data,
-                    "confidence": "high"
-                }
+            async with admission_controller.slot(priority):
+                request = await AIPromptEngineer.letter_request(resume_text, job_description)
+                if not request["success"]:
+                    return request
+                with metrics.stage("model_call"):
+                    response = await model_caller.call(lambda: client.complete(
+                        messages=request["messages"],
+                        temperature=TEMPERATURE,
+                        top_p=TOP_P,
+                        model=model,
+                        model_extras=AIPromptEngineer.output_format(CoverLetterData, request["fields"])
+                    ))
                 
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing failed: {str(e)}")
+                # Get the raw response
+                ai_response = response.choices[0].message.content
                 
-                # Try to extract JSON from within the response
-                try:
-                    # Look for JSON-like content between curly braces
-                    import re
-                    json_match = re.search(r'\{.*\}', cleaned_response, re.DOTALL)
-                    if json_match:
-                        json_content = json_match.group(0)
-                        print(f"Found JSON content: {json_content[:200]}...")
-                        extracted_data = json.loads(json_content)
-                        
-                        if isinstance(extracted_data, dict):
-                            print("JSON extraction successful from regex")
-                            return {
-                                "success": True,
-                                "data": extracted_data,
-                                "confidence": "medium"
-                            }
-                except:
-                    pass
+                # Debug logging with more details
+                print("AI Response received")
+                print(f"Response length: {len(ai_response) if ai_response else 'None'}")
+                print(f"First 200 chars: {ai_response[:200] if ai_response else 'None'}...")
                 
-                return {
-                    "success": False,
-                    "error": f"Failed to parse AI response as JSON: {str(e)}",
-                    "raw_response": ai_response,
-                    "cleaned_response": cleaned_response,
-                    "json_error": str(e)
-                }
+                result = await AIPromptEngineer.validate_or_repair(
+                    request["messages"], ai_response, CoverLetterData, request["fixed"]
+                )
+                return AIPromptEngineer.with_prompt_tokens(result, request)
                 
+        except HTTPException:
+            # Admission control rejections go back to the caller as 429s
+            raise
+        except CircuitOpenError as e:
+            raise circuit_open_error(e)
         except Exception as e:
             print(f"AI analysis exception: {str(e)}")
             return {
@@ -294,56 +610,146 @@ Return the result in this exact JSON format:
                 "error": f"AI analysis failed: {str(e)}"
             }
 
-def generate_cover_letter_docx(data: CoverLetterData) -> str:
-    """Generate cover letter DOCX file"""
-    doc = Document()
-    
-    # Set font
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = 'Times New Roman'
-    font.size = Pt(12)
-    
-    # Header - Your information
-    doc.add_paragraph(data.your_name)
-    doc.add_paragraph(data.your_address)
-    doc.add_paragraph(f"Email: {data.your_email}")
-    doc.add_paragraph(f"Phone: {data.your_phone}")
-    doc.add_paragraph("")
-    
-    # Date
-    today = datetime.today().strftime("%B %d, %Y")
-    doc.add_paragraph(today)
-    doc.add_paragraph("")
-    
-    # Employer information
-    doc.add_paragraph(data.employer_name)
-    doc.add_paragraph(data.company_name)
-    doc.add_paragraph(data.company_address)
-    doc.add_paragraph("")
-    
-    # Greeting
-    doc.add_paragraph(f"Dear {data.employer_name},")
-    doc.add_paragraph("")
-    
-    # Body paragraphs
-    for paragraph in data.body_paragraphs:
-        doc.add_paragraph(paragraph)
-        doc.add_paragraph("")
-    
-    # Closing
-    doc.add_paragraph("Thank you for considering my application.")
-    doc.add_paragraph("")
-    doc.add_paragraph("Sincerely,")
-    doc.add_paragraph(data.your_name)
-    
-    # Generate filename if not provided
+    @staticmethod
+    async def stream_analysis(resume_text: str, job_description: str) -> AsyncIterator[Tuple]:
+        """
+        Stream the completion, yielding ("prompt", token info) once the prompt is built,
+        ("field", name, value) and ("item", name, index, value) events as the JSON arrives, then
+        ("result", parsed) with the same dict analyze_and_extract returns.
+        Contact fields from the candidate profile come first; fields fixed by a repair call are sent
+        again as "field" events before the result, except body paragraphs, which are sent as
+        ("reset", "body_paragraphs") followed by an "item" event per repaired paragraph.
+        The caller holds the admission slot for the whole stream. Opening the stream is retried like
+        any other call, but a stream that fails part way through is not, as its events are already out.
+        """
+        if not client:
+            raise Exception("AI client not available - check GITHUB_TOKEN")
+        
+        print("Sending streaming request to GitHub AI Models...")
+        request = await AIPromptEngineer.letter_request(resume_text, job_description)
+        if not request["success"]:
+            yield ("result", request)
+            return
+        yield ("prompt", AIPromptEngineer.with_prompt_tokens({}, request))
+        for name, value in (request["fixed"] or {}).items():
+            yield ("field", name, value)
+        
+        parser = JSONFieldStream()
+        chunks = []
+        # Timed until the last chunk arrives, like the non-streamed call
+        with metrics.stage("model_call"):
+            response = await model_caller.call(lambda: client.complete(
+                messages=request["messages"],
+                temperature=TEMPERATURE,
+                top_p=TOP_P,
+                model=model,
+                model_extras=AIPromptEngineer.output_format(CoverLetterData, request["fields"]),
+                stream=True
+            ), hedge=False)
+            try:
+                async for update in response:
+                    if not update.choices or not update.choices[0].delta.content:
+                        continue
+                    chunk = update.choices[0].delta.content
+                    chunks.append(chunk)
+                    for event in parser.feed(chunk):
+                        yield event
+            finally:
+                await response.aclose()
+        
+        print("AI streamed response received")
+        result = await AIPromptEngineer.validate_or_repair(
+            request["messages"], "".join(chunks), CoverLetterData, request["fixed"]
+        )
+        for name in result.get("repaired_fields", []):
+            if name == "body_paragraphs":
+                # The streamed paragraphs were invalid; replace them rather than append
+                yield ("reset", name)
+                for index, text in enumerate(result["data"].body_paragraphs):
+                    yield ("item", name, index, text)
+            else:
+                yield ("field", name, getattr(result["data"], name))
+        yield ("result", AIPromptEngineer.with_prompt_tokens(result, request))
+
+    @staticmethod
+    async def validate_or_repair(messages: List[Dict[str, str]], ai_response: Optional[str],
+                                 model_cls: type = CoverLetterData, fixed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Validate the model's answer against model_cls in one step, with `fixed` fields taking
+        precedence. If only some fields are missing or invalid, a repair call regenerates just
+        those instead of the whole answer.
+        """
+        if not ai_response:
+            return {
+                "success": False,
+                "error": "AI returned empty response"
+            }
+        
+        with metrics.stage("json_validate"):
+            checked = validate_output(model_cls, ai_response, fixed)
+        if checked["data"] is not None:
+            return {
+                "success": True,
+                "data": checked["data"],
+                "confidence": "high"
+            }
+        
+        invalid_fields = checked["invalid_fields"]
+        if not checked["partial"]:
+            return {
+                "success": False,
+                "error": f"Failed to parse AI response: {next(iter(invalid_fields.values()))}",
+                "raw_response": ai_response
+            }
+        
+        print(f"Repairing invalid fields: {', '.join(invalid_fields)}")
+        with metrics.stage("model_call"):
+            repair = await model_caller.call(lambda: client.complete(
+                messages=AIPromptEngineer.create_repair_messages(messages, ai_response, invalid_fields),
+                temperature=TEMPERATURE,
+                top_p=TOP_P,
+                model=model,
+                model_extras=AIPromptEngineer.output_format(model_cls, list(invalid_fields))
+            ))
+        try:
+            fixes = json.loads(repair.choices[0].message.content or "")
+        except json.JSONDecodeError:
+            fixes = {}
+        if not isinstance(fixes, dict):
+            fixes = {}
+        
+        merged = {**checked["partial"], **{name: fixes[name] for name in invalid_fields if name in fixes}}
+        with metrics.stage("json_validate"):
+            checked = validate_output(model_cls, json.dumps(merged), fixed)
+        if checked["data"] is None:
+            problems = "; ".join(f"{name}: {reason}" for name, reason in checked["invalid_fields"].items())
+            return {
+                "success": False,
+                "error": f"Data validation error: {problems}",
+                "raw_response": ai_response
+            }
+        return {
+            "success": True,
+            "data": checked["data"],
+            "confidence": "medium",
+            "repaired_fields": list(invalid_fields)
+        }
+
+def cover_letter_filename(data: CoverLetterData) -> str:
+    """Download filename for a cover letter, safe to use in a Content-Disposition header"""
     filename = data.file_name or f"cover_letter_{data.company_name}_{data.position_title}_{uuid.uuid4().hex[:8]}.docx"
-    filename = filename.replace(" ", "_").replace("/", "_").replace("\\", "_")
-    
-    doc.save(filename)
+    filename = re.sub(r'[^A-Za-z0-9._-]', '_', filename)
+    if not filename.lower().endswith('.docx'):
+        filename += '.docx'
     return filename
 
+def generate_cover_letter_docx(data: CoverLetterData) -> bytes:
+    """Generate cover letter DOCX file in memory from the precompiled template"""
+    with metrics.stage("docx_render"):
+        docx_bytes = cover_letter_template.render(data)
+    metrics.count_bytes("docx_render", len(docx_bytes))
+    return docx_bytes
+
 @app.get("/")
 async def root():
     """API information"""
@@ -359,6 +765,15 @@ async def root():
         "endpoints": {
             "/generate-ai-cover-letter": "POST - Upload resume + job description for AI analysis",
             "/analyze-documents": "POST - Analyze documents and return extracted data (no file generation)",
+            "/analyze-documents-stream": "POST - Same analysis streamed as Server-Sent Events",
+            "/cache-stats": "GET - Extraction, analysis and candidate profile cache counters",
+            "/admission-stats": "GET - Model call queue depth, rejections and wait times",
+            "/generate-ai-cover-letters-batch": "POST - Cover letters for one resume and many jobs, streamed as a ZIP",
+            "/resilience-stats": "GET - Model call retries, hedges and circuit breaker state",
+            "/jobs": "POST - Queue a cover letter in the background; returns 202 with a job ID",
+            "/jobs/{job_id}": "GET - Job status; ?wait=N long-polls until it finishes",
+            "/jobs/{job_id}/download": "GET - Download a finished job's DOCX",
+            "/job-stats": "GET - Background job counts and worker activity",
             "/health": "GET - Health check"
         }
     }
@@ -374,14 +789,154 @@ async def health_check():
     return {
         "status": "healthy",
         "ai_service": ai_status,
+        "max_concurrent_model_calls": AI_MAX_CONCURRENCY,
+        "model_circuit": model_caller.breaker.state,
         "message": "AI-powered cover letter generator is running"
     }
 
+@app.get("/admission-stats")
+async def admission_stats():
+    """Model call slots, queue depth by priority, rejections and queue wait times"""
+    return admission_controller.stats()
+
+@app.get("/resilience-stats")
+async def resilience_stats():
+    """Model call retries, hedged requests and circuit breaker state"""
+    return model_caller.stats()
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Extraction, analysis and candidate profile cache counters"""
+    return {
+        "extraction": extraction_cache.stats(),
+        "analysis": {"enabled": AI_RESULT_CACHE_ENABLED, **analysis_cache.stats()},
+        "profile": {"enabled": AI_TWO_STAGE, **profile_cache.stats(), "builds": profile_builds.stats()}
+    }
+
+async def read_resume_text(resume: UploadFile) -> str:
+    """Extract the text of an uploaded resume"""
+    resume_filename = resume.filename or "resume.txt"
+    resume_ext = Path(resume_filename).suffix.lower()
+    
+    # If it's a text file (from HTML blob), read directly
+    if resume_ext in ['.txt', ''] or resume_filename == 'resume.txt':
+        async with buffered_upload(resume) as resume_content:
+            resume_text = resume_content.decode('utf-8')
+    else:
+        # Handle PDF/DOCX files
+        if resume_ext not in ['.pdf', '.docx']:
+            raise HTTPException(status_code=400, detail="Resume must be PDF, DOCX, or text")
+        
+        async with buffered_upload(resume) as resume_content:
+            resume_text = await TextExtractor.extract_cached(resume_content, resume_ext)
+    
+    if not resume_text.strip():
+        raise HTTPException(status_code=400, detail="Resume text is empty")
+    return resume_text
+
+async def read_analysis_inputs(
+    resume: UploadFile,
+    job_description: Optional[UploadFile],
+    job_description_text: Optional[str]
+) -> Tuple[str, str]:
+    """Extract the resume and job description texts from the uploaded form"""
+    resume_text = await read_resume_text(resume)
+    
+    # Get job description text
+    if job_description_text:
+        job_desc_text = job_description_text
+    elif job_description:
+        job_ext = Path(job_description.filename).suffix.lower()
+        if job_ext not in ['.pdf', '.docx']:
+            raise HTTPException(status_code=400, detail="Job description must be PDF or DOCX")
+        
+        async with buffered_upload(job_description) as job_content:
+            job_desc_text = await TextExtractor.extract_cached(job_content, job_ext)
+    else:
+        raise HTTPException(status_code=400, detail="Must provide either job_description file or job_description_text")
+    
+    # Validate we have content
+    if not job_desc_text.strip():
+        raise HTTPException(status_code=400, detail="Job description text is empty")
+    
+    return resume_text, job_desc_text
+
+def sent_prompt_tokens(prompt_tokens: Dict[str, int], result: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Prompt token counts of the prompts a request sent. prompt_tokens come from prepare_analysis:
+    the whole prompt, or with AI_TWO_STAGE the profile prompt, to which the letter prompt is added
+    here (the profile prompt only counts if this request built the profile).
+    """
+    letter = result.get("letter_prompt_tokens")
+    if letter is None:
+        return prompt_tokens
+    profile = {"prompt_tokens_before": 0, "prompt_tokens_after": 0} if result["profile_cached"] else prompt_tokens
+    return {
+        "prompt_tokens_before": profile["prompt_tokens_before"] + letter["before"],
+        "prompt_tokens_after": profile["prompt_tokens_after"] + letter["after"]
+    }
+
+def build_analysis_response(result: Dict[str, Any], cache_key: str, prompt_tokens: Dict[str, int]) -> AIAnalysisResponse:
+    """API response for an analysis result, caching successful ones when enabled"""
+    prompt_tokens = sent_prompt_tokens(prompt_tokens, result)
+    if result["success"]:
+        cover_letter_data = result["data"]
+        if AI_RESULT_CACHE_ENABLED:
+            analysis_cache.put(cache_key, {
+                "data": cover_letter_data.model_dump(),
+                "confidence": result.get("confidence", "unknown")
+            })
+        return AIAnalysisResponse(
+            success=True,
+            extracted_data=cover_letter_data,
+            ai_confidence=result.get("confidence", "unknown"),
+            **prompt_tokens
+        )
+    else:
+        return AIAnalysisResponse(
+            success=False,
+            error_message=result.get("error", "Unknown AI analysis error"),
+            **prompt_tokens
+        )
+
+def prepare_analysis(resume_text: str, job_desc_text: str, force_refresh: bool) -> Dict[str, Any]:
+    """Budget the prompt inputs and look up a previously validated result for them"""
+    # Keep the prompt within the token budget
+    budgeted = AIPromptEngineer.fit_to_budget(resume_text, job_desc_text)
+    prompt_tokens = {
+        "prompt_tokens_before": budgeted["tokens_before"],
+        "prompt_tokens_after": budgeted["tokens_after"]
+    }
+    cache_key = AIPromptEngineer.cache_key(budgeted["resume_text"], budgeted["job_description"])
+    
+    # Serve a previously validated result for the same inputs unless asked not to
+    cached_response = None
+    if AI_RESULT_CACHE_ENABLED and not force_refresh:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            cached_response = AIAnalysisResponse(
+                success=True,
+                extracted_data=CoverLetterData(**cached["data"]),
+                ai_confidence=cached["confidence"],
+                cached=True,
+                **prompt_tokens
+            )
+    
+    return {
+        "resume_text": budgeted["resume_text"],
+        "job_description": budgeted["job_description"],
+        "prompt_tokens": prompt_tokens,
+        "cache_key": cache_key,
+        "cached_response": cached_response
+    }
+
 @app.post("/analyze-documents", response_model=AIAnalysisResponse)
 async def analyze_documents(
     resume: UploadFile = File(...),
     job_description: UploadFile = File(None),
-    job_description_text: str = Form(None)
+    job_description_text: str = Form(None),
+    force_refresh: bool = Form(False),
+    x_request_priority: Optional[str] = Header(None)
 ):
     """
     Analyze resume and job description using AI to extract structured data
@@ -389,86 +944,25 @@ async def analyze_documents(
     - **resume**: Upload resume file (PDF or DOCX)
     - **job_description**: Upload job description file (PDF or DOCX) OR
     - **job_description_text**: Provide job description as text
+    - **force_refresh**: Skip the analysis cache and generate a fresh result
+    - **X-Request-Priority** header: `interactive` for the web UI; other callers queue as batch
     """
     
     if not client:
         raise HTTPException(status_code=503, detail="AI service unavailable - missing GITHUB_TOKEN")
     
     try:
-        # Handle resume text extraction
-        resume_filename = resume.filename or "resume.txt"
-        resume_ext = Path(resume_filename).suffix.lower()
-        
-        # If it's a text file (from HTML blob), read directly
-        if resume_ext in ['.txt', ''] or resume_filename == 'resume.txt':
-            resume_content = await resume.read()
-            resume_text = resume_content.decode('utf-8')
-        else:
-            # Handle PDF/DOCX files
-            if resume_ext not in ['.pdf', '.docx']:
-                raise HTTPException(status_code=400, detail="Resume must be PDF, DOCX, or text")
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=resume_ext) as temp_resume:
-                resume_content = await resume.read()
-                temp_resume.write(resume_content)
-                temp_resume_path = temp_resume.name
-            
-            if resume_ext == '.pdf':
-                resume_text = TextExtractor.extract_from_pdf(temp_resume_path)
-            else:
-                resume_text = TextExtractor.extract_from_docx(temp_resume_path)
-            
-            os.unlink(temp_resume_path)
-        
-        # Get job description text
-        if job_description_text:
-            job_desc_text = job_description_text
-        elif job_description:
-            job_ext = Path(job_description.filename).suffix.lower()
-            if job_ext not in ['.pdf', '.docx']:
-                raise HTTPException(status_code=400, detail="Job description must be PDF or DOCX")
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=job_ext) as temp_job:
-                job_content = await job_description.read()
-                temp_job.write(job_content)
-                temp_job_path = temp_job.name
-            
-            if job_ext == '.pdf':
-                job_desc_text = TextExtractor.extract_from_pdf(temp_job_path)
-            else:
-                job_desc_text = TextExtractor.extract_from_docx(temp_job_path)
-            
-            os.unlink(temp_job_path)
-        else:
-            raise HTTPException(status_code=400, detail="Must provide either job_description file or job_description_text")
-        
-        # Validate we have content
-        if not resume_text.strip():
-            raise HTTPException(status_code=400, detail="Resume text is empty")
-        if not job_desc_text.strip():
-            raise HTTPException(status_code=400, detail="Job description text is empty")
+        resume_text, job_desc_text = await read_analysis_inputs(resume, job_description, job_description_text)
+        analysis = prepare_analysis(resume_text, job_desc_text, force_refresh)
+        if analysis["cached_response"] is not None:
+            return analysis["cached_response"]
         
         # AI Analysis
-        result = AIPromptEngineer.analyze_and_extract(resume_text, job_desc_text)
-        
-        if result["success"]:
-            try:
-                cover_letter_data = CoverLetterData(**result["data"])
-                return AIAnalysisResponse(
-                    success=True,
-                    extracted_data=cover_letter_data,
-                    ai_confidence=result.get("confidence", "unknown")
-                )
-            except Exception as e:
-                return AIAnalysisResponse(
-                    success=False,
-                    error_message=f"Data validation error: {str(e)}"
-                )
-        else:
-            return AIAnalysisResponse(
-                success=False,
-                error_message=result.get("error", "Unknown AI analysis error")
-            )
+        check_circuit()
+        result = await AIPromptEngineer.analyze_and_extract(
+            analysis["resume_text"], analysis["job_description"], priority_from_header(x_request_priority)
+        )
+        return build_analysis_response(result, analysis["cache_key"], analysis["prompt_tokens"])
             
     except HTTPException:
         raise
@@ -478,11 +972,106 @@ async def analyze_documents(
             error_message=f"Analysis failed: {str(e)}"
         )
 
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_analysis_events(analysis: Dict[str, Any]) -> AsyncIterator[str]:
+    """SSE stream of fields and body paragraphs as the model writes them, ending with the validated result"""
+    cached_response = analysis["cached_response"]
+    if cached_response is not None:
+        yield sse_event("meta", analysis["prompt_tokens"])
+        data = cached_response.extracted_data.model_dump()
+        for name, value in data.items():
+            if name != "body_paragraphs":
+                yield sse_event("field", {"name": name, "value": value})
+        for index, text in enumerate(data["body_paragraphs"]):
+            yield sse_event("paragraph", {"index": index, "text": text})
+        yield sse_event("done", cached_response.model_dump(mode="json"))
+        return
+    
+    try:
+        meta_sent = False
+        async for event in AIPromptEngineer.stream_analysis(analysis["resume_text"], analysis["job_description"]):
+            if event[0] == "prompt":
+                # The two-stage letter prompt is only fitted once the profile is known
+                yield sse_event("meta", sent_prompt_tokens(analysis["prompt_tokens"], event[1]))
+                meta_sent = True
+            elif event[0] == "item" and event[1] == "body_paragraphs":
+                yield sse_event("paragraph", {"index": event[2], "text": event[3]})
+            elif event[0] == "reset" and event[1] == "body_paragraphs":
+                yield sse_event("paragraphs_reset", {})
+            elif event[0] == "field" and event[1] != "body_paragraphs":
+                yield sse_event("field", {"name": event[1], "value": event[2]})
+            elif event[0] == "result":
+                if not meta_sent:
+                    yield sse_event("meta", sent_prompt_tokens(analysis["prompt_tokens"], event[1]))
+                response = build_analysis_response(event[1], analysis["cache_key"], analysis["prompt_tokens"])
+                yield sse_event("done", response.model_dump(mode="json"))
+    except Exception as e:
+        print(f"AI streaming exception: {str(e)}")
+        yield sse_event("error", {"error_message": f"AI analysis failed: {str(e)}"})
+
+@app.post("/analyze-documents-stream")
+async def analyze_documents_stream(
+    resume: UploadFile = File(...),
+    job_description: UploadFile = File(None),
+    job_description_text: str = Form(None),
+    force_refresh: bool = Form(False),
+    x_request_priority: Optional[str] = Header(None)
+):
+    """
+    Streaming variant of /analyze-documents using Server-Sent Events
+    
+    Emits `meta` (prompt token counts), then a `field` event as each field completes and a
+    `paragraph` event as each body paragraph completes. If a repair call rewrites the paragraphs,
+    `paragraphs_reset` tells the client to discard those shown so far before they are sent
+    again. Ends with `done` carrying the same payload
+    /analyze-documents returns (or `error`). Admission is decided before the stream starts,
+    so a full queue is still a plain 429.
+    """
+    
+    if not client:
+        raise HTTPException(status_code=503, detail="AI service unavailable - missing GITHUB_TOKEN")
+    
+    try:
+        resume_text, job_desc_text = await read_analysis_inputs(resume, job_description, job_description_text)
+        analysis = prepare_analysis(resume_text, job_desc_text, force_refresh)
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Extraction failures (unreadable file, timeout) get the message /analyze-documents returns, as the only event
+        return StreamingResponse(
+            iter([sse_event("error", {"error_message": f"Analysis failed: {str(e)}"})]),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    # Hold a model slot for the whole stream; released once the response has been sent or abandoned
+    release_slot = None
+    if analysis["cached_response"] is None:
+        check_circuit()
+        await admission_controller.acquire(priority_from_header(x_request_priority))
+        admitted_at = time.monotonic()
+        
+        async def release():
+            admission_controller.release(time.monotonic() - admitted_at)
+        release_slot = BackgroundTask(release)
+    
+    return StreamingResponse(
+        stream_analysis_events(analysis),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=release_slot
+    )
+
 @app.post("/generate-ai-cover-letter")
 async def generate_ai_cover_letter(
     resume: UploadFile = File(...),
     job_description: UploadFile = File(None),
-    job_description_text: str = Form(None)
+    job_description_text: str = Form(None),
+    force_refresh: bool = Form(False),
+    x_request_priority: Optional[str] = Header(None)
 ):
     """
     Generate a complete cover letter using AI analysis of resume and job description
@@ -490,30 +1079,253 @@ async def generate_ai_cover_letter(
     - **resume**: Upload resume file (PDF or DOCX)  
     - **job_description**: Upload job description file (PDF or DOCX) OR
     - **job_description_text**: Provide job description as text
+    - **force_refresh**: Skip the analysis cache and generate a fresh result
     
     Returns a downloadable DOCX cover letter file
     """
     
     # First analyze the documents
-    analysis_result = await analyze_documents(resume, job_description, job_description_text)
+    analysis_result = await analyze_documents(resume, job_description, job_description_text, force_refresh, x_request_priority)
     
     if not analysis_result.success:
         raise HTTPException(status_code=400, detail=analysis_result.error_message)
     
     try:
         # Generate the cover letter file
-        filename = generate_cover_letter_docx(analysis_result.extracted_data)
+        docx_bytes = generate_cover_letter_docx(analysis_result.extracted_data)
+        filename = cover_letter_filename(analysis_result.extracted_data)
         
-        return FileResponse(
-            path=filename,
+        return Response(
+            content=docx_bytes,
             media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            filename=filename,
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "X-Prompt-Tokens-Before": str(analysis_result.prompt_tokens_before),
+                "X-Prompt-Tokens-After": str(analysis_result.prompt_tokens_after)
+            }
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate cover letter: {str(e)}")
 
+async def generate_letter_file(
+    resume_text: str, job: Dict[str, str], force_refresh: bool = False, priority: int = BATCH
+) -> Tuple[str, bytes]:
+    """Scrape if needed, analyze and render the cover letter for one job of a batch or background job"""
+    job_desc_text = job.get("text", "")
+    if job.get("url"):
+        if "linkedin.com/jobs/view/" not in job["url"]:
+            raise Exception("Invalid URL. Please provide a LinkedIn job posting URL")
+        success, job_desc_text, error_message = await get_job_description(job["url"])
+        if not success:
+            raise Exception(error_message)
+    if not job_desc_text.strip():
+        raise Exception("Job description text is empty")
+    
+    analysis = prepare_analysis(resume_text, job_desc_text, force_refresh)
+    response = analysis["cached_response"]
+    if response is None:
+        result = await AIPromptEngineer.analyze_and_extract(analysis["resume_text"], analysis["job_description"], priority)
+        response = build_analysis_response(result, analysis["cache_key"], analysis["prompt_tokens"])
+    if not response.success:
+        raise Exception(response.error_message)
+    return cover_letter_filename(response.extracted_data), generate_cover_letter_docx(response.extracted_data)
+
+async def stream_batch_zip(resume_text: str, jobs: List[Dict[str, str]]) -> AsyncIterator[bytes]:
+    """ZIP of cover letters, each added as soon as it is ready, ending with manifest.json"""
+    archive = ZipStream()
+    semaphore = asyncio.Semaphore(AI_BATCH_CONCURRENCY)
+    
+    async def run(index: int, job: Dict[str, str]) -> Tuple[Dict[str, Any], Optional[str], Optional[bytes]]:
+        entry = {"index": index, "source": job.get("url", "text")}
+        start = time.monotonic()
+        try:
+            async with semaphore:
+                filename, docx_bytes = await generate_letter_file(resume_text, job)
+            return entry, filename, docx_bytes
+        except Exception as e:
+            # A failed job goes into the manifest instead of ending the batch
+            print(f"Batch job {index} failed: {str(e)}")
+            entry["error"] = str(e)
+            return entry, None, None
+        finally:
+            entry["seconds"] = round(time.monotonic() - start, 2)
+    
+    tasks = [asyncio.ensure_future(run(index, job)) for index, job in enumerate(jobs)]
+    entries = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            entry, filename, docx_bytes = await next_done
+            if docx_bytes is not None:
+                entry["file"] = archive.unique_name(filename)
+                yield archive.add(entry["file"], docx_bytes, compress=False)
+            entries.append(entry)
+        
+        entries.sort(key=lambda entry: entry["index"])
+        succeeded = sum(1 for entry in entries if "file" in entry)
+        manifest = {
+            "total": len(entries),
+            "succeeded": succeeded,
+            "failed": len(entries) - succeeded,
+            "jobs": entries
+        }
+        yield archive.add("manifest.json", json.dumps(manifest, indent=2).encode())
+        yield archive.close()
+    finally:
+        # Stop outstanding jobs if the client disconnects mid-stream
+        for task in tasks:
+            task.cancel()
+
+@app.post("/generate-ai-cover-letters-batch")
+async def generate_ai_cover_letters_batch(
+    resume: UploadFile = File(...),
+    job_description_texts: List[str] = Form(None),
+    job_urls: List[str] = Form(None)
+):
+    """
+    Generate cover letters for one resume and many jobs, streamed back as a ZIP
+    
+    - **resume**: Upload resume file (PDF, DOCX or text)
+    - **job_description_texts**: A job description; repeat the field for each job
+    - **job_urls**: A LinkedIn job posting URL; repeat the field for each job
+    
+    The resume is extracted once; jobs are scraped and generated concurrently, and each letter
+    is added to the archive as soon as it is ready. manifest.json, written last, lists every
+    job with its file name or the reason it failed.
+    """
+    
+    if not client:
+        raise HTTPException(status_code=503, detail="AI service unavailable - missing GITHUB_TOKEN")
+    
+    jobs = [{"text": text} for text in job_description_texts or []] + [{"url": url.strip()} for url in job_urls or []]
+    if not jobs:
+        raise HTTPException(status_code=400, detail="Provide at least one job_description_texts or job_urls entry")
+    if len(jobs) > AI_BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"Too many jobs: {len(jobs)}. Maximum per batch: {AI_BATCH_MAX_JOBS}")
+    
+    resume_text = await read_resume_text(resume)
+    check_circuit()
+    
+    return StreamingResponse(
+        stream_batch_zip(resume_text, jobs),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=cover_letters.zip"}
+    )
+
+async def run_letter_job(payload: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Background job handler: the cover letter file for a submitted resume and job"""
+    return await generate_letter_file(
+        payload["resume_text"], payload["job"], payload["force_refresh"], payload["priority"]
+    )
+
+letter_jobs = JobQueue(
+    AI_JOB_DB,
+    run_letter_job,
+    workers=AI_JOB_WORKERS,
+    result_ttl=AI_JOB_RESULT_TTL,
+    lease=AI_JOB_LEASE,
+    max_attempts=AI_JOB_MAX_ATTEMPTS,
+    max_queued=AI_JOB_MAX_QUEUED
+)
+
+def utc_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp, timezone.utc) if timestamp is not None else None
+
+def job_status_response(job: Dict[str, Any], root_path: str) -> JobStatusResponse:
+    """API view of a stored job"""
+    return JobStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        created_at=utc_datetime(job["created_at"]),
+        updated_at=utc_datetime(job["updated_at"]),
+        expires_at=utc_datetime(job["expires_at"]),
+        error_message=job["error"],
+        download_url=f"{root_path}/jobs/{job['id']}/download" if job["status"] == DONE else None
+    )
+
+@app.post("/jobs", status_code=202, response_model=JobStatusResponse)
+async def submit_cover_letter_job(
+    request: Request,
+    resume: UploadFile = File(...),
+    job_description: UploadFile = File(None),
+    job_description_text: str = Form(None),
+    job_url: str = Form(None),
+    force_refresh: bool = Form(False),
+    x_request_priority: Optional[str] = Header(None)
+):
+    """
+    Queue a cover letter for background generation
+    
+    - **resume**: Upload resume file (PDF, DOCX or text)
+    - **job_description**: Upload job description file (PDF or DOCX) OR
+    - **job_description_text**: Provide job description as text OR
+    - **job_url**: A LinkedIn job posting URL, scraped by the worker
+    - **force_refresh**: Skip the analysis cache and generate a fresh result
+    
+    Uploads are extracted before this returns 202 with the job ID. Poll `GET /jobs/{job_id}`
+    (add `?wait=N` to long-poll) until the status is `done`, then download the DOCX from
+    its download_url. Results are kept for AI_JOB_RESULT_TTL seconds.
+    """
+    
+    if not client:
+        raise HTTPException(status_code=503, detail="AI service unavailable - missing GITHUB_TOKEN")
+    
+    if job_url and not (job_description or job_description_text):
+        if "linkedin.com/jobs/view/" not in job_url:
+            raise HTTPException(status_code=400, detail="Invalid URL. Please provide a LinkedIn job posting URL")
+        resume_text, job = await read_resume_text(resume), {"url": job_url.strip()}
+    else:
+        resume_text, job_desc_text = await read_analysis_inputs(resume, job_description, job_description_text)
+        job = {"text": job_desc_text}
+    
+    job_id = await letter_jobs.submit({
+        "resume_text": resume_text,
+        "job": job,
+        "force_refresh": force_refresh,
+        "priority": priority_from_header(x_request_priority)
+    })
+    root_path = request.scope.get("root_path", "")
+    response = job_status_response(await letter_jobs.get(job_id), root_path)
+    return JSONResponse(
+        status_code=202,
+        content=response.model_dump(mode="json"),
+        headers={"Location": f"{root_path}/jobs/{job_id}"}
+    )
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_cover_letter_job(request: Request, job_id: str, wait: float = 0):
+    """
+    Status of a background job: queued, running, done or failed
+    
+    - **wait**: Seconds to long-poll for the job to finish (capped at AI_JOB_MAX_WAIT)
+    """
+    job = await letter_jobs.wait(job_id, min(max(wait, 0), AI_JOB_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or its result has expired")
+    return job_status_response(job, request.scope.get("root_path", ""))
+
+@app.get("/jobs/{job_id}/download")
+async def download_cover_letter_job(job_id: str):
+    """Download the DOCX of a finished background job"""
+    result = await letter_jobs.result(job_id)
+    if result is None:
+        job = await letter_jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found or its result has expired")
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}; no cover letter to download")
+    filename, docx_bytes = result
+    return Response(
+        content=docx_bytes,
+        media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@app.get("/job-stats")
+async def job_stats():
+    """Background job counts by status and this process's worker activity"""
+    return await letter_jobs.stats()
+
 if __name__ == "__main__":
     print("Starting AI-Powered Cover Letter Generator...")
     print(f"AI Service: {'✅ Available' if client else '❌ Unavailable (missing GITHUB_TOKEN)'}")
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+python-docx vs direct-XML DOCX text extraction on table-heavy resumes.
+
+    python -m benchmarks.bench_docx_extract --sections 5 20 50 --repeat 5
+
+The python-docx column is the previous extract_from_docx implementation
+(Document(), doc.paragraphs, then table.rows[].cells); the direct column is
+the current one, which streams word/document.xml. Paragraph and table output is
+checked against python-docx before timing.
+"""
+import io
+import time
+import argparse
+import statistics
+from docx import Document
+from benchmarks.corpus import make_docx
+from text_extractor_api import TextExtractorAPI
+
+def extract_with_python_docx(content: bytes) -> tuple:
+    doc = Document(io.BytesIO(content))
+    paragraphs = [para.text.strip() for para in doc.paragraphs if para.text.strip()]
+    tables = [[[cell.text.strip() for cell in row.cells] for row in table.rows] for table in doc.tables]
+    return paragraphs, tables
+
+def extract_direct(content: bytes) -> tuple:
+    result = TextExtractorAPI.extract_from_docx(content, "bench.docx")
+    if not result["success"]:
+        raise SystemExit(result["error_message"])
+    return result["paragraphs"], result["tables"]
+
+def time_extraction(extract, content: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--rows", type=int, default=12)
+    parser.add_argument("--cols", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'sections':>8} {'tables':>7} {'size':>8} {'python-docx':>12} {'direct':>9} {'speedup':>8}")
+    for sections in args.sections:
+        content = make_docx(sections, args.rows, args.cols, seed=sections)
+        if extract_direct(content) != extract_with_python_docx(content):
+            raise SystemExit(f"Direct output differs from python-docx output ({sections} sections)")
+        reference = time_extraction(extract_with_python_docx, content, args.repeat)
+        direct = time_extraction(extract_direct, content, args.repeat)
+        print(
+            f"{sections:>8} {sections:>7} {len(content) // 1024:>6}KB {reference * 1000:>10.1f}ms"
+            f" {direct * 1000:>7.1f}ms {reference / direct:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare cover letter rendering through python-docx with the precompiled template.
+
+    python -m benchmarks.bench_docx_render --iterations 200
+
+Both renderers are checked to produce the same paragraphs before timing.
+"""
+import io
+import time
+import argparse
+import statistics
+from datetime import datetime
+from types import SimpleNamespace
+from docx import Document
+from docx_template import build_cover_letter_document, cover_letter_template
+
+SAMPLE_LETTER = SimpleNamespace(
+    file_name="cover_letter_Acme_Backend_Engineer.docx",
+    your_name="Jane Doe",
+    your_address="1 Main Street, Springfield",
+    your_email="jane.doe@example.com",
+    your_phone="+1 555 0100",
+    employer_name="Hiring Manager",
+    company_name="Acme & Sons <Holdings>",
+    company_address="42 Market Street\nSpringfield",
+    position_title="Backend Engineer",
+    body_paragraphs=[
+        "I am excited to apply for the Backend Engineer role at Acme. " * 4,
+        "In my current role I built and operated Python services that handle millions of requests a day. " * 4,
+        "Acme's focus on reliable developer tooling matches the work I enjoy most. " * 4,
+        "I would welcome the chance to discuss how I can contribute to your team. " * 4,
+    ]
+)
+
+def render_python_docx(data) -> bytes:
+    doc = build_cover_letter_document(data, datetime.today().strftime("%B %d, %Y"))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def render_template(data) -> bytes:
+    return cover_letter_template.render(data)
+
+def paragraph_texts(docx_bytes: bytes) -> list:
+    return [paragraph.text for paragraph in Document(io.BytesIO(docx_bytes)).paragraphs]
+
+def time_renderer(render, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        render(SAMPLE_LETTER)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    reference = render_python_docx(SAMPLE_LETTER)
+    candidate = render_template(SAMPLE_LETTER)
+    if paragraph_texts(reference) != paragraph_texts(candidate):
+        raise SystemExit("Template output does not match the python-docx output")
+
+    results = {}
+    for name, render in [("python-docx", render_python_docx), ("template", render_template)]:
+        timings = time_renderer(render, args.iterations)
+        results[name] = statistics.median(timings)
+        print(f"{name:12s} median {results[name] * 1000:8.3f} ms   "
+              f"p99 {sorted(timings)[int(len(timings) * 0.99) - 1] * 1000:8.3f} ms   "
+              f"size {len(render(SAMPLE_LETTER)):7d} bytes")
+
+    print(f"speedup      {results['python-docx'] / results['template']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Layout vs fast PDF text extraction over a synthetic resume corpus.
+
+    python -m benchmarks.bench_pdf_fast --resumes 20 --repeat 3
+
+For each document kind the table shows pages/second in both modes and how
+similar the fast output is to the layout output (difflib ratio over the full
+text, and the share of lines that match exactly). Timings are the median over
+--repeat runs in this process, without the extraction pool.
+"""
+import time
+import argparse
+import difflib
+import statistics
+from benchmarks.corpus import make_pdf, make_resume_pdf
+from text_extractor_api import TextExtractorAPI
+
+def extract_all(documents: list, mode: str) -> list:
+    texts = []
+    for content in documents:
+        result = TextExtractorAPI.extract_from_pdf(content, "bench.pdf", mode=mode)
+        if not result["success"]:
+            raise SystemExit(result["error_message"])
+        texts.append(result["full_text"])
+    return texts
+
+def time_mode(documents: list, mode: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_all(documents, mode)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def similarity(expected: list, actual: list) -> tuple:
+    ratios = [difflib.SequenceMatcher(None, a, b, autojunk=False).ratio() for a, b in zip(expected, actual)]
+    expected_lines = [line for text in expected for line in text.splitlines()]
+    actual_lines = set(line for text in actual for line in text.splitlines())
+    matching = sum(1 for line in expected_lines if line in actual_lines)
+    return statistics.mean(ratios), matching / max(1, len(expected_lines))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=20, help="Documents per corpus")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpora = {
+        "resume 1p": [make_resume_pdf(1, seed=seed) for seed in range(args.resumes)],
+        "resume 2-3p": [make_resume_pdf(2 + seed % 2, seed=seed) for seed in range(args.resumes)],
+        "plain 10p": [make_pdf(10, seed=seed) for seed in range(max(1, args.resumes // 5))],
+    }
+
+    print(f"{'corpus':<12} {'pages':>6} {'layout p/s':>11} {'fast p/s':>9} {'speedup':>8} {'similarity':>11} {'lines':>7}")
+    for name, documents in corpora.items():
+        pages = sum(TextExtractorAPI.read_pdf_overview(content)[0] for content in documents)
+        layout = time_mode(documents, "layout", args.repeat)
+        fast = time_mode(documents, "fast", args.repeat)
+        ratio, lines = similarity(extract_all(documents, "layout"), extract_all(documents, "fast"))
+        print(
+            f"{name:<12} {pages:>6} {pages / layout:>11.1f} {pages / fast:>9.1f} {layout / fast:>7.1f}x"
+            f" {ratio:>11.4f} {lines:>6.1%}"
+        )
+
+if __name__ == "__main__":
+    main()
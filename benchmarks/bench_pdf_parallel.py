@@ -0,0 +1,72 @@
+"""
+Scaling curve for page-parallel PDF extraction (/extract-detailed?parallel=true).
+
+    python -m benchmarks.bench_pdf_parallel --pages 1 10 20 40 80 --workers 1 2 4
+
+Each cell is the median wall-clock time over --repeat runs; the serial column
+is the existing single-worker extract_from_pdf path. Parallel output is checked
+against the serial output before timing.
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+from benchmarks.corpus import make_pdf
+from extraction_pool import ExtractionPool
+from text_extractor_api import TextExtractorAPI
+
+async def time_extraction(extract, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await extract()
+        timings.append(time.perf_counter() - start)
+        if not result["success"]:
+            raise SystemExit(result["error_message"])
+    return statistics.median(timings)
+
+async def run(page_counts: list, worker_counts: list, repeat: int):
+    pools = {workers: ExtractionPool(workers=workers, timeout=600) for workers in worker_counts}
+    serial_pool = ExtractionPool(workers=1, timeout=600)
+    try:
+        # Start every worker up front so process start-up is not timed
+        for pool in [serial_pool, *pools.values()]:
+            await asyncio.gather(*[pool.run(abs, 0) for _ in range(pool.workers)])
+
+        header = f"{'pages':>6} {'serial':>10}" + "".join(f" {f'{w} workers':>12}" for w in worker_counts)
+        print(header)
+        for pages in page_counts:
+            content = make_pdf(pages, seed=pages)
+            expected = await serial_pool.run(TextExtractorAPI.extract_from_pdf, content, "bench.pdf")
+
+            row = f"{pages:>6}"
+            serial = await time_extraction(
+                lambda: serial_pool.run(TextExtractorAPI.extract_from_pdf, content, "bench.pdf"), repeat
+            )
+            row += f" {serial * 1000:>8.0f}ms"
+            for workers, pool in pools.items():
+                result = await TextExtractorAPI.extract_from_pdf_parallel(content, "bench.pdf", pool)
+                if result["pages"] != expected["pages"] or result["full_text"] != expected["full_text"]:
+                    raise SystemExit(f"Parallel output differs from serial output ({pages} pages, {workers} workers)")
+                elapsed = await time_extraction(
+                    lambda: TextExtractorAPI.extract_from_pdf_parallel(content, "bench.pdf", pool), repeat
+                )
+                row += f" {elapsed * 1000:>6.0f}ms {serial / elapsed:>3.1f}x"
+            print(row)
+    finally:
+        for pool in [serial_pool, *pools.values()]:
+            pool.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 20, 40, 80])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    asyncio.run(run(args.pages, args.workers, args.repeat))
+
+if __name__ == "__main__":
+    main()
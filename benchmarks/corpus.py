@@ -0,0 +1,229 @@
+"""
+Synthetic documents for the benchmarks.
+
+Everything is generated deterministically from a seed, so runs on different
+machines and commits extract the same text. To inspect the documents or use
+them elsewhere, write them to a directory:
+
+    python -m benchmarks.corpus --out /tmp/corpus
+
+The LinkedIn pages in benchmarks/fixtures/ were written this way
+(--kinds html). Real saved postings can be dropped in next to them.
+"""
+import io
+import random
+
+WORDS = (
+    "python fastapi distributed systems led team delivered migration reduced latency "
+    "designed implemented kubernetes postgres observability mentored engineers shipped "
+    "customer platform roadmap api reliability throughput automated pipeline analytics "
+    "stakeholders cloud infrastructure cost savings security compliance scalable"
+).split()
+
+def make_lines(rng: random.Random, count: int, words_per_line: int = 12) -> list:
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_line)).capitalize() for _ in range(count)]
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _build_pdf(page_streams: list, fonts: dict) -> bytes:
+    """Assemble a PDF from one content stream per page; fonts maps resource names (F1, F2...) to base fonts"""
+    objects = []  # object bodies, numbered from 1
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")  # filled in once the page tree id is known
+    pages_id = add(b"")
+    font_refs = b" ".join(
+        b"/%s %d 0 R" % (name.encode(), add(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base_font.encode()
+        ))
+        for name, base_font in fonts.items()
+    )
+
+    page_ids = []
+    for stream in page_streams:
+        stream_bytes = stream.encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << %s >> >> /Contents %d 0 R >>" % (pages_id, font_refs, content_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    return bytes(output)
+
+def make_pdf(pages: int, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """Build a text-only PDF with `pages` pages of resume-like lines in Helvetica"""
+    rng = random.Random(seed)
+    streams = []
+    for page_number in range(pages):
+        lines = [f"Page {page_number + 1}"] + make_lines(rng, lines_per_page - 1)
+        streams.append("BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET")
+    return _build_pdf(streams, {"F1": "Helvetica"})
+
+def _kerned(line: str) -> str:
+    """A TJ array that spaces words with kerning offsets instead of space glyphs, as many exporters do"""
+    return "[" + " -350 ".join(f"({_pdf_escape(word)})" for word in line.split()) + "] TJ"
+
+def make_resume_pdf(pages: int = 2, seed: int = 0) -> bytes:
+    """
+    Build a resume-shaped PDF: a large name heading, bold section titles, bullet
+    lines (some word-spaced by kerning), a right-aligned date column and ruled lines
+    """
+    rng = random.Random(seed)
+    streams = []
+    for page_number in range(pages):
+        ops = []
+        y = 800
+        if page_number == 0:
+            ops.append(f"BT /F2 20 Tf 50 {y} Td (Jordan Example) Tj ET")
+            y -= 18
+            ops.append(f"BT /F1 9 Tf 50 {y} Td (jordan@example.com | +1 555 0100 | linkedin.com/in/jordan) Tj ET")
+            y -= 24
+        while y > 80:
+            ops.append(f"0.5 w 50 {y + 14} m 545 {y + 14} l S")
+            ops.append(f"BT /F2 12 Tf 50 {y} Td ({rng.choice(['Experience', 'Projects', 'Education', 'Skills'])}) Tj ET")
+            ops.append(f"BT /F1 9 Tf 470 {y} Td (20{rng.randint(10, 24)} - Present) Tj ET")
+            y -= 16
+            for line in make_lines(rng, rng.randint(3, 6), words_per_line=rng.randint(8, 13)):
+                if y <= 80:
+                    break
+                text = _kerned(line) if rng.random() < 0.5 else f"({_pdf_escape(line)}) Tj"
+                ops.append(f"BT /F1 10 Tf 58 {y} Td (-) Tj 8 0 Td {text} ET")
+                y -= 13
+            y -= 10
+        streams.append("\n".join(ops))
+    return _build_pdf(streams, {"F1": "Helvetica", "F2": "Helvetica-Bold"})
+
+def make_docx(sections: int = 10, table_rows: int = 12, table_cols: int = 5, seed: int = 0) -> bytes:
+    """
+    Build a table-heavy resume DOCX: each section has a heading, a few bullet
+    paragraphs and a skills table with horizontally and vertically merged cells
+    """
+    from docx import Document
+
+    rng = random.Random(seed)
+    document = Document()
+    document.core_properties.title = "Resume"
+    document.core_properties.author = "Jordan Example"
+    document.add_heading("Jordan Example", level=0)
+    for section in range(sections):
+        document.add_heading(rng.choice(["Experience", "Projects", "Education", "Skills"]), level=1)
+        for line in make_lines(rng, rng.randint(2, 5)):
+            document.add_paragraph(line, style="List Bullet")
+        table = document.add_table(rows=table_rows, cols=table_cols)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        table.cell(0, 0).merge(table.cell(0, table_cols - 1))
+        table.cell(1, 0).merge(table.cell(table_rows - 1, 0))
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+LINKEDIN_SECTIONS = ["About the role", "What you'll do", "What we're looking for", "Nice to have", "Benefits"]
+
+def make_linkedin_html(sections: int = 5, similar_jobs: int = 20, script_kb: int = 40, seed: int = 0) -> bytes:
+    """
+    Build a page shaped like a public LinkedIn job posting: head scripts and styles,
+    a top card, the description in the show-more-less markup div that
+    parse_job_description looks for, job criteria and a list of similar jobs
+    """
+    rng = random.Random(seed)
+    title = " ".join(word.capitalize() for word in rng.sample(WORDS, 2)) + " Engineer"
+    company = rng.choice(WORDS).capitalize() + " Labs"
+    script = "".join(f"window.__data_{i}={{k:'{rng.choice(WORDS)}',v:{rng.randint(0, 9999)}}};" for i in range(script_kb * 30))
+    styles = "".join(f".c{i}{{margin:{i % 16}px;color:#{rng.randint(0, 0xFFFFFF):06x}}}" for i in range(script_kb * 20))
+
+    description = []
+    for heading in LINKEDIN_SECTIONS[:sections] + [rng.choice(LINKEDIN_SECTIONS) for _ in range(max(0, sections - len(LINKEDIN_SECTIONS)))]:
+        description.append(f"<p><strong>{heading}</strong></p>")
+        description.append(f"<p>{' '.join(make_lines(rng, 3))}</p>")
+        description.append("<ul>" + "".join(f"<li>{line}</li>" for line in make_lines(rng, rng.randint(4, 8), 9)) + "</ul><br>")
+
+    cards = "".join(
+        f'<li><div class="base-card base-search-card job-search-card"><a class="base-card__full-link" '
+        f'href="https://www.linkedin.com/jobs/view/{rng.randint(10**9, 10**10)}/"><span class="sr-only">{line}</span></a>'
+        f'<div class="base-search-card__info"><h3 class="base-search-card__title">{line}</h3>'
+        f'<h4 class="base-search-card__subtitle">{rng.choice(WORDS).capitalize()} Inc</h4>'
+        f'<time class="job-search-card__listdate">{rng.randint(1, 4)} weeks ago</time></div></div></li>'
+        for line in make_lines(rng, similar_jobs, 4)
+    )
+
+    page = f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{company} hiring {title} | LinkedIn</title>
+<style>{styles}</style>
+<script type="application/ld+json">{{"@context":"http://schema.org","@type":"JobPosting","title":"{title}"}}</script>
+<script>{script}</script></head>
+<body><header class="header"><nav class="nav"><a class="nav__logo-link" href="/">LinkedIn</a>
+<a class="nav__button-secondary" href="/login">Sign in</a><a class="nav__button-primary" href="/signup">Join now</a></nav></header>
+<main class="main" id="main-content"><section class="top-card-layout"><div class="top-card-layout__entity-info">
+<h1 class="top-card-layout__title">{title}</h1><h4 class="top-card-layout__second-subline">
+<a class="topcard__org-name-link" href="https://www.linkedin.com/company/{company.lower().replace(' ', '-')}">{company}</a>
+<span class="topcard__flavor topcard__flavor--bullet">Springfield</span></h4></div></section>
+<section class="core-section-container description"><div class="description__text description__text--rich">
+<section class="show-more-less-html" data-max-lines="5">
+<div class="show-more-less-html__markup show-more-less-html__markup--clamp-after-5 relative overflow-hidden">
+{"".join(description)}
+</div><button class="show-more-less-html__button" aria-label="Show more">Show more</button></section></div>
+<ul class="description__job-criteria-list"><li class="description__job-criteria-item"><h3>Seniority level</h3>
+<span class="description__job-criteria-text">Mid-Senior level</span></li></ul></section>
+<section class="similar-jobs"><h2>Similar jobs</h2><ul class="similar-jobs__list">{cards}</ul></section></main>
+<footer class="li-footer"><ul>{"".join(f'<li><a href="/legal/{word}">{word}</a></li>' for word in WORDS[:12])}</ul></footer>
+</body></html>
+"""
+    return page.encode("utf-8")
+
+# Named documents of the benchmark corpus: resumes of 1-50 pages, table-heavy DOCX files, LinkedIn pages
+RESUME_PAGES = [1, 2, 5, 10, 25, 50]
+DOCX_SECTIONS = [5, 20, 50]
+LINKEDIN_PAGES = {"short": dict(sections=2, similar_jobs=5, script_kb=10), "typical": {}, "long": dict(sections=12, similar_jobs=60, script_kb=120)}
+
+def iter_corpus(kinds=("pdf", "docx", "html")):
+    """(file name, bytes) for every document of the corpus"""
+    if "pdf" in kinds:
+        for pages in RESUME_PAGES:
+            yield f"resume_{pages}p.pdf", make_resume_pdf(pages, seed=pages)
+    if "docx" in kinds:
+        for sections in DOCX_SECTIONS:
+            yield f"resume_tables_{sections}.docx", make_docx(sections=sections, seed=sections)
+    if "html" in kinds:
+        for seed, (name, options) in enumerate(LINKEDIN_PAGES.items()):
+            yield f"linkedin_{name}.html", make_linkedin_html(seed=seed, **options)
+
+def main():
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Write the synthetic benchmark corpus to a directory")
+    parser.add_argument("--out", required=True, help="Directory to write the documents to")
+    parser.add_argument("--kinds", nargs="+", choices=["pdf", "docx", "html"], default=["pdf", "docx", "html"])
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    for name, content in iter_corpus(args.kinds):
+        (out / name).write_bytes(content)
+        print(f"{name:<28} {len(content):>10,d} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Offline end-to-end load test of the app built by main.py.
+
+    python -m benchmarks.load_test --concurrency 1 2 4 8 16 32 --duration 30
+
+The harness starts stubs.fake_model_server, stubs.fake_linkedin_server and
+main:app on free local ports. The app is pointed at the stubs through
+GITHUB_MODELS_ENDPOINT and LINKEDIN_BASE_URL. At each concurrency level,
+that many virtual users repeat the web UI's flow back to back for --duration
+seconds:
+
+    POST /api/extract/extract-text-only   upload a resume PDF
+    POST /api/scraper/scrape              scrape a LinkedIn job URL
+    POST /api/ai/analyze-documents        extracted text + scraped description
+    POST /api/cover/generate              extracted data -> DOCX
+
+Resumes and job IDs are drawn from pools (--resumes, --jobs), so the app's
+caches see a mix of new and repeat inputs. Flows started before the deadline
+run to completion.
+
+For every level the report shows:
+- completed flows per second and the error rate
+- flow latency p50/p90/p99
+- the p99 of each step
+- the mean server time per stage per flow, from the Server-Timing headers
+
+It ends with the highest concurrency whose flow p99 and error rate stay
+within --p99-target and --max-error-rate. The stubs' latency distributions
+and fault rates are set with the --model-* and --linkedin-* options. App
+settings can be overridden with --app-env, for example
+--app-env AI_MAX_CONCURRENCY=8.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from benchmarks.corpus import make_resume_pdf
+from metrics import STAGES as SERVER_STAGES
+
+ROOT = Path(__file__).resolve().parent.parent
+STEPS = ["extract", "scrape", "analyze", "generate"]
+
+# The scraper's per-host politeness limit (1 request/s) protects LinkedIn, but against the
+# stub it would dominate the curve; pass --app-env SCRAPER_RATE_PER_SECOND=1 to include it
+DEFAULT_APP_ENV = {"SCRAPER_RATE_PER_SECOND": "1000", "SCRAPER_BURST": "1000"}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def server_stages(header: Optional[str]) -> Dict[str, float]:
+    """Stage durations in seconds from a Server-Timing header, without the total"""
+    stages = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if name and name != "total" and params.startswith("dur="):
+            stages[name] = float(params[4:]) / 1000
+    return stages
+
+class Server:
+    """A uvicorn subprocess with its output in a log file"""
+
+    def __init__(self, name: str, target: str, env: Dict[str, str], log_dir: Path, workers: int = 1):
+        self.name = name
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = log_dir / f"{name}.log"
+        command = [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(self.port),
+                   "--log-level", "warning"]
+        if workers > 1:
+            command += ["--workers", str(workers)]
+        self._log = open(self.log_path, "w")
+        self.process = subprocess.Popen(
+            command, cwd=ROOT, env={**os.environ, **env}, stdout=self._log, stderr=subprocess.STDOUT
+        )
+
+    async def wait_ready(self, session: aiohttp.ClientSession, path: str, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit(f"{self.name} exited during startup; see {self.log_path}")
+            try:
+                async with session.get(self.url + path) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+        raise SystemExit(f"{self.name} did not start within {timeout:.0f}s; see {self.log_path}")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+
+class StepFailed(Exception):
+    def __init__(self, step: str, reason: str):
+        # Keep the reason short (no per-URL details) so failures group in the report
+        super().__init__(f"{step}: {reason.split(',')[0][:80]}")
+        self.step = step
+
+class LoadTest:
+    def __init__(self, app_url: str, resumes: List[bytes], jobs: int, timeout: float):
+        self.app_url = app_url
+        self.resumes = resumes
+        self.job_ids = [4000000000 + index for index in range(jobs)]
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def step(self, session: aiohttp.ClientSession, record: Dict, step: str, method: str, path: str, **kwargs) -> Any:
+        """Send one request of the flow, recording its latency and server stages"""
+        start = time.perf_counter()
+        try:
+            async with session.request(method, self.app_url + path, timeout=self.timeout, **kwargs) as response:
+                body = await response.read()
+                record["steps"][step] = time.perf_counter() - start
+                for name, seconds in server_stages(response.headers.get("Server-Timing")).items():
+                    record["stages"][name] += seconds
+                if response.status != 200:
+                    raise StepFailed(step, f"HTTP {response.status}")
+                return json.loads(body) if response.content_type == "application/json" else body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise StepFailed(step, e.__class__.__name__)
+
+    async def flow(self, session: aiohttp.ClientSession, rng: random.Random) -> Dict:
+        """One pass through the web UI's steps"""
+        record = {"steps": {}, "stages": defaultdict(float), "error": None}
+        start = time.perf_counter()
+        try:
+            index = rng.randrange(len(self.resumes))
+            form = aiohttp.FormData()
+            form.add_field("file", self.resumes[index], filename=f"resume_{index}.pdf", content_type="application/pdf")
+            resume_text = (await self.step(session, record, "extract", "POST", "/api/extract/extract-text-only", data=form))["text"]
+
+            url = f"https://www.linkedin.com/jobs/view/{rng.choice(self.job_ids)}/"
+            scraped = await self.step(session, record, "scrape", "POST", "/api/scraper/scrape", json={"url": url})
+            if not scraped["success"]:
+                raise StepFailed("scrape", scraped["error_message"] or "failed")
+
+            form = aiohttp.FormData()
+            form.add_field("resume", resume_text.encode(), filename="resume.txt", content_type="text/plain")
+            form.add_field("job_description_text", scraped["job_description"])
+            analysis = await self.step(
+                session, record, "analyze", "POST", "/api/ai/analyze-documents",
+                data=form, headers={"X-Request-Priority": "interactive"}
+            )
+            if not analysis["success"]:
+                raise StepFailed("analyze", analysis["error_message"] or "failed")
+
+            await self.step(session, record, "generate", "POST", "/api/cover/generate", json=analysis["extracted_data"])
+        except StepFailed as e:
+            record["error"] = str(e)
+            record["failed_step"] = e.step
+        record["seconds"] = time.perf_counter() - start
+        return record
+
+    async def run_level(self, concurrency: int, duration: float, think: float, seed: int) -> Dict[str, Any]:
+        records: List[Dict] = []
+        deadline = time.monotonic() + duration
+
+        async def user(number: int):
+            rng = random.Random(seed * 1000 + number)
+            while time.monotonic() < deadline:
+                records.append(await self.flow(session, rng))
+                if think:
+                    await asyncio.sleep(think)
+
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            start = time.monotonic()
+            await asyncio.gather(*(user(number) for number in range(concurrency)))
+            elapsed = time.monotonic() - start
+        return summarize(concurrency, records, elapsed)
+
+def summarize(concurrency: int, records: List[Dict], elapsed: float) -> Dict[str, Any]:
+    completed = [record for record in records if record["error"] is None]
+    failed = [record for record in records if record["error"] is not None]
+    flow_seconds = [record["seconds"] for record in completed]
+    errors = defaultdict(int)
+    for record in failed:
+        errors[record["error"]] += 1
+    stages = defaultdict(float)
+    for record in completed:
+        for name, seconds in record["stages"].items():
+            stages[name] += seconds
+    return {
+        "concurrency": concurrency,
+        "flows": len(records),
+        "completed": len(completed),
+        "failed": len(failed),
+        "error_rate": len(failed) / len(records) if records else 0.0,
+        "elapsed_s": elapsed,
+        "flows_per_s": len(completed) / elapsed if elapsed else 0.0,
+        "p50_s": percentile(flow_seconds, 0.50),
+        "p90_s": percentile(flow_seconds, 0.90),
+        "p99_s": percentile(flow_seconds, 0.99),
+        "step_p99_s": {
+            step: percentile([record["steps"][step] for record in records if step in record["steps"]], 0.99)
+            for step in STEPS
+        },
+        "server_stage_mean_s": {
+            name: stages[name] / len(completed)
+            for name in sorted(stages, key=lambda name: SERVER_STAGES.index(name) if name in SERVER_STAGES else len(SERVER_STAGES))
+        },
+        "errors": dict(errors)
+    }
+
+def seconds(value: Optional[float]) -> str:
+    return f"{value:7.2f}" if value is not None else f"{'-':>7}"
+
+def print_level(result: Dict[str, Any], stub_stats: Dict[str, Dict]):
+    steps = " ".join(f"{step}={seconds(result['step_p99_s'][step]).strip()}" for step in STEPS)
+    print(
+        f"{result['concurrency']:>5} {result['completed']:>6} {result['flows_per_s']:>8.2f} {result['error_rate']:>7.1%}"
+        f" {seconds(result['p50_s'])} {seconds(result['p90_s'])} {seconds(result['p99_s'])}   {steps}",
+        flush=True
+    )
+    stages = ", ".join(f"{name} {value * 1000:.0f}ms" for name, value in result["server_stage_mean_s"].items())
+    if stages:
+        print(f"{'':>6}server time per flow: {stages}")
+    print(f"{'':>6}model stub peak in-flight {stub_stats['model'].get('peak_in_flight')}, "
+          f"linkedin stub fetches {stub_stats['linkedin'].get('total')}")
+    for error, count in sorted(result["errors"].items(), key=lambda item: -item[1])[:3]:
+        print(f"{'':>6}{count} x {error}")
+
+def parse_env(pairs: List[str]) -> Dict[str, str]:
+    env = dict(DEFAULT_APP_ENV)
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--app-env expects KEY=VALUE, got {pair!r}")
+        env[key] = value
+    return env
+
+async def fetch_json(session: aiohttp.ClientSession, method: str, url: str) -> Dict:
+    async with session.request(method, url) as response:
+        return await response.json()
+
+async def main_async(args):
+    log_dir = Path(args.log_dir or tempfile.mkdtemp(prefix="load_test_"))
+    log_dir.mkdir(parents=True, exist_ok=True)
+    model = Server("fake_model", "stubs.fake_model_server:app", {
+        "FAKE_MODEL_LATENCY": str(args.model_latency),
+        "FAKE_MODEL_LATENCY_SIGMA": str(args.model_latency_sigma),
+        "FAKE_MODEL_ERROR_RATE": str(args.model_error_rate),
+        "FAKE_MODEL_429_RATE": str(args.model_429_rate)
+    }, log_dir)
+    linkedin = Server("fake_linkedin", "stubs.fake_linkedin_server:app", {
+        "FAKE_LINKEDIN_LATENCY": str(args.linkedin_latency),
+        "FAKE_LINKEDIN_LATENCY_SIGMA": str(args.linkedin_latency_sigma),
+        "FAKE_LINKEDIN_ERROR_RATE": str(args.linkedin_error_rate),
+        "FAKE_LINKEDIN_429_RATE": str(args.linkedin_429_rate)
+    }, log_dir)
+    app_env = {
+        "GITHUB_TOKEN": "fake",
+        "GITHUB_MODELS_ENDPOINT": model.url,
+        "LINKEDIN_BASE_URL": linkedin.url,
+        "AI_JOB_DB": str(log_dir / "ai_jobs.sqlite3"),
+        **parse_env(args.app_env)
+    }
+    app = Server("app", "main:app", app_env, log_dir, workers=args.app_workers)
+    servers = [model, linkedin, app]
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            await model.wait_ready(session, "/stats")
+            await linkedin.wait_ready(session, "/stats")
+            await app.wait_ready(session, "/api/ai/health", timeout=60)
+        print(f"Servers up; logs in {log_dir}")
+        print(f"App overrides: {', '.join(f'{key}={value}' for key, value in parse_env(args.app_env).items())}")
+
+        resumes = [make_resume_pdf(1 + seed % 3, seed=seed) for seed in range(args.resumes)]
+        test = LoadTest(app.url, resumes, args.jobs, args.timeout)
+
+        print(f"{'users':>5} {'flows':>6} {'flows/s':>8} {'errors':>7} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7}   step p99 s")
+        curve = []
+        for level, concurrency in enumerate(args.concurrency):
+            async with aiohttp.ClientSession() as session:
+                await fetch_json(session, "POST", model.url + "/stats/reset")
+                await fetch_json(session, "POST", linkedin.url + "/stats/reset")
+            result = await test.run_level(concurrency, args.duration, args.think, seed=level)
+            async with aiohttp.ClientSession() as session:
+                stub_stats = {
+                    "model": await fetch_json(session, "GET", model.url + "/stats"),
+                    "linkedin": await fetch_json(session, "GET", linkedin.url + "/stats")
+                }
+            result["stubs"] = stub_stats
+            curve.append(result)
+            print_level(result, stub_stats)
+    finally:
+        for server in reversed(servers):
+            server.stop()
+
+    within = [
+        result for result in curve
+        if result["p99_s"] is not None and result["p99_s"] <= args.p99_target and result["error_rate"] <= args.max_error_rate
+    ]
+    if within:
+        best = max(within, key=lambda result: result["concurrency"])
+        print(f"Highest concurrency within p99 <= {args.p99_target:g}s and errors <= {args.max_error_rate:.0%}: "
+              f"{best['concurrency']} users ({best['flows_per_s']:.2f} flows/s)")
+    else:
+        print(f"No level stayed within p99 <= {args.p99_target:g}s and errors <= {args.max_error_rate:.0%}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"settings": vars(args), "curve": curve}, indent=2) + "\n")
+        print(f"Curve written to {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="Virtual users per level")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds each level starts new flows")
+    parser.add_argument("--think", type=float, default=0, help="Seconds a user pauses between flows")
+    parser.add_argument("--resumes", type=int, default=20, help="Distinct resume PDFs to upload")
+    parser.add_argument("--jobs", type=int, default=50, help="Distinct LinkedIn job IDs to scrape")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds before a request counts as failed")
+    parser.add_argument("--p99-target", type=float, default=15, help="Flow p99 in seconds a level must stay within")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--model-latency", type=float, default=2.0, help="Median model call seconds")
+    parser.add_argument("--model-latency-sigma", type=float, default=0.3, help="Log-normal shape of model latency")
+    parser.add_argument("--model-error-rate", type=float, default=0)
+    parser.add_argument("--model-429-rate", type=float, default=0)
+    parser.add_argument("--linkedin-latency", type=float, default=0.3, help="Median LinkedIn fetch seconds")
+    parser.add_argument("--linkedin-latency-sigma", type=float, default=0.5, help="Log-normal shape of LinkedIn latency")
+    parser.add_argument("--linkedin-error-rate", type=float, default=0)
+    parser.add_argument("--linkedin-429-rate", type=float, default=0)
+    parser.add_argument("--app-env", action="append", metavar="KEY=VALUE", help="App environment override (repeatable)")
+    parser.add_argument("--app-workers", type=int, default=1, help="uvicorn worker processes for the app")
+    parser.add_argument("--log-dir", help="Directory for server logs (default: a new temp directory)")
+    parser.add_argument("--output", metavar="PATH", help="Write the curve as JSON")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Regression benchmarks for extraction, LinkedIn parsing and cover letter rendering.
+
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    # ...upgrade pdfplumber / python-docx, or check out another commit...
+    python -m benchmarks.suite --compare benchmarks/baseline.json
+
+Every case runs in this process, without the extraction pool, over the
+synthetic corpus from benchmarks/corpus.py and the LinkedIn pages in
+benchmarks/fixtures/. A case runs until --min-time has passed (at least
+--min-iterations times). Its table row shows p50/p99 latency, operations and
+input MB per second (pages per second for PDFs), and the peak Python heap of
+one extra run under tracemalloc. C-level allocations are not included.
+
+--compare prints the change against a saved baseline and exits with status 1
+if any p50 or peak memory grew by more than --threshold. Timings are only
+comparable between runs on the same machine.
+"""
+import gc
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import bs4
+import docx
+import pdfplumber
+from benchmarks.corpus import DOCX_SECTIONS, RESUME_PAGES, iter_corpus, make_docx, make_resume_pdf
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+SAMPLE_LETTER = dict(
+    file_name="cover_letter_Acme_Backend_Engineer.docx",
+    your_name="Jane Doe",
+    your_address="1 Main Street, Springfield",
+    your_email="jane.doe@example.com",
+    your_phone="+1 555 0100",
+    employer_name="Hiring Manager",
+    company_name="Acme & Sons <Holdings>",
+    company_address="42 Market Street\nSpringfield",
+    position_title="Backend Engineer",
+    body_paragraphs=[
+        "I am excited to apply for the Backend Engineer role at Acme. " * 4,
+        "In my current role I built and operated Python services that handle millions of requests a day. " * 4,
+        "Acme's focus on reliable developer tooling matches the work I enjoy most. " * 4,
+        "I would welcome the chance to discuss how I can contribute to your team. " * 4,
+    ]
+)
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], Any]
+    size: int  # input bytes, or output bytes for renders
+    pages: Optional[int] = None
+
+def checked(result: Dict) -> Dict:
+    """Fail the benchmark instead of timing an extraction that errored"""
+    if not result["success"]:
+        raise SystemExit(result["error_message"])
+    return result
+
+def build_cases(quick: bool) -> List[Case]:
+    # Imported here so --help does not set up the apps (AI client, caches)
+    import ai_cover_letter_api
+    import cover_letter_api
+    from job_scraper_api import parse_job_description
+    from text_extractor_api import TextExtractorAPI
+
+    cases = []
+    for pages in RESUME_PAGES[:3] if quick else RESUME_PAGES:
+        content = make_resume_pdf(pages, seed=pages)
+        for mode in ("layout", "fast"):
+            cases.append(Case(
+                f"extract_pdf_{mode}_{pages}p",
+                lambda content=content, mode=mode: checked(TextExtractorAPI.extract_from_pdf(content, "bench.pdf", mode=mode)),
+                len(content), pages
+            ))
+    for sections in DOCX_SECTIONS[:2] if quick else DOCX_SECTIONS:
+        content = make_docx(sections=sections, seed=sections)
+        cases.append(Case(
+            f"extract_docx_tables_{sections}",
+            lambda content=content: checked(TextExtractorAPI.extract_from_docx(content, "bench.docx")),
+            len(content)
+        ))
+
+    # The AI path's extractor, capped at AI_EXTRACT_MAX_PAGES / AI_EXTRACT_MAX_CHARS
+    for pages in (1, 10) if quick else (1, 10, 50):
+        content = make_resume_pdf(pages, seed=pages)
+        cases.append(Case(
+            f"ai_extract_pdf_{pages}p",
+            lambda content=content: ai_cover_letter_api.TextExtractor.extract_from_pdf(content),
+            len(content), pages
+        ))
+    content = make_docx(sections=20, seed=20)
+    cases.append(Case(
+        "ai_extract_docx_tables_20",
+        lambda content=content: ai_cover_letter_api.TextExtractor.extract_from_docx(content),
+        len(content)
+    ))
+
+    pages = {path.stem: path.read_bytes() for path in sorted(FIXTURES_DIR.glob("*.html"))}
+    if not pages:
+        pages = {Path(name).stem: content for name, content in iter_corpus(["html"])}
+    for name, html in pages.items():
+        if not parse_job_description(html)[0]:
+            raise SystemExit(f"{name}: job description not found")
+        cases.append(Case(f"parse_{name}", lambda html=html: parse_job_description(html), len(html)))
+
+    for module, model in ((cover_letter_api, cover_letter_api.CoverLetterRequest),
+                          (ai_cover_letter_api, ai_cover_letter_api.CoverLetterData)):
+        letter = model(**SAMPLE_LETTER)
+        render = module.generate_cover_letter_docx
+        cases.append(Case(f"render_{module.__name__}", lambda render=render, letter=letter: render(letter), len(render(letter))))
+    return cases
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def measure(case: Case, min_time: float, min_iterations: int, max_iterations: int) -> Dict[str, Any]:
+    case.run()  # warm-up: imports, caches, lazily compiled regexes
+    gc.collect()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations and (len(timings) < min_iterations or time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mean = statistics.mean(timings)
+    result = {
+        "iterations": len(timings),
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "mean_ms": mean * 1000,
+        "ops_per_s": 1 / mean,
+        "mb_per_s": case.size / mean / 1e6,
+        "peak_kib": peak / 1024,
+        "size_bytes": case.size
+    }
+    if case.pages:
+        result["pages_per_s"] = case.pages / mean
+    return result
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "pdfplumber": pdfplumber.__version__,
+        "python-docx": docx.__version__,
+        "beautifulsoup4": bs4.__version__
+    }
+
+def change(current: float, baseline: Optional[float]) -> Optional[float]:
+    return current / baseline - 1 if baseline else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller corpus for a fast check")
+    parser.add_argument("--filter", nargs="+", help="Only run cases whose name contains one of these")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to spend timing each case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--max-iterations", type=int, default=1000)
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed p50/memory growth before a regression")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        saved = json.loads(Path(args.compare).read_text())
+        baseline = saved["results"]
+        current = environment()
+        print(f"Baseline: {args.compare} ({saved['environment']['timestamp']}, commit {saved['environment']['commit']})")
+        for key in ("python", "pdfplumber", "python-docx", "beautifulsoup4", "machine"):
+            if saved["environment"].get(key) != current[key]:
+                print(f"  {key}: {saved['environment'].get(key)} -> {current[key]}")
+    cases = [
+        case for case in build_cases(args.quick)
+        if not args.filter or any(part in case.name for part in args.filter)
+    ]
+
+    header = f"{'case':<36} {'p50 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'MB/s':>8} {'pages/s':>8} {'peak KiB':>9}"
+    print(header + (f" {'p50 Δ':>8} {'peak Δ':>8}" if baseline else ""))
+    results, regressions = {}, []
+    for case in cases:
+        result = measure(case, args.min_time, args.min_iterations, args.max_iterations)
+        results[case.name] = result
+        pages_per_s = f"{result['pages_per_s']:8.1f}" if "pages_per_s" in result else f"{'-':>8}"
+        line = (
+            f"{case.name:<36} {result['p50_ms']:9.2f} {result['p99_ms']:9.2f} {result['ops_per_s']:9.1f}"
+            f" {result['mb_per_s']:8.2f} {pages_per_s} {result['peak_kib']:9.0f}"
+        )
+        if baseline:
+            previous = baseline.get(case.name)
+            deltas = [
+                change(result["p50_ms"], previous and previous["p50_ms"]),
+                change(result["peak_kib"], previous and previous["peak_kib"])
+            ]
+            line += "".join(f" {delta:+8.1%}" if delta is not None else f" {'new':>8}" for delta in deltas)
+            if any(delta is not None and delta > args.threshold for delta in deltas):
+                regressions.append(case.name)
+                line += "  REGRESSION"
+        print(line, flush=True)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({"environment": environment(), "results": results}, indent=2) + "\n")
+        print(f"Baseline written to {args.save}")
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
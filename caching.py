@@ -0,0 +1,200 @@
+"""
+Caches shared by the sub-apps mounted in main.py.
+
+ExtractionCache maps uploaded file bytes to extracted text so a repeat upload of
+the same resume skips pdfplumber/python-docx entirely. TTLCache is a small
+entry-bounded LRU whose entries also expire, used for results that go stale.
+SingleFlight collapses concurrent identical lookups into one upstream call.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import metrics
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class ExtractionCache:
+    """Content-addressed extraction cache with an in-memory LRU tier and an optional disk tier"""
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[str, tuple[Any, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(content: bytes, extractor: str, version: str, mode: str) -> str:
+        """Key on the file bytes plus everything that can change the extracted output"""
+        digest = hashlib.sha256(content).hexdigest()
+        return hashlib.sha256(f"{digest}:{extractor}:{version}:{mode}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._store(key, value, len(json.dumps(value)))
+        return value
+
+    def put(self, key: str, value: Any):
+        serialized = json.dumps(value)
+        self._store(key, value, len(serialized))
+        self._write_disk(key, serialized)
+
+    def _store(self, key: str, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, serialized: str):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial file
+            temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(serialized)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Extraction cache disk write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else None
+            }
+
+class TTLCache:
+    """In-memory LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+            }
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into a single in-flight coroutine"""
+
+    def __init__(self):
+        self._in_flight: Dict[Any, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one caller disconnecting does not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._in_flight), "calls": self.calls, "coalesced": self.coalesced}
+
+# Shared by text_extractor_api and ai_cover_letter_api
+extraction_cache = ExtractionCache(
+    max_bytes=int(os.environ.get("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    disk_dir=os.environ.get("EXTRACTION_CACHE_DIR") or None
+)
+metrics.register_cache("extraction", extraction_cache)
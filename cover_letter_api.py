@@ -1,14 +1,13 @@
-import os
+import re
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
-from docx import Document
-from docx.shared import Pt
+from docx_template import cover_letter_template
+import metrics
 import uuid
-from datetime import datetime
 
 # Load environment variables
 load_dotenv()
@@ -41,56 +40,21 @@ class CoverLetterRequest(BaseModel):
     position_title: str
     body_paragraphs: List[str]
 
-def generate_cover_letter_docx(data: CoverLetterRequest) -> str:
-    """Generate cover letter DOCX file"""
-    doc = Document()
-    
-    # Set font
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = 'Times New Roman'
-    font.size = Pt(12)
-    
-    # Header - Your information
-    doc.add_paragraph(data.your_name)
-    doc.add_paragraph(data.your_address)
-    doc.add_paragraph(f"Email: {data.your_email}")
-    doc.add_paragraph(f"Phone: {data.your_phone}")
-    doc.add_paragraph("")
-    
-    # Date
-    today = datetime.today().strftime("%B %d, %Y")
-    doc.add_paragraph(today)
-    doc.add_paragraph("")
-    
-    # Employer information
-    doc.add_paragraph(data.employer_name)
-    doc.add_paragraph(data.company_name)
-    doc.add_paragraph(data.company_address)
-    doc.add_paragraph("")
-    
-    # Greeting
-    doc.add_paragraph(f"Dear {data.employer_name},")
-    doc.add_paragraph("")
-    
-    # Body paragraphs
-    for paragraph in data.body_paragraphs:
-        doc.add_paragraph(paragraph)
-        doc.add_paragraph("")
-    
-    # Closing
-    doc.add_paragraph("Thank you for considering my application.")
-    doc.add_paragraph("")
-    doc.add_paragraph("Sincerely,")
-    doc.add_paragraph(data.your_name)
-    
-    # Generate filename if not provided
+def cover_letter_filename(data: CoverLetterRequest) -> str:
+    """Download filename for a cover letter, safe to use in a Content-Disposition header"""
     filename = data.file_name or f"cover_letter_{data.company_name}_{data.position_title}_{uuid.uuid4().hex[:8]}.docx"
-    filename = filename.replace(" ", "_").replace("/", "_").replace("\\", "_")
-    
-    doc.save(filename)
+    filename = re.sub(r'[^A-Za-z0-9._-]', '_', filename)
+    if not filename.lower().endswith('.docx'):
+        filename += '.docx'
     return filename
 
+def generate_cover_letter_docx(data: CoverLetterRequest) -> bytes:
+    """Generate cover letter DOCX file in memory from the precompiled template"""
+    with metrics.stage("docx_render"):
+        docx_bytes = cover_letter_template.render(data)
+    metrics.count_bytes("docx_render", len(docx_bytes))
+    return docx_bytes
+
 @app.get("/")
 async def root():
     """API information"""
@@ -120,12 +84,12 @@ async def generate_cover_letter(data: CoverLetterRequest):
     """
     try:
         # Generate the cover letter file
-        filename = generate_cover_letter_docx(data)
+        docx_bytes = generate_cover_letter_docx(data)
+        filename = cover_letter_filename(data)
         
-        return FileResponse(
-            path=filename,
+        return Response(
+            content=docx_bytes,
             media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            filename=filename,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
         
@@ -0,0 +1,200 @@
+"""
+Precompiled DOCX template engine for cover letters.
+
+The letter layout is fixed, so instead of building a python-docx object model on
+every request, the template is rendered once at import time with placeholder
+text. word/document.xml is split around those placeholders and every other part
+of the package is deflated once and kept in memory. A render then only escapes
+and splices the letter fields into document.xml, compresses that one part and
+writes the zip container around the cached bytes.
+"""
+import io
+import re
+import time
+import zlib
+import struct
+import zipfile
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, List, Tuple
+from docx import Document
+from docx.shared import Pt
+
+DOCUMENT_PART = "word/document.xml"
+
+# Fields spliced into the template; "date" is filled in at render time
+SLOT_FIELDS = [
+    "your_name", "your_address", "your_email", "your_phone", "date",
+    "employer_name", "company_name", "company_address"
+]
+BODY_SLOT = "body_paragraphs"
+
+# Characters XML 1.0 does not allow; python-docx would reject them outright
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+def _placeholder(name: str) -> str:
+    return f"@@SLOT_{name}@@"
+
+def build_cover_letter_document(data: Any, today: str) -> Document:
+    """Build the cover letter with python-docx (used to compile the template and as the reference renderer)"""
+    doc = Document()
+
+    # Set font
+    style = doc.styles['Normal']
+    font = style.font
+    font.name = 'Times New Roman'
+    font.size = Pt(12)
+
+    # Header - Your information
+    doc.add_paragraph(data.your_name)
+    doc.add_paragraph(data.your_address)
+    doc.add_paragraph(f"Email: {data.your_email}")
+    doc.add_paragraph(f"Phone: {data.your_phone}")
+    doc.add_paragraph("")
+
+    # Date
+    doc.add_paragraph(today)
+    doc.add_paragraph("")
+
+    # Employer information
+    doc.add_paragraph(data.employer_name)
+    doc.add_paragraph(data.company_name)
+    doc.add_paragraph(data.company_address)
+    doc.add_paragraph("")
+
+    # Greeting
+    doc.add_paragraph(f"Dear {data.employer_name},")
+    doc.add_paragraph("")
+
+    # Body paragraphs
+    for paragraph in data.body_paragraphs:
+        doc.add_paragraph(paragraph)
+        doc.add_paragraph("")
+
+    # Closing
+    doc.add_paragraph("Thank you for considering my application.")
+    doc.add_paragraph("")
+    doc.add_paragraph("Sincerely,")
+    doc.add_paragraph(data.your_name)
+
+    return doc
+
+def escape_run_text(text: str) -> str:
+    """Escape text for a <w:t> element, mapping tabs and newlines the way python-docx does"""
+    text = _INVALID_XML_CHARS.sub("", str(text))
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">')
+    return text.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">')
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+def _deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+class CoverLetterTemplate:
+    """Cover letter DOCX template compiled once and rendered by string splicing"""
+
+    def __init__(self):
+        placeholders = SimpleNamespace(
+            **{name: _placeholder(name) for name in SLOT_FIELDS},
+            body_paragraphs=[_placeholder(BODY_SLOT)]
+        )
+        doc = build_cover_letter_document(placeholders, _placeholder("date"))
+
+        buffer = io.BytesIO()
+        doc.save(buffer)
+
+        # Deflate every part except document.xml once, in the package's original order
+        self._parts: List[Tuple[str, Any]] = []
+        with zipfile.ZipFile(buffer) as package:
+            for info in package.infolist():
+                data = package.read(info.filename)
+                if info.filename == DOCUMENT_PART:
+                    self._compile_document(data.decode("utf-8"))
+                    self._parts.append((info.filename, None))
+                else:
+                    self._parts.append((info.filename, (zlib.crc32(data), _deflate(data), len(data))))
+
+    def _compile_document(self, xml: str):
+        # Always preserve whitespace so leading/trailing spaces in field values survive
+        xml = re.sub(r"<w:t>([^<]*@@SLOT_)", r'<w:t xml:space="preserve">\1', xml)
+
+        # Cut the body placeholder's paragraph (and the blank one after it) out as a sub-template
+        body_marker = _placeholder(BODY_SLOT)
+        marker_at = xml.index(body_marker)
+        paragraph_start = xml.rindex("<w:p>", 0, marker_at)
+        paragraph_end = xml.index("</w:p>", marker_at) + len("</w:p>")
+        spacer = "<w:p/>"
+        if not xml.startswith(spacer, paragraph_end):
+            raise ValueError("Unexpected template layout after the body paragraph")
+        paragraph = xml[paragraph_start:paragraph_end]
+        self._body_prefix, self._body_suffix = paragraph.split(body_marker)
+        self._body_suffix += spacer
+        xml = xml[:paragraph_start] + body_marker + xml[paragraph_end + len(spacer):]
+
+        # Split the rest into alternating literal chunks and slot names
+        pattern = re.compile("@@SLOT_(" + "|".join(SLOT_FIELDS + [BODY_SLOT]) + ")@@")
+        self._chunks: List[str] = []
+        self._slots: List[str] = []
+        position = 0
+        for match in pattern.finditer(xml):
+            self._chunks.append(xml[position:match.start()])
+            self._slots.append(match.group(1))
+            position = match.end()
+        self._chunks.append(xml[position:])
+
+    def render_document_xml(self, data: Any, today: str) -> str:
+        values = {name: escape_run_text(getattr(data, name)) for name in SLOT_FIELDS if name != "date"}
+        values["date"] = escape_run_text(today)
+        values[BODY_SLOT] = "".join(
+            self._body_prefix + escape_run_text(paragraph) + self._body_suffix
+            for paragraph in data.body_paragraphs
+        )
+
+        pieces = [self._chunks[0]]
+        for slot, chunk in zip(self._slots, self._chunks[1:]):
+            pieces.append(values[slot])
+            pieces.append(chunk)
+        return "".join(pieces)
+
+    def render(self, data: Any) -> bytes:
+        """Render a cover letter to DOCX bytes"""
+        today = datetime.today().strftime("%B %d, %Y")
+        document = self.render_document_xml(data, today).encode("utf-8")
+        document_entry = (zlib.crc32(document), _deflate(document), len(document))
+
+        dos_time, dos_date = _dos_datetime(time.time())
+        output = io.BytesIO()
+        central_directory = []
+        for name, entry in self._parts:
+            crc, compressed, size = entry or document_entry
+            encoded_name = name.encode("utf-8")
+            offset = output.tell()
+            output.write(struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, 20, 0, zipfile.ZIP_DEFLATED, dos_time, dos_date,
+                crc, len(compressed), size, len(encoded_name), 0
+            ))
+            output.write(encoded_name)
+            output.write(compressed)
+            central_directory.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, 0, zipfile.ZIP_DEFLATED, dos_time, dos_date,
+                crc, len(compressed), size, len(encoded_name), 0, 0, 0, 0, 0, offset
+            ) + encoded_name)
+
+        directory_offset = output.tell()
+        directory = b"".join(central_directory)
+        output.write(directory)
+        output.write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, len(central_directory), len(central_directory),
+            len(directory), directory_offset, 0
+        ))
+        return output.getvalue()
+
+# Compiled once at import so requests only pay for the splice and zip
+cover_letter_template = CoverLetterTemplate()
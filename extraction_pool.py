@@ -0,0 +1,102 @@
+"""
+Process pool for CPU-bound PDF/DOCX extraction.
+
+pdfplumber is pure Python, so extracting a long or malformed document on the
+event loop thread stalls every other request. Extraction jobs run in worker
+processes instead, each with a wall-clock timeout. A job that overruns gets its
+pool killed and replaced, so one bad file cannot hold a worker forever. Other
+jobs lost with that pool are resubmitted once, with a fresh timeout.
+"""
+import os
+import asyncio
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+class ExtractionTimeout(Exception):
+    """Raised when a document takes longer than the extraction timeout"""
+
+class ExtractionPool:
+    """Runs extraction functions in worker processes with per-document timeouts"""
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Pools killed because one of their jobs timed out; their other jobs were bystanders
+        self._recycled = weakref.WeakSet()
+        self.completed = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _replace_executor(self, executor: ProcessPoolExecutor):
+        """Kill the workers of a pool with a stuck job and start a fresh pool on next use"""
+        if self._executor is not executor:
+            return  # Another timeout already replaced it
+        self._executor = None
+        self.restarts += 1
+        self._recycled.add(executor)
+        # ProcessPoolExecutor cannot cancel a running job, so the workers are killed directly
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in a worker process, raising ExtractionTimeout if it overruns"""
+        if self.workers <= 0:
+            # Pool disabled: still keep the work off the event loop thread. A thread cannot be
+            # stopped, so after a timeout it keeps running in the background until fn returns.
+            try:
+                result = await asyncio.wait_for(asyncio.to_thread(fn, *args), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise ExtractionTimeout(f"Extraction timed out after {self.timeout:g}s")
+            self.completed += 1
+            return result
+
+        # A second attempt covers jobs lost when another job's timeout recycled the pool
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+                result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                self.completed += 1
+                return result
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._replace_executor(executor)
+                raise ExtractionTimeout(f"Extraction timed out after {self.timeout:g}s")
+            except BrokenProcessPool:
+                # Only a pool we killed for another job's timeout is safe to retry on. A worker
+                # that died by itself (crash, OOM) may have been running this input, and
+                # resubmitting it would break the next pool too.
+                bystander = executor in self._recycled
+                self._replace_executor(executor)
+                if attempt == 1 or not bystander:
+                    raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "timeout_seconds": self.timeout,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts
+        }
+
+# Shared by text_extractor_api and ai_cover_letter_api; EXTRACTION_WORKERS=0 uses a thread instead
+extraction_pool = ExtractionPool(
+    workers=int(os.environ.get("EXTRACTION_WORKERS", str(os.cpu_count() or 1))),
+    timeout=float(os.environ.get("EXTRACTION_TIMEOUT", "30"))
+)
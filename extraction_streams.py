@@ -0,0 +1,56 @@
+"""
+Generator-based text extraction.
+
+Pages and paragraphs are yielded as soon as they are extracted, so callers can
+stream them out, keep running word/character counts, or stop early once they
+have enough text (the AI prompt rarely needs more than the first few pages of
+a resume).
+"""
+from typing import Iterator, Optional, Tuple, Any
+from fast_pdf import extract_page_text
+from fast_docx import iter_docx_package
+
+class TextStats:
+    """Running word and character counts for text produced chunk by chunk"""
+
+    def __init__(self):
+        self.words = 0
+        self.characters = 0
+
+    def add(self, text: str):
+        # Chunks are always joined with whitespace, so per-chunk word counts add up exactly
+        self.words += len(text.split())
+        self.characters += len(text)
+
+def iter_pdf_pages(pdf, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                   start: int = 0, stop: Optional[int] = None, mode: str = "layout") -> Iterator[Tuple[int, Optional[str]]]:
+    """
+    Yield (page_number, page_text) for each page of an open pdfplumber PDF.
+    Stops after max_pages pages, or after the page that brings the text past max_chars.
+    mode="fast" reads plain text through fast_pdf instead of pdfplumber's layout machinery.
+    """
+    characters = 0
+    pages = pdf.pages[start:stop]
+    for page_num, page in enumerate(pages, start + 1):
+        if max_pages is not None and page_num - start > max_pages:
+            return
+        page_text = extract_page_text(pdf, page) if mode == "fast" else page.extract_text()
+        yield page_num, page_text
+        characters += len(page_text or "")
+        if max_chars is not None and characters >= max_chars:
+            return
+
+def iter_docx_blocks(package, max_chars: Optional[int] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield ("paragraph", text) for each non-empty paragraph and ("table", rows) for each table
+    of an open DOCX zip package, in document order. Stops after the block that brings the text past max_chars.
+    """
+    characters = 0
+    for block_type, block in iter_docx_package(package):
+        yield block_type, block
+        if block_type == "paragraph":
+            characters += len(block)
+        else:
+            characters += sum(len(cell) for row in block for cell in row)
+        if max_chars is not None and characters >= max_chars:
+            return
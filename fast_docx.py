@@ -0,0 +1,156 @@
+"""
+Direct-XML DOCX text extraction.
+
+python-docx builds an lxml object tree for the whole document, walks paragraphs
+and tables in separate passes (losing body order), and its row.cells is
+quadratic on merged cells. This module streams the main document part out of
+the zip with an incremental parser instead, yielding paragraphs and tables in
+document order and clearing each finished block so memory stays flat.
+
+Table cells follow python-docx's conventions, so results keep the same shape:
+a cell spanning several grid columns is repeated once per column, and a
+vertically merged continuation cell repeats the text of the cell above.
+"""
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, IO, Iterator, List, Tuple, Any
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+PACKAGE_RELS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+CORE_PROPERTIES = "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties"
+
+# Core property elements, by the metadata key they are reported under
+CORE_FIELDS = {
+    "title": "{http://purl.org/dc/elements/1.1/}title",
+    "author": "{http://purl.org/dc/elements/1.1/}creator",
+    "subject": "{http://purl.org/dc/elements/1.1/}subject",
+    "keywords": "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}keywords",
+}
+
+def _package_parts(package: zipfile.ZipFile) -> Dict[str, str]:
+    """Map package relationship types to part names, falling back to the usual locations"""
+    parts = {OFFICE_DOCUMENT: "word/document.xml", CORE_PROPERTIES: "docProps/core.xml"}
+    try:
+        rels = ET.fromstring(package.read("_rels/.rels"))
+    except KeyError:
+        return parts
+    for rel in rels.iter(f"{PACKAGE_RELS}Relationship"):
+        if rel.get("Type") in parts and rel.get("TargetMode") != "External":
+            parts[rel.get("Type")] = posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    return parts
+
+def read_core_properties(package: zipfile.ZipFile) -> Dict[str, str]:
+    """Title, author, subject and keywords from docProps/core.xml ("" when missing)"""
+    properties = {key: "" for key in CORE_FIELDS}
+    try:
+        core = ET.fromstring(package.read(_package_parts(package)[CORE_PROPERTIES]))
+    except KeyError:
+        return properties
+    for key, tag in CORE_FIELDS.items():
+        element = core.find(tag)
+        if element is not None and element.text:
+            properties[key] = element.text
+    return properties
+
+class _Table:
+    """Rows of a top-level table being read"""
+
+    def __init__(self):
+        self.rows: List[List[str]] = []
+        self.row: List[str] = []
+        self.above: Dict[int, str] = {}  # grid column -> text of the last cell seen there
+        self.cell_paragraphs: List[str] = []
+        self.grid_span = 1
+        self.v_merge_continue = False
+
+    def end_cell(self):
+        column = len(self.row)
+        if self.v_merge_continue:
+            text = self.above.get(column, "")
+        else:
+            text = "\n".join(self.cell_paragraphs).strip()
+        for offset in range(self.grid_span):
+            self.row.append(text)
+            self.above[column + offset] = text
+        self.cell_paragraphs = []
+        self.grid_span = 1
+        self.v_merge_continue = False
+
+    def end_row(self):
+        self.rows.append(self.row)
+        self.row = []
+
+def iter_document_blocks(xml: IO[bytes]) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield ("paragraph", text) for each non-empty body paragraph and ("table", rows)
+    for each top-level table, in document order, from a WordprocessingML stream
+    """
+    table = None
+    table_depth = 0  # nested tables are skipped, like python-docx's cell.text
+    paragraph_depth = 0  # paragraphs inside text boxes are skipped, like python-docx's paragraph.text
+    in_paragraph_properties = False
+    parts: List[str] = []
+
+    for event, element in ET.iterparse(xml, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag == f"{W}p":
+                paragraph_depth += 1
+                if paragraph_depth == 1:
+                    parts = []
+            elif tag == f"{W}pPr":
+                in_paragraph_properties = True
+            elif tag == f"{W}tbl":
+                table_depth += 1
+                if table_depth == 1:
+                    table = _Table()
+            continue
+
+        reading = paragraph_depth == 1 and table_depth <= 1
+        if tag == f"{W}t":
+            if reading:
+                parts.append(element.text or "")
+        elif tag == f"{W}tab":
+            # Tab stops in paragraph properties share the tag with tab characters in runs
+            if reading and not in_paragraph_properties:
+                parts.append("\t")
+        elif tag in (f"{W}br", f"{W}cr"):
+            if reading:
+                parts.append("\n")
+        elif tag == f"{W}pPr":
+            in_paragraph_properties = False
+        elif tag == f"{W}p":
+            if reading:
+                text = "".join(parts)
+                if table_depth == 0:
+                    text = text.strip()
+                    if text:
+                        yield "paragraph", text
+                else:
+                    table.cell_paragraphs.append(text)
+            paragraph_depth -= 1
+            if paragraph_depth == 0 and table_depth == 0:
+                element.clear()
+        elif table_depth == 1:
+            if tag == f"{W}gridSpan":
+                table.grid_span = max(1, int(element.get(f"{W}val", "1")))
+            elif tag == f"{W}vMerge":
+                table.v_merge_continue = element.get(f"{W}val", "continue") == "continue"
+            elif tag == f"{W}tc":
+                table.end_cell()
+            elif tag == f"{W}tr":
+                table.end_row()
+            elif tag == f"{W}tbl":
+                table_depth = 0
+                yield "table", table.rows
+                table = None
+                element.clear()
+        elif tag == f"{W}tbl":
+            table_depth -= 1
+
+def iter_docx_package(package: zipfile.ZipFile) -> Iterator[Tuple[str, Any]]:
+    """Blocks of the main document part of an open DOCX package"""
+    with package.open(_package_parts(package)[OFFICE_DOCUMENT]) as xml:
+        yield from iter_document_blocks(xml)
@@ -0,0 +1,69 @@
+"""
+Fast plain-text PDF extraction on pdfminer.six.
+
+pdfplumber's page.extract_text() turns every character into a dict of a dozen
+attributes, collects curves and rects, then clusters the characters into lines
+and words. Consumers that only want the text (the AI prompt, /extract-text-only)
+do not need any of that. This module drives pdfminer's interpreter directly with
+a device that skips layout analysis, ignores graphics, and joins characters into
+lines in content-stream order.
+"""
+from typing import Iterable, List
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.layout import LTChar, LTFigure
+from pdfminer.pdfinterp import PDFPageInterpreter
+
+# Same defaults as pdfplumber's extract_text(), so output lines and spacing match closely
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+EXTRACTION_MODES = ("fast", "layout")
+
+def _iter_chars(items: Iterable) -> Iterable[LTChar]:
+    for item in items:
+        if isinstance(item, LTChar):
+            yield item
+        elif isinstance(item, LTFigure):
+            # Text drawn inside form XObjects
+            yield from _iter_chars(item)
+
+def chars_to_text(chars: Iterable[LTChar]) -> str:
+    """Join characters into lines: a baseline jump starts a new line, a horizontal gap inserts a space"""
+    lines: List[str] = []
+    line: List[str] = []
+    previous = None
+    for char in chars:
+        if previous is not None:
+            if abs(char.y0 - previous.y0) > Y_TOLERANCE:
+                lines.append("".join(line).strip())
+                line = []
+            elif char.x0 > previous.x1 + X_TOLERANCE and line and line[-1] != " " and char.get_text() != " ":
+                line.append(" ")
+        line.append(char.get_text())
+        previous = char
+    if line:
+        lines.append("".join(line).strip())
+    return "\n".join(lines)
+
+class PlainTextDevice(PDFLayoutAnalyzer):
+    """pdfminer device that keeps only characters and skips layout analysis"""
+
+    def __init__(self, rsrcmgr):
+        # laparams=None makes end_page skip LTPage.analyze()
+        super().__init__(rsrcmgr, laparams=None)
+        self.page_text = ""
+
+    def paint_path(self, gstate, stroke, fill, evenodd, path):
+        pass
+
+    def render_image(self, name, stream):
+        pass
+
+    def receive_layout(self, ltpage):
+        self.page_text = chars_to_text(_iter_chars(ltpage))
+
+def extract_page_text(pdf, page) -> str:
+    """Plain text of one page of an open pdfplumber PDF, without pdfplumber's object model"""
+    device = PlainTextDevice(pdf.rsrcmgr)
+    PDFPageInterpreter(pdf.rsrcmgr, device).process_page(page.page_obj)
+    return device.page_text
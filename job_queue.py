@@ -0,0 +1,360 @@
+"""
+Background jobs for long-running cover letter generation.
+
+Submitting a job stores it in a local SQLite database and returns straight
+away. A bounded pool of workers in each app process claims queued jobs, runs
+them and stores the result (a file name and its bytes) or the error, and
+clients poll or long-poll for the outcome.
+
+State lives in SQLite, so jobs survive restarts: a claimed job carries a
+lease, and if its worker dies the job is claimed again once the lease runs
+out, so workers renew the lease while they run. Each claim is numbered, and
+a worker that lost its lease cannot overwrite the job's newer state. Several
+app processes can share one database file. Results are deleted
+once they expire, and the job's input is dropped as soon as it has run.
+"""
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from fastapi import HTTPException
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    run_after REAL NOT NULL,
+    lease_until REAL,
+    expires_at REAL,
+    filename TEXT,
+    result BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, run_after);
+"""
+
+# Columns returned by status lookups; the result blob is only read for downloads
+STATUS_COLUMNS = "id, status, attempts, created_at, updated_at, expires_at, filename, error"
+
+class JobStore:
+    """SQLite job table. Methods block, so the queue calls them in a thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit mode; claims open their own write transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, payload: Dict[str, Any], max_queued: int) -> Optional[str]:
+        """Insert a queued job and return its ID, or None when max_queued jobs are already waiting"""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+            if queued >= max_queued:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at, run_after) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), now, now, now)
+            )
+            conn.execute("COMMIT")
+        return job_id
+
+    def claim(self, lease: float, max_attempts: int, result_ttl: float) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest runnable job: queued and due, or running with an expired lease.
+        Jobs out of attempts are failed on the way, and expire after result_ttl like other results.
+        """
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            while True:
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM jobs"
+                    " WHERE (status = ? AND run_after <= ?) OR (status = ? AND lease_until < ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (QUEUED, now, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                if row["attempts"] >= max_attempts:
+                    # Its workers kept dying (or it kept being rejected); stop retrying it
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, payload = '{}', error = ?, expires_at = ?, updated_at = ?,"
+                        " lease_until = NULL WHERE id = ?",
+                        (FAILED, "Job was interrupted too many times", now + result_ttl, now, row["id"])
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, now + lease, now, row["id"])
+                )
+                conn.execute("COMMIT")
+                return {"id": row["id"], "payload": json.loads(row["payload"]), "attempts": row["attempts"] + 1}
+
+    # The updates below only apply while `attempt` still holds the job, i.e. it was not reclaimed after its lease ran out
+
+    def renew(self, job_id: str, attempt: int, lease: float) -> bool:
+        with self._connection() as conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (time.time() + lease, job_id, RUNNING, attempt)
+            ).rowcount == 1
+
+    def finish(self, job_id: str, attempt: int, filename: str, result: bytes, ttl: float):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, payload = '{}', filename = ?, result = ?, expires_at = ?,"
+                " updated_at = ?, lease_until = NULL WHERE id = ? AND status = ? AND attempts = ?",
+                (DONE, filename, result, now + ttl, now, job_id, RUNNING, attempt)
+            )
+
+    def fail(self, job_id: str, attempt: int, error: str, ttl: float):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, payload = '{}', error = ?, expires_at = ?, updated_at = ?, lease_until = NULL"
+                " WHERE id = ? AND status = ? AND attempts = ?",
+                (FAILED, error, now + ttl, now, job_id, RUNNING, attempt)
+            )
+
+    def requeue(self, job_id: str, attempt: int, delay: float, refund_attempt: bool = False):
+        """Put a claimed job back in the queue, runnable after `delay` seconds"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, run_after = ?, updated_at = ?, lease_until = NULL,"
+                " attempts = attempts - ? WHERE id = ? AND status = ? AND attempts = ?",
+                (QUEUED, now + delay, now, 1 if refund_attempt else 0, job_id, RUNNING, attempt)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            row = conn.execute(f"SELECT {STATUS_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (row["expires_at"] is not None and row["expires_at"] <= time.time()):
+            return None
+        return dict(row)
+
+    def result(self, job_id: str) -> Optional[Tuple[str, bytes]]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT filename, result FROM jobs WHERE id = ? AND status = ? AND expires_at > ?",
+                (job_id, DONE, time.time())
+            ).fetchone()
+        return (row["filename"], row["result"]) if row else None
+
+    def delete_expired(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS count FROM jobs WHERE expires_at IS NULL OR expires_at > ? GROUP BY status",
+                (time.time(),)
+            ).fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+class JobQueue:
+    """Worker pool over a JobStore; handler(payload) returns (filename, bytes) or raises"""
+
+    def __init__(self, path: str, handler: Callable[[Dict[str, Any]], Awaitable[Tuple[str, bytes]]],
+                 workers: int, result_ttl: float, lease: float, max_attempts: int, max_queued: int,
+                 poll_interval: float = 1.0, cleanup_interval: float = 60.0):
+        self.path = path
+        self.handler = handler
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+        self.store: Optional[JobStore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, int] = {}  # job ID -> attempt, for jobs this process is running
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}  # job ID -> long polls in progress, to know when to drop its event
+        self.completed = 0
+        self.failed = 0
+        self.requeued = 0
+        self.expired = 0
+
+    async def start(self):
+        """Open the store and start the workers and the cleanup loop"""
+        if self._tasks:
+            return
+        self.store = await asyncio.to_thread(JobStore, self.path)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._cleanup()))
+        print(f"Job queue started: {self.workers} workers, store {self.path}")
+
+    async def stop(self):
+        """Stop the workers and hand their unfinished jobs back to the queue"""
+        interrupted = list(self._running.items())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job_id, attempt in interrupted:
+            await asyncio.to_thread(self.store.requeue, job_id, attempt, 0, True)
+
+    def _require_store(self) -> JobStore:
+        if self.store is None:
+            raise HTTPException(status_code=503, detail="Job queue is not running")
+        return self.store
+
+    async def submit(self, payload: Dict[str, Any]) -> str:
+        """Queue a job; raises HTTPException(429) when the queue is full"""
+        job_id = await asyncio.to_thread(self._require_store().submit, payload, self.max_queued)
+        if job_id is None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many jobs are queued. Please retry shortly.",
+                headers={"Retry-After": "30"}
+            )
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._require_store().get, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Job status, waiting up to `timeout` seconds for it to finish"""
+        deadline = time.monotonic() + timeout
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            while True:
+                job = await self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in (DONE, FAILED) or remaining <= 0:
+                    return job
+                # Woken at once by a local worker; jobs run by other processes are seen on the next poll
+                finished = self._finished.setdefault(job_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(finished.wait(), min(remaining, self.poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # The last waiter drops the event, whether or not a worker here ever set it
+            waiters = self._waiters.pop(job_id) - 1
+            if waiters:
+                self._waiters[job_id] = waiters
+            else:
+                self._finished.pop(job_id, None)
+
+    async def result(self, job_id: str) -> Optional[Tuple[str, bytes]]:
+        return await asyncio.to_thread(self._require_store().result, job_id)
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self.store.claim, self.lease, self.max_attempts, self.result_ttl)
+            except sqlite3.Error as e:
+                print(f"Job queue claim failed: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job_id: str, attempt: int):
+        """Keep renewing the lease of a running job so other workers leave it alone"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                if not await asyncio.to_thread(self.store.renew, job_id, attempt, self.lease):
+                    return
+            except sqlite3.Error as e:
+                print(f"Job {job_id} lease renewal failed: {str(e)}")
+
+    async def _run(self, job: Dict[str, Any]):
+        job_id, attempt = job["id"], job["attempts"]
+        self._running[job_id] = attempt
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id, attempt))
+        try:
+            filename, data = await self.handler(job["payload"])
+        except HTTPException as e:
+            if e.status_code in (429, 503) and attempt < self.max_attempts:
+                # The model queue or upstream is saturated; try again when it expects to have room
+                delay = float((e.headers or {}).get("Retry-After", 5))
+                if await self._record(job_id, self.store.requeue, attempt, delay):
+                    self.requeued += 1
+            elif await self._record(job_id, self.store.fail, attempt, str(e.detail), self.result_ttl):
+                self.failed += 1
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            if await self._record(job_id, self.store.fail, attempt, str(e), self.result_ttl):
+                self.failed += 1
+        else:
+            if await self._record(job_id, self.store.finish, attempt, filename, data, self.result_ttl):
+                self.completed += 1
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job_id, None)
+            finished = self._finished.pop(job_id, None)
+            if finished is not None:
+                finished.set()
+
+    async def _record(self, job_id: str, update: Callable[..., None], *args: Any) -> bool:
+        """
+        Store a job's outcome. If the database stays locked, the worker carries on and the
+        job runs again once its lease runs out.
+        """
+        try:
+            await asyncio.to_thread(update, job_id, *args)
+            return True
+        except sqlite3.Error as e:
+            print(f"Job {job_id} state update failed, leaving it to lease expiry: {str(e)}")
+            return False
+
+    async def _cleanup(self):
+        while True:
+            try:
+                self.expired += await asyncio.to_thread(self.store.delete_expired)
+            except sqlite3.Error as e:
+                print(f"Job queue cleanup failed: {str(e)}")
+            await asyncio.sleep(self.cleanup_interval)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running_here": len(self._running),
+            "jobs": await asyncio.to_thread(self._require_store().counts),
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "expired_deleted": self.expired
+        }
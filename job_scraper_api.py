@@ -1,11 +1,17 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl
-import requests
+import aiohttp
+import asyncio
 from bs4 import BeautifulSoup
+import os
 import re
-import time
-from typing import Optional
+from typing import List, Optional
+from urllib.parse import urlparse
+from rate_limiter import HostRateLimiter
+from caching import TTLCache, SingleFlight
+import metrics
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,9 +29,12 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Request model
+# Request models
 class JobScrapingRequest(BaseModel):
     url: HttpUrl
+
+class BatchScrapingRequest(BaseModel):
+    urls: List[HttpUrl]
     
 # Response model
 class JobScrapingResponse(BaseModel):
@@ -35,39 +44,76 @@ class JobScrapingResponse(BaseModel):
     url: str
     word_count: Optional[int] = None
 
-def scrape_linkedin_job(url: str) -> tuple[bool, str, str]:
+# Enhanced headers to better mimic a real browser
+SCRAPER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0'
+}
+
+# Fetcher settings
+# Where job postings are fetched from; point it at stubs/fake_linkedin_server.py for offline load tests
+LINKEDIN_BASE_URL = os.environ.get("LINKEDIN_BASE_URL", "https://www.linkedin.com").rstrip("/")
+SCRAPER_TIMEOUT = float(os.environ.get("SCRAPER_TIMEOUT", "15"))
+SCRAPER_POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", "20"))
+
+# Per-host politeness: sustained requests per second and how many may burst at once
+SCRAPER_RATE_PER_SECOND = float(os.environ.get("SCRAPER_RATE_PER_SECOND", "1"))
+SCRAPER_BURST = float(os.environ.get("SCRAPER_BURST", "3"))
+
+host_rate_limiter = HostRateLimiter(rate=SCRAPER_RATE_PER_SECOND, burst=SCRAPER_BURST)
+
+# Cleaned descriptions keyed by LinkedIn job ID; failures are kept only briefly
+SCRAPER_CACHE_SIZE = int(os.environ.get("SCRAPER_CACHE_SIZE", "1024"))
+SCRAPER_CACHE_TTL = float(os.environ.get("SCRAPER_CACHE_TTL", "21600"))
+SCRAPER_NEGATIVE_CACHE_TTL = float(os.environ.get("SCRAPER_NEGATIVE_CACHE_TTL", "60"))
+
+job_cache = TTLCache(max_entries=SCRAPER_CACHE_SIZE, ttl=SCRAPER_CACHE_TTL)
+metrics.register_cache("linkedin_job", job_cache)
+job_fetches = SingleFlight()
+
+# Batch scraping limits
+SCRAPER_BATCH_MAX_URLS = int(os.environ.get("SCRAPER_BATCH_MAX_URLS", "100"))
+SCRAPER_BATCH_CONCURRENCY = int(os.environ.get("SCRAPER_BATCH_CONCURRENCY", "10"))
+
+# Matches /jobs/view/123456789 and slugged forms like /jobs/view/backend-engineer-at-acme-123456789
+LINKEDIN_JOB_ID_PATTERN = re.compile(r"/jobs/view/(?:[^/?#]*-)?(\d+)")
+
+# One long-lived connection pool shared by every scrape
+_session: Optional[aiohttp.ClientSession] = None
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use inside the running event loop"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            headers=SCRAPER_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=SCRAPER_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=SCRAPER_POOL_SIZE, ttl_dns_cache=300)
+        )
+    return _session
+
+async def close_session():
+    """Close the shared HTTP session and its connection pool"""
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+def parse_job_description(html: bytes) -> tuple[bool, str, str]:
     """
-    Scrapes text from a LinkedIn job posting
+    Extracts the job description text from a LinkedIn job posting page
     Returns: (success, job_description, error_message)
     """
     
-    # Enhanced headers to better mimic a real browser
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Sec-Fetch-User': '?1',
-        'Cache-Control': 'max-age=0'
-    }
-    
-    session = requests.Session()
-    session.headers.update(headers)
-    
     try:
-        # Add a small delay to appear more human-like
-        time.sleep(1)
-        
-        response = session.get(url, timeout=15)
-        response.raise_for_status()
-        
         # Parse the HTML content
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Try multiple possible selectors for the job description
         selectors = [
@@ -96,11 +142,87 @@ def scrape_linkedin_job(url: str) -> tuple[bool, str, str]:
         else:
             return False, "", "Job description element not found on the page"
             
-    except requests.exceptions.RequestException as e:
-        return False, "", f"Network error: {str(e)}"
     except Exception as e:
         return False, "", f"Parsing error: {str(e)}"
 
+async def scrape_linkedin_job(url: str) -> tuple[bool, str, str]:
+    """
+    Scrapes text from a LinkedIn job posting
+    Returns: (success, job_description, error_message)
+    """
+    
+    try:
+        # Wait for this host's rate limit instead of sleeping unconditionally
+        await host_rate_limiter.acquire(urlparse(url).hostname or "")
+        
+        with metrics.stage("linkedin_fetch"):
+            async with get_session().get(url) as response:
+                response.raise_for_status()
+                html = await response.read()
+        metrics.count_bytes("linkedin_fetch", len(html))
+    except asyncio.TimeoutError:
+        return False, "", f"Network error: request timed out after {SCRAPER_TIMEOUT:g}s"
+    except aiohttp.ClientError as e:
+        return False, "", f"Network error: {str(e)}"
+    
+    # BeautifulSoup is CPU-bound, so keep it off the event loop
+    with metrics.stage("html_parse"):
+        result = await asyncio.to_thread(parse_job_description, html)
+    if not result[0]:
+        metrics.record_error("html_parse")
+    return result
+
+def extract_job_id(url: str) -> Optional[str]:
+    """Return the numeric LinkedIn job ID from a job posting URL, if present"""
+    match = LINKEDIN_JOB_ID_PATTERN.search(urlparse(url).path)
+    return match.group(1) if match else None
+
+async def get_job_description(url: str) -> tuple[bool, str, str]:
+    """
+    Returns the job description for a LinkedIn posting, served from the job cache when possible.
+    URLs that differ only in tracking parameters share one cache entry, and concurrent
+    requests for the same job share one outbound fetch.
+    Returns: (success, job_description, error_message)
+    """
+    
+    job_id = extract_job_id(url)
+    if job_id:
+        cache_key = job_id
+        fetch_url = f"{LINKEDIN_BASE_URL}/jobs/view/{job_id}/"
+    else:
+        parsed = urlparse(url)
+        cache_key = fetch_url = parsed._replace(query="", fragment="").geturl()
+    
+    cached = job_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    async def fetch() -> tuple[bool, str, str]:
+        result = await scrape_linkedin_job(fetch_url)
+        job_cache.put(cache_key, result, ttl=None if result[0] else SCRAPER_NEGATIVE_CACHE_TTL)
+        return result
+    
+    return await job_fetches.do(cache_key, fetch)
+
+async def build_scrape_response(url_str: str) -> JobScrapingResponse:
+    """Scrape a LinkedIn job URL and wrap the outcome in a JobScrapingResponse"""
+    success, job_description, error_message = await get_job_description(url_str)
+    
+    if success:
+        word_count = len(job_description.split()) if job_description else 0
+        return JobScrapingResponse(
+            success=True,
+            job_description=job_description,
+            url=url_str,
+            word_count=word_count
+        )
+    else:
+        return JobScrapingResponse(
+            success=False,
+            error_message=error_message,
+            url=url_str
+        )
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -109,6 +231,8 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "/scrape": "POST - Scrape job description from LinkedIn URL",
+            "/scrape-batch": "POST - Scrape many LinkedIn URLs, streaming NDJSON results",
+            "/cache-stats": "GET - Job cache and request coalescing counters",
             "/health": "GET - Health check endpoint",
             "/docs": "GET - API documentation"
         }
@@ -119,6 +243,11 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Job scraper API is running"}
 
+@app.get("/cache-stats")
+async def cache_stats():
+    """Job cache and request coalescing counters"""
+    return {"cache": job_cache.stats(), "coalescing": job_fetches.stats()}
+
 @app.post("/scrape", response_model=JobScrapingResponse)
 async def scrape_job(request: JobScrapingRequest):
     """
@@ -139,25 +268,63 @@ async def scrape_job(request: JobScrapingRequest):
         )
     
     try:
-        success, job_description, error_message = scrape_linkedin_job(url_str)
-        
-        if success:
-            word_count = len(job_description.split()) if job_description else 0
+        return await build_scrape_response(url_str)
+            
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/scrape-batch")
+async def scrape_job_batch(request: BatchScrapingRequest):
+    """
+    Scrape job descriptions from many LinkedIn job posting URLs
+    
+    - **urls**: List of LinkedIn job posting URLs
+    
+    Streams one JobScrapingResponse per line (NDJSON) as each URL finishes,
+    so results arrive in completion order rather than request order
+    """
+    
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="Provide at least one URL")
+    if len(request.urls) > SCRAPER_BATCH_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs: {len(request.urls)}. Maximum per batch: {SCRAPER_BATCH_MAX_URLS}"
+        )
+    
+    url_strs = [str(url) for url in request.urls]
+    
+    async def scrape_one(url_str: str, semaphore: asyncio.Semaphore) -> JobScrapingResponse:
+        # Invalid URLs get an error line instead of failing the whole batch
+        if "linkedin.com/jobs/view/" not in url_str:
             return JobScrapingResponse(
-                success=True,
-                job_description=job_description,
-                url=url_str,
-                word_count=word_count
+                success=False,
+                error_message="Invalid URL. Please provide a LinkedIn job posting URL",
+                url=url_str
             )
-        else:
+        try:
+            async with semaphore:
+                return await build_scrape_response(url_str)
+        except Exception as e:
             return JobScrapingResponse(
                 success=False,
-                error_message=error_message,
+                error_message=f"Internal server error: {str(e)}",
                 url=url_str
             )
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    async def stream_results():
+        semaphore = asyncio.Semaphore(SCRAPER_BATCH_CONCURRENCY)
+        tasks = [asyncio.ensure_future(scrape_one(url_str, semaphore)) for url_str in url_strs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield result.model_dump_json() + "\n"
+        finally:
+            # Stop outstanding scrapes if the client disconnects mid-stream
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 @app.get("/scrape")
 async def scrape_job_get(url: str):
@@ -175,7 +342,7 @@ async def scrape_job_get(url: str):
         )
     
     try:
-        success, job_description, error_message = scrape_linkedin_job(url)
+        success, job_description, error_message = await get_job_description(url)
         
         if success:
             word_count = len(job_description.split()) if job_description else 0
@@ -0,0 +1,116 @@
+"""
+Incremental parser for a streamed JSON object.
+
+The model streams its answer a few characters at a time. JSONFieldStream is fed
+those chunks and reports each top-level field as soon as its value is complete,
+and each string element of a top-level array (body_paragraphs) as soon as that
+element is complete, without waiting for the closing brace. Anything before the
+opening brace, such as a ```json fence, is skipped.
+"""
+import json
+from typing import List, Optional, Tuple
+
+class JSONFieldStream:
+    """Feed chunks of a JSON object and collect ("field", key, value) / ("item", key, index, value) events"""
+
+    def __init__(self):
+        self.state = "start"  # start -> key -> colon -> value -> after_value ... -> done
+        self.buffer: List[str] = []
+        self.key: Optional[str] = None
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.item_start: Optional[int] = None
+        self.item_index = 0
+
+    @property
+    def done(self) -> bool:
+        return self.state == "done"
+
+    def feed(self, chunk: str) -> List[Tuple]:
+        """Consume a chunk of text and return the events it completed"""
+        events: List[Tuple] = []
+        for char in chunk:
+            self._feed_char(char, events)
+        return events
+
+    def _end_value(self, raw: str, events: List[Tuple]):
+        try:
+            events.append(("field", self.key, json.loads(raw)))
+        except json.JSONDecodeError:
+            pass  # Left for the final validation of the whole response to report
+        self.buffer = []
+        self.item_index = 0
+        self.state = "after_value"
+
+    def _feed_char(self, char: str, events: List[Tuple]):
+        state = self.state
+        if state == "start":
+            if char == "{":
+                self.state = "key"
+        elif state == "key":
+            if not self.buffer:
+                if char == '"':
+                    self.buffer.append(char)
+                elif char == "}":
+                    self.state = "done"
+            elif self._read_string_char(char):
+                self.key = json.loads("".join(self.buffer))
+                self.buffer = []
+                self.state = "colon"
+        elif state == "colon":
+            if char == ":":
+                self.state = "value"
+        elif state == "value":
+            if not char.isspace():
+                self.state = "in_value"
+                self._feed_value_char(char, events)
+        elif state == "in_value":
+            self._feed_value_char(char, events)
+        elif state == "after_value":
+            if char == ",":
+                self.state = "key"
+            elif char == "}":
+                self.state = "done"
+
+    def _read_string_char(self, char: str) -> bool:
+        """Append a character of a string being read; True when it was the closing quote"""
+        self.buffer.append(char)
+        if self.escape:
+            self.escape = False
+        elif char == "\\":
+            self.escape = True
+        elif char == '"' and len(self.buffer) > 1:
+            return True
+        return False
+
+    def _feed_value_char(self, char: str, events: List[Tuple]):
+        if self.in_string:
+            if not self._read_string_char(char):
+                return
+            self.in_string = False
+            if self.depth == 0:
+                self._end_value("".join(self.buffer), events)
+            elif self.depth == 1 and self.item_start is not None:
+                events.append(("item", self.key, self.item_index, json.loads("".join(self.buffer[self.item_start:]))))
+                self.item_index += 1
+                self.item_start = None
+            return
+
+        if self.depth == 0 and char in ",}" and self.buffer:
+            # End of a number, true, false or null
+            self._end_value("".join(self.buffer).strip(), events)
+            self.state = "key" if char == "," else "done"
+            return
+
+        self.buffer.append(char)
+        if char == '"':
+            self.in_string = True
+            if self.depth == 1 and self.buffer[0] == "[":
+                self.item_start = len(self.buffer) - 1
+        elif char in "[{":
+            self.depth += 1
+        elif char in "]}":
+            self.depth -= 1
+            if self.depth == 0:
+                self._end_value("".join(self.buffer), events)
@@ -1,7 +1,7 @@
 # main.py
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 import os
 
 # Import sub-apps
@@ -9,9 +9,20 @@ from job_scraper_api import app as job_scraper_app
 from cover_letter_api import app as cover_letter_app
 from text_extractor_api import app as text_extractor_app
 from ai_cover_letter_api import app as ai_cover_app
+import ai_cover_letter_api
+import job_scraper_api
+from extraction_pool import extraction_pool
+from upload_limits import RequestSizeLimitMiddleware
+import metrics
 
 app = FastAPI()
 
+# Reject oversized request bodies before any sub-app parses them
+app.add_middleware(RequestSizeLimitMiddleware)
+
+# Time each request's stages and report them in a Server-Timing header
+app.add_middleware(metrics.ServerTimingMiddleware)
+
 # Mount APIs
 app.mount("/api/scraper", job_scraper_app)
 app.mount("/api/cover", cover_letter_app)
@@ -21,6 +32,23 @@ app.mount("/api/ai", ai_cover_app)
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Mounted sub-apps don't receive lifespan events, so background workers are started and shared clients closed here
+@app.on_event("startup")
+async def startup():
+    await ai_cover_letter_api.letter_jobs.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await ai_cover_letter_api.letter_jobs.stop()
+    await ai_cover_letter_api.close_client()
+    await job_scraper_api.close_session()
+    extraction_pool.shutdown()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Stage latency histograms, error, byte and cache counters in Prometheus format"""
+    return Response(content=metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
+
 # Serve index.html at root
 @app.get("/", response_class=FileResponse)
 async def serve_index():
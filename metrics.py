@@ -0,0 +1,199 @@
+"""
+Per-stage latency metrics and Server-Timing headers.
+
+Code times its stages with `stage()`, for example
+
+    with metrics.stage("docx_render"):
+        docx_bytes = generate_cover_letter_docx(data)
+
+Each timing is observed in a latency histogram and added to the current
+request's Server-Timing header by ServerTimingMiddleware. GET /metrics serves
+the histograms, counters and the hit/miss counts of registered caches in the
+Prometheus text format (version 0.0.4). Metrics are kept per process, so each
+worker process is a separate scrape target.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Stages reported in histograms and Server-Timing, in request order
+STAGES = [
+    "upload_read", "extraction", "linkedin_fetch", "html_parse",
+    "model_call", "json_validate", "docx_render"
+]
+
+# Histogram buckets in seconds: sub-millisecond renders up to slow model calls
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = STAGE_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, series):
+                    le = 'le="' + bound + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}")
+                count = series[len(self.buckets)]
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+stage_seconds = Histogram("app_stage_duration_seconds", "Time spent in each request processing stage", ["stage"])
+stage_errors = Counter("app_stage_errors_total", "Stage runs that raised or reported a failure", ["stage"])
+bytes_processed = Counter("app_bytes_processed_total", "Bytes read or produced by each stage", ["stage"])
+http_responses = Counter("app_http_responses_total", "HTTP responses by status code", ["status"])
+http_seconds = Histogram("app_http_request_duration_seconds", "Time until the response headers were sent")
+
+# Caches whose hit/miss counters are reported on each scrape, by name
+_caches: Dict[str, Any] = {}
+
+# Stage timings of the request being handled, for its Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def register_cache(name: str, cache: Any):
+    """Report a cache's hits and misses (from its stats()) as counters"""
+    _caches[name] = cache
+
+def record(name: str, seconds: float):
+    """Record a stage duration measured by the caller"""
+    stage_seconds.observe(seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        # Stages that run more than once per request, e.g. a repair model call, add up
+        timings[name] = timings.get(name, 0.0) + seconds
+
+def record_error(name: str):
+    """Count a stage failure that was returned rather than raised"""
+    stage_errors.inc(stage=name)
+
+def count_bytes(name: str, size: int):
+    bytes_processed.inc(size, stage=name)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as stage `name`, counting an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_error(name)
+        raise
+    finally:
+        record(name, time.perf_counter() - start)
+
+def _cache_lines() -> List[str]:
+    hits = Counter("app_cache_hits_total", "Cache lookups answered from the cache", ["cache"])
+    misses = Counter("app_cache_misses_total", "Cache lookups that missed", ["cache"])
+    for name, cache in _caches.items():
+        stats = cache.stats()
+        hits.inc(stats.get("hits", 0) + stats.get("disk_hits", 0), cache=name)
+        misses.inc(stats.get("misses", 0), cache=name)
+    return hits.render() + misses.render()
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in (stage_seconds, stage_errors, bytes_processed, http_responses, http_seconds):
+        lines.extend(metric.render())
+    lines.extend(_cache_lines())
+    return "\n".join(lines) + "\n"
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    """Server-Timing value with durations in milliseconds, stages in request order"""
+    names = sorted(timings, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES))
+    entries = [f"{name};dur={timings[name] * 1000:.1f}" for name in names]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+class ServerTimingMiddleware:
+    """
+    Collects the stage timings of each request and sends them as a Server-Timing header.
+    Streamed responses send their headers first, so they only report the stages that ran
+    before streaming began.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                http_responses.inc(status=str(message["status"]))
+                http_seconds.observe(total)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(timings, total).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
@@ -0,0 +1,187 @@
+"""
+Token budget for the cover letter prompt.
+
+Scraped LinkedIn descriptions carry long EEO statements, benefits lists and
+"about us" blocks that cost tokens and latency without improving the letter.
+Before a prompt is built, the job description is split into sections by its
+headings, boilerplate is dropped outright, and if the prompt is still over
+AI_PROMPT_TOKEN_BUDGET the lowest-value sections are trimmed first: benefits,
+then company background, then unrecognised sections, and finally the tail of
+the resume and of the core job requirements.
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated at
+four characters per token.
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+# Total prompt tokens (system + user message) allowed per request
+AI_PROMPT_TOKEN_BUDGET = int(os.environ.get("AI_PROMPT_TOKEN_BUDGET", "12000"))
+
+CHARS_PER_TOKEN = 4
+
+# Section ranks: lower ranks are trimmed first, BOILERPLATE is always removed
+BOILERPLATE, BENEFITS, ABOUT, OTHER, CORE = range(5)
+
+# Headings that name nothing but boilerplate ("EEO Statement", "Diversity & Inclusion at Acme",
+# "Applicant Privacy Notice"). Only these sections are dropped at any budget; a line that merely
+# mentions privacy or diversity, such as a requirement, never matches.
+BOILERPLATE_HEADING = re.compile(
+    r"((our|an?) )?(commitment to )?("
+    r"equal (employment )?opportunit(y|ies)( employer)?|eeoc?|e-verify|affirmative action|"
+    r"diversity(,? (equity,? )?(and |& )?inclusion)?|inclusion|belonging|"
+    r"(reasonable )?accommodations?( for (applicants|candidates))?|"
+    r"((applicant|candidate) )?privacy|disclaimer|legal notice|pay transparency|"
+    r"recruit(ing|ment) (fraud|scams?)|(note|notice|message) to (recruiters|agencies)"
+    r")( (statement|policy|notice|disclosure|act|information))*( at [a-z0-9&.\- ]+)?"
+)
+
+# Checked in order, so "about the role" is core before the generic "about ..." rule sees it
+HEADING_PATTERNS = [
+    (CORE, r"about the (role|job|position|opportunity)|what you('|’)?ll do|what you will do"),
+    (BENEFITS, r"benefit|perk|what we offer|we offer|compensation|salary|pay range|why (join|work)|rewards"),
+    (ABOUT, r"about (us|the company|our company|the team|[a-z0-9&.\- ]+$)|who we are|our (mission|story|values|culture)|"
+            r"company (overview|description)|life at"),
+    (CORE, r"responsibilit|requirement|qualification|the role|skills|experience|you (have|bring|are)|duties|"
+           r"must have|nice to have|preferred|minimum|your (role|impact)|job (summary|description)|overview|position"),
+]
+
+# List items are never headings, even when short and unpunctuated ("**Bold**" headings are not bullets)
+BULLET = re.compile(r"^([-–•·▪‣◦]|\*(?!\*)|\d+[.)])\s+")
+
+# Boilerplate sentences that often appear without a heading of their own
+BOILERPLATE_LINE = re.compile(
+    r"equal (employment )?opportunity|without regard to (race|age|sex|gender)|affirmative action|"
+    r"reasonable accommodation|protected veteran|e-verify|applicants? (with|requiring) disabilit|"
+    r"know your rights|pay transparency",
+    re.IGNORECASE
+)
+
+_encoding = None
+_encoding_failed = False
+
+def _get_encoding(model: str):
+    """tiktoken encoding for the model, or None when tiktoken is unavailable"""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed and tiktoken is not None:
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(model.split("/")[-1])
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # Encodings are downloaded on first use; fall back to the estimate if that fails
+            print(f"⚠️ tiktoken unavailable ({e}); estimating prompt tokens from length")
+            _encoding_failed = True
+    return _encoding
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Token count of text for the model, estimated from length without tiktoken"""
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _classify_heading(line: str) -> Optional[int]:
+    """Rank of the section a line starts, or None if the line is not a heading"""
+    stripped = line.strip()
+    if not stripped or BULLET.match(stripped):
+        return None
+    text = stripped.rstrip(":").strip("*#_ ").lower()
+    if not text or len(text) > 60 or len(text.split()) > 8 or text[-1] in ".,;!":
+        return None
+    if BOILERPLATE_HEADING.fullmatch(text):
+        return BOILERPLATE
+    for rank, pattern in HEADING_PATTERNS:
+        if re.search(pattern, text):
+            return rank
+    # An unrecognised short line ending in a colon still opens a section
+    return OTHER if stripped.endswith(":") else None
+
+def split_sections(job_description: str) -> List[Dict]:
+    """Split a job description into {"heading", "rank", "lines"} sections in order"""
+    sections = [{"heading": "", "rank": OTHER, "lines": []}]
+    for line in job_description.splitlines():
+        rank = _classify_heading(line)
+        if rank is not None:
+            sections.append({"heading": line.strip(), "rank": rank, "lines": [line]})
+        else:
+            sections[-1]["lines"].append(line)
+    return [section for section in sections if any(line.strip() for line in section["lines"])]
+
+def _join(sections: List[Dict]) -> str:
+    text = "\n".join(line for section in sections for line in section["lines"])
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+def _truncate(text: str, tokens: int, model: str) -> str:
+    """Cut text to roughly `tokens` tokens at a line boundary where possible"""
+    if tokens <= 0:
+        return ""
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:tokens])
+    else:
+        cut = text[:tokens * CHARS_PER_TOKEN]
+    if len(cut) < len(text) and "\n" in cut:
+        cut = cut[:cut.rindex("\n")]
+    return cut.rstrip()
+
+def fit_prompt(resume_text: str, job_description: str, overhead_tokens: int,
+               budget: int = AI_PROMPT_TOKEN_BUDGET, model: str = "gpt-4o") -> Dict:
+    """
+    Strip boilerplate from the job description and trim both texts until the prompt
+    (overhead_tokens of fixed template plus the two texts) fits the budget.
+
+    Returns the trimmed texts, prompt token counts before and after, and the
+    headings of the job description sections that were removed.
+    """
+    tokens_before = overhead_tokens + count_tokens(resume_text, model) + count_tokens(job_description, model)
+
+    sections = split_sections(job_description)
+    removed = [section["heading"] or "(untitled)" for section in sections if section["rank"] == BOILERPLATE]
+    sections = [section for section in sections if section["rank"] != BOILERPLATE]
+    for section in sections:
+        section["lines"] = [line for line in section["lines"] if not BOILERPLATE_LINE.search(line)]
+    sections = [section for section in sections if any(line.strip() for line in section["lines"])]
+
+    resume_tokens = count_tokens(resume_text, model)
+    job_text = _join(sections)
+
+    def total() -> int:
+        return overhead_tokens + resume_tokens + count_tokens(job_text, model)
+
+    # Drop whole sections, lowest rank first and later sections before earlier ones
+    for rank in (BENEFITS, ABOUT, OTHER):
+        for section in reversed([section for section in sections if section["rank"] == rank]):
+            if total() <= budget:
+                break
+            # The untitled opening lines usually name the role; they are only ever truncated
+            if section is sections[0] and not section["heading"]:
+                continue
+            sections.remove(section)
+            removed.append(section["heading"] or "(untitled)")
+            job_text = _join(sections)
+
+    # Still over: cut the tails, leaving the resume at least half of what remains
+    if total() > budget:
+        available = max(0, budget - overhead_tokens)
+        resume_share = max(available // 2, available - count_tokens(job_text, model))
+        if resume_tokens > resume_share:
+            resume_text = _truncate(resume_text, resume_share, model)
+            resume_tokens = count_tokens(resume_text, model)
+        if total() > budget:
+            job_text = _truncate(job_text, available - resume_tokens, model)
+
+    return {
+        "resume_text": resume_text,
+        "job_description": job_text,
+        "tokens_before": tokens_before,
+        "tokens_after": total(),
+        "removed_sections": removed
+    }
@@ -0,0 +1,216 @@
+"""
+Retries, hedging and circuit breaking for upstream model calls.
+
+ResilientCaller wraps one async call:
+
+- Transient failures (429, 5xx, timeouts, connection errors) are retried with
+  jittered exponential backoff, waiting at least as long as the upstream's
+  Retry-After header asks. A Retry-After longer than the maximum backoff
+  fails the call instead.
+- Optionally, when a call runs past the recent p95 latency a second, hedged
+  request is started and whichever answers first wins.
+- A circuit breaker opens after consecutive failed attempts, so calls fail
+  fast with CircuitOpenError while the upstream is down, then lets a single
+  trial call through after the reset timeout. Rate limiting (429) means the
+  upstream is up, so it is retried but does not count towards opening it.
+"""
+import time
+import random
+import asyncio
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"AI service is temporarily unavailable; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an upstream error is worth retrying"""
+    if isinstance(error, HttpResponseError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (ServiceRequestError, ServiceResponseError, asyncio.TimeoutError, ConnectionError))
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Delay requested by the upstream's Retry-After header, in seconds or as an HTTP date"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures; half-opens after reset_timeout"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.short_circuited = 0
+        self._trial_in_flight = False
+
+    def open_for(self) -> float:
+        """Seconds until the breaker lets a trial call through; 0 when calls may go ahead"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        if self.state == "closed":
+            return
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        self.short_circuited += 1
+        raise CircuitOpenError(max(1.0, remaining))
+
+    def record_abandoned(self):
+        """The call was cancelled before it finished; let another trial through"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited
+        }
+
+class ResilientCaller:
+    """Retry with backoff, optional hedging and a circuit breaker around an async upstream call"""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float,
+                 breaker: CircuitBreaker, hedge: bool = False, hedge_min_samples: int = 20):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = deque(maxlen=200)
+        self.calls = 0
+        self.retries = 0
+        self.hedges_started = 0
+        self.hedges_won = 0
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Jittered exponential delay before retry number `attempt`, never shorter than Retry-After"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        requested = retry_after_seconds(error)
+        return max(delay, requested) if requested is not None else delay
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 of recent successful call latencies, once there are enough samples"""
+        if not self.hedge or len(self._latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    async def _hedged(self, fn: Callable[[], Awaitable[Any]], delay: float) -> Any:
+        """Run fn; if it has not finished after `delay`, race a second copy and keep the first success"""
+        first = asyncio.ensure_future(fn())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            self.hedges_started += 1
+            tasks.append(asyncio.ensure_future(fn()))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], hedge: bool = True) -> Any:
+        """Call fn() through the breaker, retrying transient failures"""
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            self.breaker.before_call()
+            start = time.monotonic()
+            try:
+                delay = self.hedge_delay() if hedge else None
+                result = await (self._hedged(fn, delay) if delay is not None else fn())
+            except asyncio.CancelledError:
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered (e.g. 400/401); it is not down
+                    self.breaker.record_success()
+                    raise
+                if getattr(e, "status_code", None) == 429:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                wait = self.backoff(attempt, e)
+                # Give up rather than hold the caller for longer than the upstream's own backoff cap
+                if attempt == self.max_attempts - 1 or wait > self.max_delay:
+                    raise
+                reason = (str(e).splitlines() or [""])[0][:120]
+                print(f"⚠️ Model call failed ({e.__class__.__name__}: {reason}); retry {attempt + 1} in {wait:.1f}s")
+                self.retries += 1
+                await asyncio.sleep(wait)
+                continue
+            self.breaker.record_success()
+            self._latencies.append(time.monotonic() - start)
+            return result
+
+    def stats(self) -> Dict:
+        hedge_delay = self.hedge_delay()
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "max_attempts": self.max_attempts,
+            "hedging_enabled": self.hedge,
+            "hedge_after_seconds": round(hedge_delay, 3) if hedge_delay is not None else None,
+            "hedges_started": self.hedges_started,
+            "hedges_won": self.hedges_won,
+            "circuit_breaker": self.breaker.stats()
+        }
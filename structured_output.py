@@ -0,0 +1,95 @@
+"""
+JSON-schema constrained model output.
+
+The model is asked for output matching a JSON schema derived from a pydantic
+model (an OpenAI-style json_schema response_format). azure-ai-inference
+1.0.0b3 only knows the "text" and "json_object" formats, so the schema is
+sent through model_extras, which replaces the response_format in the request
+body.
+
+Answers are parsed and validated in a single step. When that fails, the
+fields that did validate are kept and the rest are reported, so a short repair
+call can regenerate just those instead of the whole answer. A reply that is
+not valid JSON at all, e.g. one cut off at the token limit, still keeps every
+field that was complete before the cut.
+"""
+import json
+from typing import Any, Dict, Iterable, Optional, Type
+from pydantic import BaseModel, ValidationError
+from json_stream import JSONFieldStream
+
+# Schema keywords that strict structured outputs reject or that only add noise; values are still validated by pydantic
+DROPPED_KEYWORDS = {"title", "default", "format"}
+
+def _strict(node: Any, defs: Dict[str, Any]) -> Any:
+    """Inline $refs, drop DROPPED_KEYWORDS and close every object schema"""
+    if isinstance(node, list):
+        return [_strict(value, defs) for value in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node:
+        return _strict(defs[node["$ref"].split("/")[-1]], defs)
+    strict = {}
+    for key, value in node.items():
+        if key == "properties":
+            # Keys here are field names, which may well be "title"
+            strict[key] = {name: _strict(prop, defs) for name, prop in value.items()}
+        elif key not in DROPPED_KEYWORDS and key != "$defs":
+            strict[key] = _strict(value, defs)
+    if "properties" in strict:
+        # Strict mode needs every property listed; optional ones may still be null
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+def strict_schema(model_cls: Type[BaseModel], fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Strict JSON schema for the model, optionally limited to some of its fields"""
+    schema = model_cls.model_json_schema()
+    properties = schema["properties"]
+    if fields is not None:
+        properties = {name: prop for name, prop in properties.items() if name in set(fields)}
+    return _strict({"type": "object", "properties": properties}, schema.get("$defs", {}))
+
+def response_format_extras(model_cls: Type[BaseModel], name: str, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """model_extras for ChatCompletionsClient.complete asking for output matching the schema"""
+    return {
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": name, "strict": True, "schema": strict_schema(model_cls, fields)}
+        }
+    }
+
+def validate_output(model_cls: Type[BaseModel], text: Optional[str], fixed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Parse and validate a model answer in one step. `fixed` holds fields that are already
+    known, such as contact details from a cached profile, and take precedence over the answer.
+
+    Returns {"data": instance} when it is valid. Otherwise "data" is None, "partial" holds
+    the fields that are present and valid, and "invalid_fields" maps each missing or
+    invalid field to the reason.
+    """
+    try:
+        parsed = json.loads(text or "")
+    except json.JSONDecodeError:
+        # Keep the top-level fields that were complete before the JSON broke off
+        parsed = {event[1]: event[2] for event in JSONFieldStream().feed(text or "") if event[0] == "field"}
+    if isinstance(parsed, dict):
+        parsed = {**parsed, **(fixed or {})}
+    try:
+        return {"data": model_cls.model_validate(parsed), "partial": {}, "invalid_fields": {}}
+    except ValidationError as e:
+        errors = e.errors()
+
+    invalid_fields: Dict[str, str] = {}
+    for error in errors:
+        name = str(error["loc"][0]) if error["loc"] else None
+        if name in model_cls.model_fields:
+            invalid_fields.setdefault(name, error["msg"])
+    if not invalid_fields or not isinstance(parsed, dict):
+        # The error was not about any one field, so nothing can be kept
+        return {"data": None, "partial": {}, "invalid_fields": {name: errors[0]["msg"] for name in model_cls.model_fields}}
+    partial = {
+        name: value for name, value in parsed.items()
+        if name in model_cls.model_fields and name not in invalid_fields
+    }
+    return {"data": None, "partial": partial, "invalid_fields": invalid_fields}
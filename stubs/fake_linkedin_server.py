@@ -0,0 +1,113 @@
+"""
+Local stand-in for public LinkedIn job posting pages.
+
+GET /jobs/view/{job_id}/ returns a synthetic posting generated from the job ID
+(see benchmarks/corpus.py), so every ID has its own stable description. Point
+the scraper at it with:
+
+    uvicorn stubs.fake_linkedin_server:app --port 9100
+    LINKEDIN_BASE_URL=http://localhost:9100 uvicorn main:app
+
+Users still submit ordinary https://www.linkedin.com/jobs/view/... URLs; the
+scraper fetches the job ID from LINKEDIN_BASE_URL instead.
+
+Each page is served after a delay drawn from a log-normal distribution around
+FAKE_LINKEDIN_LATENCY (the median) with shape FAKE_LINKEDIN_LATENCY_SIGMA. A
+fraction of requests can fail with 503, be throttled with 429 (LinkedIn's usual
+answer to scrapers), or get a page without a job description. Set these at
+startup with the FAKE_LINKEDIN_* variables below or change them at runtime:
+
+    curl -X POST localhost:9100/faults -H 'Content-Type: application/json' \
+         -d '{"rate_limit_rate": 0.2}'
+"""
+import os
+import math
+import random
+import asyncio
+from functools import lru_cache
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+from benchmarks.corpus import make_linkedin_html
+
+app = FastAPI(
+    title="Fake LinkedIn Server",
+    description="Offline stand-in for public LinkedIn job posting pages",
+    version="1.0.0"
+)
+
+# Latency distribution (median seconds, log-normal sigma) and injected faults: fractions of
+# requests that fail with 503, get a 429, or get a page with no job description
+faults = {
+    "latency": float(os.environ.get("FAKE_LINKEDIN_LATENCY", "0.3")),
+    "latency_sigma": float(os.environ.get("FAKE_LINKEDIN_LATENCY_SIGMA", "0.5")),
+    "error_rate": float(os.environ.get("FAKE_LINKEDIN_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.environ.get("FAKE_LINKEDIN_429_RATE", "0")),
+    "empty_rate": float(os.environ.get("FAKE_LINKEDIN_EMPTY_RATE", "0"))
+}
+
+EMPTY_PAGE = "<!DOCTYPE html><html><body><main><h1>This job is no longer accepting applications</h1></main></body></html>"
+
+stats = {"total": 0, "in_flight": 0, "peak_in_flight": 0, "errors": 0, "rate_limited": 0, "empty": 0}
+
+@lru_cache(maxsize=1024)
+def job_page(job_id: int) -> bytes:
+    """Synthetic posting for a job ID; the ID seeds the generator so repeat fetches match"""
+    return make_linkedin_html(seed=job_id)
+
+def response_latency() -> float:
+    if faults["latency_sigma"] > 0 and faults["latency"] > 0:
+        return random.lognormvariate(math.log(faults["latency"]), faults["latency_sigma"])
+    return faults["latency"]
+
+@app.get("/jobs/view/{job_id}/")
+@app.get("/jobs/view/{job_id}")
+async def job_posting(job_id: int):
+    """A job posting page, after the configured delay, unless a fault is injected"""
+    stats["total"] += 1
+    stats["in_flight"] += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(response_latency())
+        roll = random.random()
+        if roll < faults["error_rate"]:
+            stats["errors"] += 1
+            return HTMLResponse("<html><body>Service unavailable</body></html>", status_code=503)
+        roll -= faults["error_rate"]
+        if roll < faults["rate_limit_rate"]:
+            stats["rate_limited"] += 1
+            return HTMLResponse("<html><body>Too many requests</body></html>", status_code=429, headers={"Retry-After": "5"})
+        roll -= faults["rate_limit_rate"]
+        if roll < faults["empty_rate"]:
+            stats["empty"] += 1
+            return HTMLResponse(EMPTY_PAGE)
+        return HTMLResponse(job_page(job_id))
+    finally:
+        stats["in_flight"] -= 1
+
+@app.get("/stats")
+async def get_stats():
+    """Request counts and the peak number of concurrent fetches"""
+    return stats
+
+@app.post("/stats/reset")
+async def reset_stats():
+    """Reset the counters between load-test runs"""
+    stats.update(total=0, in_flight=0, peak_in_flight=0, errors=0, rate_limited=0, empty=0)
+    return stats
+
+@app.get("/faults")
+async def get_faults():
+    """Current latency and fault injection settings"""
+    return faults
+
+@app.post("/faults")
+async def set_faults(request: Request):
+    """Change latency and fault injection settings; omitted keys keep their current values"""
+    updates = await request.json()
+    faults.update({key: float(value) for key, value in updates.items() if key in faults})
+    return faults
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.environ.get("PORT", 9100))
+    uvicorn.run(app, host="127.0.0.1", port=port)
@@ -0,0 +1,226 @@
+"""
+Local stand-in for the GitHub Models chat completions endpoint.
+
+Returns a canned cover letter after a configurable delay so the AI path can be
+load-tested without network access or a token. Point the app at it with:
+
+    uvicorn stubs.fake_model_server:app --port 9000
+    GITHUB_TOKEN=fake GITHUB_MODELS_ENDPOINT=http://localhost:9000 uvicorn main:app
+
+Requests for a candidate profile (recognised by their system prompt) get a
+canned profile instead. Requests with "stream": true get the answer as server-sent chunks spread
+over the same delay, like a real streamed completion.
+
+GET /stats reports how many calls are in flight right now and the peak seen so
+far, which should never exceed AI_MAX_CONCURRENCY on the app side.
+
+The delay follows a log-normal distribution around FAKE_MODEL_LATENCY (the
+median) with shape FAKE_MODEL_LATENCY_SIGMA; the default sigma of 0 answers
+after exactly the median.
+
+Faults can be injected to exercise the app's retries, hedging and circuit
+breaker: a fraction of calls can fail with 503, be rate limited with 429 and a
+Retry-After header, or answer after a much longer delay. Answers can also be
+made invalid (a malformed email and no body paragraphs) to exercise the
+app's repair call. Set them at startup
+with the FAKE_MODEL_* variables below or change them at runtime:
+
+    curl -X POST localhost:9000/faults -H 'Content-Type: application/json' \
+         -d '{"error_rate": 1.0}'
+"""
+import os
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(
+    title="Fake Model Server",
+    description="Offline stand-in for the GitHub Models chat completions API",
+    version="1.0.0"
+)
+
+# Characters of the answer per streamed chunk
+FAKE_MODEL_CHUNK_CHARS = int(os.environ.get("FAKE_MODEL_CHUNK_CHARS", "16"))
+
+# Latency distribution (median seconds, log-normal sigma) and injected faults: fractions of
+# calls that fail with 503, get a 429, answer slowly, or answer with invalid fields
+faults = {
+    "latency": float(os.environ.get("FAKE_MODEL_LATENCY", "2.0")),
+    "latency_sigma": float(os.environ.get("FAKE_MODEL_LATENCY_SIGMA", "0")),
+    "error_rate": float(os.environ.get("FAKE_MODEL_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.environ.get("FAKE_MODEL_429_RATE", "0")),
+    "retry_after": float(os.environ.get("FAKE_MODEL_RETRY_AFTER", "1")),
+    "slow_rate": float(os.environ.get("FAKE_MODEL_SLOW_RATE", "0")),
+    "slow_latency": float(os.environ.get("FAKE_MODEL_SLOW_LATENCY", "10.0")),
+    "invalid_rate": float(os.environ.get("FAKE_MODEL_INVALID_RATE", "0"))
+}
+
+CANNED_LETTER = {
+    "file_name": "cover_letter_Acme_Backend_Engineer.docx",
+    "your_name": "Jane Doe",
+    "your_address": "1 Main Street, Springfield",
+    "your_email": "jane.doe@example.com",
+    "your_phone": "+1 555 0100",
+    "employer_name": "Hiring Manager",
+    "company_name": "Acme",
+    "company_address": "Company Address",
+    "position_title": "Backend Engineer",
+    "body_paragraphs": [
+        "I am excited to apply for the Backend Engineer role at Acme.",
+        "In my current role I built and operated Python services that handle millions of requests a day.",
+        "Acme's focus on reliable developer tooling matches the work I enjoy most.",
+        "I would welcome the chance to discuss how I can contribute to your team."
+    ]
+}
+
+CANNED_PROFILE = {
+    "your_name": "Jane Doe",
+    "your_address": "1 Main Street, Springfield",
+    "your_email": "jane.doe@example.com",
+    "your_phone": "+1 555 0100",
+    "headline": "Backend engineer with 6 years of experience building Python services",
+    "skills": ["Python", "FastAPI", "PostgreSQL", "Redis", "Kubernetes"],
+    "roles": [{
+        "title": "Senior Backend Engineer",
+        "company": "Initech",
+        "dates": "2021 - Present",
+        "highlights": ["Built services handling millions of requests a day"]
+    }],
+    "achievements": ["Cut p99 API latency by 40%"],
+    "education": ["BSc Computer Science"]
+}
+
+stats = {"total": 0, "in_flight": 0, "peak_in_flight": 0, "errors": 0, "rate_limited": 0, "slow": 0, "invalid": 0}
+
+def injected_fault() -> Optional[JSONResponse]:
+    """Error response for this call according to the configured fault rates, or None"""
+    roll = random.random()
+    if roll < faults["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"code": "ServiceUnavailable", "message": "Injected fault"}}, status_code=503)
+    if roll < faults["error_rate"] + faults["rate_limit_rate"]:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"code": "RateLimitReached", "message": "Injected rate limit"}},
+            status_code=429,
+            headers={"Retry-After": str(faults["retry_after"])}
+        )
+    return None
+
+def response_latency() -> float:
+    """Delay for this call, drawn from the latency distribution, occasionally the slow one"""
+    if random.random() < faults["slow_rate"]:
+        stats["slow"] += 1
+        return faults["slow_latency"]
+    if faults["latency_sigma"] > 0 and faults["latency"] > 0:
+        return random.lognormvariate(math.log(faults["latency"]), faults["latency_sigma"])
+    return faults["latency"]
+
+def answer_content(body: dict) -> str:
+    """The canned letter or profile, limited to the fields a json_schema response_format asks for"""
+    messages = body.get("messages") or [{}]
+    is_profile = "candidate profile" in str(messages[0].get("content", ""))
+    answer = dict(CANNED_PROFILE if is_profile else CANNED_LETTER)
+    if random.random() < faults["invalid_rate"]:
+        stats["invalid"] += 1
+        answer["your_email"] = "jane.doe at example"
+        answer.pop("body_paragraphs", None)
+    response_format = body.get("response_format")
+    if isinstance(response_format, dict) and response_format.get("type") == "json_schema":
+        fields = response_format["json_schema"]["schema"]["properties"]
+        answer = {name: value for name, value in answer.items() if name in fields}
+    return json.dumps(answer)
+
+async def stream_completion(completion_id: str, model: str, content: str, latency: float):
+    """Server-sent chunks of the answer, spread over `latency` seconds"""
+    chunks = [content[i:i + FAKE_MODEL_CHUNK_CHARS] for i in range(0, len(content), FAKE_MODEL_CHUNK_CHARS)]
+    try:
+        for index, chunk in enumerate(chunks):
+            await asyncio.sleep(latency / len(chunks))
+            update = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop" if index == len(chunks) - 1 else None,
+                    "delta": {"role": "assistant", "content": chunk}
+                }]
+            }
+            yield f"data: {json.dumps(update)}\n\n"
+        yield "data: [DONE]\n\n"
+    finally:
+        stats["in_flight"] -= 1
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    """Answer a chat completion request with the canned letter"""
+    body = await request.json()
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+    stats["total"] += 1
+    fault = injected_fault()
+    if fault is not None:
+        return fault
+
+    stats["in_flight"] += 1
+    stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+    latency = response_latency()
+    content = answer_content(body)
+    if body.get("stream"):
+        return StreamingResponse(
+            stream_completion(completion_id, body.get("model", "fake-model"), content, latency),
+            media_type="text/event-stream"
+        )
+    try:
+        await asyncio.sleep(latency)
+    finally:
+        stats["in_flight"] -= 1
+
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake-model"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content}
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+@app.get("/stats")
+async def get_stats():
+    """Current and peak number of in-flight completions"""
+    return stats
+
+@app.post("/stats/reset")
+async def reset_stats():
+    """Reset the counters between load-test runs"""
+    stats.update(total=0, in_flight=0, peak_in_flight=0, errors=0, rate_limited=0, slow=0, invalid=0)
+    return stats
+
+@app.get("/faults")
+async def get_faults():
+    """Current fault injection settings"""
+    return faults
+
+@app.post("/faults")
+async def set_faults(request: Request):
+    """Change fault injection settings; omitted keys keep their current values"""
+    updates = await request.json()
+    faults.update({key: float(value) for key, value in updates.items() if key in faults})
+    return faults
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.environ.get("PORT", 9000))
+    uvicorn.run(app, host="127.0.0.1", port=port)
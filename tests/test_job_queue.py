@@ -0,0 +1,193 @@
+"""
+JobStore lease, fencing and retry behaviour against a temporary SQLite file.
+
+A negative lease or TTL puts the deadline in the past, so expiry is tested
+without sleeping.
+"""
+import time
+import sqlite3
+import asyncio
+import pytest
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue, JobStore
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+def test_claim_takes_queued_job_once(store):
+    job_id = store.submit({"job": 1}, max_queued=10)
+    claimed = store.claim(lease=60, max_attempts=3, result_ttl=60)
+    assert claimed == {"id": job_id, "payload": {"job": 1}, "attempts": 1}
+    assert store.get(job_id)["status"] == RUNNING
+    # Lease still valid, so no other worker can take it
+    assert store.claim(lease=60, max_attempts=3, result_ttl=60) is None
+
+def test_submit_rejects_when_queue_full(store):
+    assert store.submit({}, max_queued=1) is not None
+    assert store.submit({}, max_queued=1) is None
+
+def test_expired_lease_is_reclaimed(store):
+    job_id = store.submit({"job": 1}, max_queued=10)
+    store.claim(lease=-1, max_attempts=3, result_ttl=60)
+    reclaimed = store.claim(lease=60, max_attempts=3, result_ttl=60)
+    assert reclaimed["id"] == job_id
+    assert reclaimed["attempts"] == 2
+    assert reclaimed["payload"] == {"job": 1}
+
+def test_renew_keeps_lease(store):
+    job_id = store.submit({}, max_queued=10)
+    store.claim(lease=-1, max_attempts=3, result_ttl=60)
+    assert store.renew(job_id, 1, lease=60)
+    assert store.claim(lease=60, max_attempts=3, result_ttl=60) is None
+
+def test_stale_worker_cannot_overwrite_reclaimed_job(store):
+    job_id = store.submit({}, max_queued=10)
+    store.claim(lease=-1, max_attempts=3, result_ttl=60)
+    store.claim(lease=60, max_attempts=3, result_ttl=60)
+
+    # The first worker's lease ran out; all its updates are fenced off by the attempt number
+    assert not store.renew(job_id, 1, lease=60)
+    store.finish(job_id, 1, "stale.docx", b"stale", ttl=60)
+    store.fail(job_id, 1, "stale error", ttl=60)
+    store.requeue(job_id, 1, delay=0, refund_attempt=True)
+    job = store.get(job_id)
+    assert job["status"] == RUNNING
+    assert job["attempts"] == 2
+    assert store.result(job_id) is None
+
+    store.finish(job_id, 2, "letter.docx", b"letter", ttl=60)
+    assert store.get(job_id)["status"] == DONE
+    assert store.result(job_id) == ("letter.docx", b"letter")
+
+def test_finished_job_is_not_reclaimed(store):
+    job_id = store.submit({}, max_queued=10)
+    store.claim(lease=-1, max_attempts=3, result_ttl=60)
+    store.finish(job_id, 1, "letter.docx", b"letter", ttl=60)
+    assert store.claim(lease=60, max_attempts=3, result_ttl=60) is None
+
+def test_requeue_with_refund_restores_attempt(store):
+    job_id = store.submit({}, max_queued=10)
+    store.claim(lease=60, max_attempts=3, result_ttl=60)
+    store.requeue(job_id, 1, delay=0, refund_attempt=True)
+    job = store.get(job_id)
+    assert job["status"] == QUEUED
+    assert job["attempts"] == 0
+    assert store.claim(lease=60, max_attempts=3, result_ttl=60)["attempts"] == 1
+
+def test_requeue_without_refund_counts_attempt(store):
+    job_id = store.submit({}, max_queued=10)
+    store.claim(lease=60, max_attempts=3, result_ttl=60)
+    store.requeue(job_id, 1, delay=0)
+    assert store.get(job_id)["attempts"] == 1
+    assert store.claim(lease=60, max_attempts=3, result_ttl=60)["attempts"] == 2
+
+def test_requeue_delay_defers_claim(store):
+    job_id = store.submit({}, max_queued=10)
+    store.claim(lease=60, max_attempts=3, result_ttl=60)
+    store.requeue(job_id, 1, delay=60)
+    assert store.claim(lease=60, max_attempts=3, result_ttl=60) is None
+    assert store.get(job_id)["status"] == QUEUED
+
+def test_max_attempts_marks_job_failed(store):
+    job_id = store.submit({"job": 1}, max_queued=10)
+    store.claim(lease=-1, max_attempts=2, result_ttl=60)
+    store.claim(lease=-1, max_attempts=2, result_ttl=60)
+    assert store.claim(lease=60, max_attempts=2, result_ttl=60) is None
+    job = store.get(job_id)
+    assert job["status"] == FAILED
+    assert job["error"] == "Job was interrupted too many times"
+    assert time.time() < job["expires_at"] <= time.time() + 60
+
+    # Like any other result, the failure expires and is cleaned up
+    expiring = store.submit({"job": 2}, max_queued=10)
+    store.claim(lease=-1, max_attempts=1, result_ttl=60)
+    assert store.claim(lease=60, max_attempts=1, result_ttl=-1) is None
+    assert store.get(expiring) is None
+    assert store.delete_expired() == 1
+    assert store.get(job_id)["status"] == FAILED
+
+def test_max_attempts_skips_to_next_job(store):
+    stuck = store.submit({"job": 1}, max_queued=10)
+    store.claim(lease=-1, max_attempts=1, result_ttl=60)
+    waiting = store.submit({"job": 2}, max_queued=10)
+    assert store.claim(lease=60, max_attempts=1, result_ttl=60)["id"] == waiting
+    assert store.get(stuck)["status"] == FAILED
+
+def test_expired_results_are_hidden_and_deleted(store):
+    job_id = store.submit({}, max_queued=10)
+    store.claim(lease=60, max_attempts=3, result_ttl=60)
+    store.finish(job_id, 1, "letter.docx", b"letter", ttl=-1)
+    assert store.get(job_id) is None
+    assert store.result(job_id) is None
+    assert store.counts()[DONE] == 0
+    assert store.delete_expired() == 1
+
+def test_stop_requeues_running_job_with_attempt_refunded(tmp_path):
+    async def scenario():
+        started = asyncio.Event()
+
+        async def handler(payload):
+            started.set()
+            await asyncio.Event().wait()  # never finishes
+
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler, workers=1, result_ttl=60, lease=60,
+                         max_attempts=3, max_queued=10, poll_interval=0.05)
+        await queue.start()
+        job_id = await queue.submit({"job": 1})
+        await asyncio.wait_for(started.wait(), 5)
+        await queue.stop()
+        return queue.store.get(job_id)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == QUEUED
+    assert job["attempts"] == 0
+
+def test_worker_survives_store_errors(tmp_path):
+    async def scenario():
+        async def handler(payload):
+            return "letter.docx", b"letter"
+
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler, workers=1, result_ttl=60, lease=60,
+                         max_attempts=3, max_queued=10, poll_interval=0.05)
+        await queue.start()
+        finish = queue.store.finish
+
+        def locked(*args):
+            raise sqlite3.OperationalError("database is locked")
+
+        queue.store.finish = locked
+        first = await queue.submit({"job": 1})
+        for _ in range(100):
+            if not queue._running and (await queue.get(first))["status"] == RUNNING:
+                break
+            await asyncio.sleep(0.02)
+        queue.store.finish = finish
+
+        # The same worker picks up the next job; the first is left to lease expiry
+        second = await queue.submit({"job": 2})
+        job = await queue.wait(second, 5)
+        await queue.stop()
+        return job, queue.store.get(first)
+
+    second, first = asyncio.run(scenario())
+    assert second["status"] == DONE
+    assert first["status"] == RUNNING
+
+def test_wait_drops_its_event(tmp_path):
+    async def scenario():
+        async def handler(payload):
+            await asyncio.sleep(0.1)
+            return "letter.docx", b"letter"
+
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler, workers=1, result_ttl=60, lease=60,
+                         max_attempts=3, max_queued=10, poll_interval=0.05)
+        await queue.start()
+        job_id = await queue.submit({})
+        # Times out before the job finishes, then waits again after it finished
+        assert (await queue.wait(job_id, 0.01))["status"] in (QUEUED, RUNNING)
+        assert (await queue.wait(job_id, 5))["status"] == DONE
+        assert (await queue.wait(job_id, 5))["status"] == DONE
+        await queue.stop()
+        return queue._finished, queue._waiters
+
+    assert asyncio.run(scenario()) == ({}, {})
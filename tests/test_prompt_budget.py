@@ -0,0 +1,50 @@
+"""
+Job description sectioning and boilerplate removal in fit_prompt.
+"""
+from prompt_budget import BOILERPLATE, CORE, OTHER, _classify_heading, fit_prompt
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+Requirements:
+- Experience with data privacy tools
+- Deep knowledge of GDPR and SOC2
+Building inclusive, accessible products
+
+Benefits:
+Health insurance
+
+Diversity & Inclusion at Acme Corp
+We celebrate diversity and are committed to an inclusive workplace.
+
+Equal Opportunity Employer
+All applicants receive consideration without regard to race.
+"""
+
+def test_requirements_mentioning_boilerplate_words_are_kept():
+    result = fit_prompt("resume", JOB_DESCRIPTION, overhead_tokens=100, budget=100000)
+    for line in ("- Experience with data privacy tools", "- Deep knowledge of GDPR and SOC2",
+                 "Building inclusive, accessible products", "Health insurance"):
+        assert line in result["job_description"]
+    assert result["removed_sections"] == ["Diversity & Inclusion at Acme Corp", "Equal Opportunity Employer"]
+    assert "celebrate diversity" not in result["job_description"]
+
+def test_bullets_are_never_headings():
+    assert _classify_heading("- Experience with data privacy tools") is None
+    assert _classify_heading("• Accommodations") is None
+    assert _classify_heading("1. Privacy") is None
+
+def test_heading_classification():
+    assert _classify_heading("Requirements:") == CORE
+    assert _classify_heading("**Equal Employment Opportunity**") == BOILERPLATE
+    assert _classify_heading("Applicant Privacy Notice") == BOILERPLATE
+    assert _classify_heading("Data privacy:") == OTHER
+    assert _classify_heading("Strong privacy background") is None
+
+def test_uncertain_sections_are_only_trimmed_over_budget():
+    job_description = "Backend Engineer\n\nData privacy:\nYou will own our consent pipeline\n"
+    kept = fit_prompt("resume", job_description, overhead_tokens=0, budget=100000)
+    assert "consent pipeline" in kept["job_description"]
+    assert kept["removed_sections"] == []
+
+    trimmed = fit_prompt("resume", job_description, overhead_tokens=0, budget=8)
+    assert trimmed["removed_sections"] == ["Data privacy:"]
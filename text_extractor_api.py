@@ -1,12 +1,24 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterable, AsyncIterator
+import io
 import os
-import tempfile
+import json
+import math
+import time
+import asyncio
+import zipfile
 import pdfplumber
-from docx import Document
 from pathlib import Path
+from caching import extraction_cache
+import metrics
+from extraction_pool import extraction_pool, ExtractionPool, ExtractionTimeout
+from upload_limits import buffered_upload, upload_budget
+from fast_pdf import EXTRACTION_MODES
+from fast_docx import read_core_properties
+from extraction_streams import TextStats, iter_pdf_pages, iter_docx_blocks
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -24,6 +36,19 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Bump when extraction logic changes so stale cache entries are not reused
+EXTRACTOR_VERSION = f"2-pdfplumber{pdfplumber.__version__}"
+
+# Minimum pages per worker before /extract-detailed?parallel=true splits a PDF
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "4"))
+
+# PDF pages extracted per pool job when streaming; each job reopens the PDF, so smaller batches
+# send the first pages sooner at some cost in total time
+STREAM_CHUNK_PAGES = int(os.environ.get("STREAM_CHUNK_PAGES", "4"))
+
+# "layout" runs pdfplumber's extract_text(); "fast" reads plain text straight from pdfminer (see fast_pdf.py)
+PDF_MODE_PATTERN = f"^({'|'.join(EXTRACTION_MODES)})$"
+
 # Response models
 class TextExtractionResponse(BaseModel):
     success: bool
@@ -50,50 +75,110 @@ class TextExtractorAPI:
     """Text extraction logic for the API"""
     
     @staticmethod
-    def extract_from_pdf(file_path: str, filename: str) -> Dict:
-        """Extract text from PDF file"""
+    def read_pdf_info(pdf) -> Dict:
+        """Document-level metadata fields of an open PDF"""
+        if not pdf.metadata:
+            return {}
+        return {
+            "title": pdf.metadata.get('Title', ''),
+            "author": pdf.metadata.get('Author', ''),
+            "subject": pdf.metadata.get('Subject', ''),
+            "creator": pdf.metadata.get('Creator', ''),
+            "producer": pdf.metadata.get('Producer', '')
+        }
+    
+    @staticmethod
+    def build_pdf_result(content: bytes, filename: str, total_pages: int, pdf_info: Dict, raw_pages: Iterable) -> Dict:
+        """Assemble the extraction result from (page_number, page_text) pairs in page order"""
+        text_parts = []
+        page_texts = []
+        stats = TextStats()
+        metadata = {
+            "file_type": "PDF",
+            "total_pages": total_pages,
+            "file_size": len(content)
+        }
+        
+        for page_num, page_text in raw_pages:
+            if page_text:
+                page_texts.append({
+                    "page_number": page_num,
+                    "text": page_text.strip()
+                })
+                text_parts.append(page_text + "\n\n")
+                stats.add(text_parts[-1])
+        
+        # Extract PDF metadata if available
+        metadata.update(pdf_info)
+        
+        return {
+            "success": True,
+            "filename": filename,
+            "full_text": "".join(text_parts).strip(),
+            "pages": page_texts,
+            "metadata": metadata,
+            "word_count": stats.words,
+            "character_count": stats.characters,
+            "file_type": "PDF"
+        }
+    
+    @staticmethod
+    def extract_from_pdf(content: bytes, filename: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                         mode: str = "layout") -> Dict:
+        """Extract text from PDF file contents, optionally stopping early at max_pages / max_chars"""
         try:
-            text_content = ""
-            page_texts = []
-            metadata = {
-                "file_type": "PDF",
-                "total_pages": 0,
-                "file_size": os.path.getsize(file_path)
-            }
-            
-            with pdfplumber.open(file_path) as pdf:
-                metadata["total_pages"] = len(pdf.pages)
-                
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        page_texts.append({
-                            "page_number": page_num,
-                            "text": page_text.strip()
-                        })
-                        text_content += page_text + "\n\n"
-                
-                # Extract PDF metadata if available
-                if pdf.metadata:
-                    metadata.update({
-                        "title": pdf.metadata.get('Title', ''),
-                        "author": pdf.metadata.get('Author', ''),
-                        "subject": pdf.metadata.get('Subject', ''),
-                        "creator": pdf.metadata.get('Creator', ''),
-                        "producer": pdf.metadata.get('Producer', '')
-                    })
+            with pdfplumber.open(io.BytesIO(content)) as pdf:
+                return TextExtractorAPI.build_pdf_result(
+                    content, filename, len(pdf.pages), TextExtractorAPI.read_pdf_info(pdf),
+                    iter_pdf_pages(pdf, max_pages, max_chars, mode=mode)
+                )
             
+        except Exception as e:
             return {
-                "success": True,
-                "filename": filename,
-                "full_text": text_content.strip(),
-                "pages": page_texts,
-                "metadata": metadata,
-                "word_count": len(text_content.split()),
-                "character_count": len(text_content),
-                "file_type": "PDF"
+                "success": False,
+                "error_message": f"Error extracting PDF: {str(e)}",
+                "filename": filename
             }
+    
+    @staticmethod
+    def read_pdf_overview(content: bytes) -> tuple:
+        """Page count and metadata of a PDF without extracting any text"""
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            return len(pdf.pages), TextExtractorAPI.read_pdf_info(pdf)
+    
+    @staticmethod
+    def extract_pdf_page_range(content: bytes, start: int, stop: int, mode: str = "layout",
+                               max_chars: Optional[int] = None) -> List:
+        """Extract (page_number, page_text) pairs for pages [start, stop); runs in an extraction worker"""
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            return list(iter_pdf_pages(pdf, max_chars=max_chars, start=start, stop=stop, mode=mode))
+    
+    @staticmethod
+    def read_docx_blocks(content: bytes, max_chars: Optional[int] = None) -> List:
+        """All (block_type, block) pairs of a DOCX in document order; runs in an extraction worker"""
+        with zipfile.ZipFile(io.BytesIO(content)) as package:
+            return list(iter_docx_blocks(package, max_chars))
+    
+    @staticmethod
+    async def extract_from_pdf_parallel(content: bytes, filename: str, pool: ExtractionPool = extraction_pool,
+                                        mode: str = "layout") -> Dict:
+        """Extract a PDF with its pages split across the pool's workers, reassembled in page order"""
+        try:
+            total_pages, pdf_info = await pool.run(TextExtractorAPI.read_pdf_overview, content)
+            chunk_count = min(pool.workers, total_pages // PDF_PARALLEL_MIN_PAGES)
+            if chunk_count <= 1:
+                return await pool.run(TextExtractorAPI.extract_from_pdf, content, filename, None, None, mode)
             
+            chunk_size = math.ceil(total_pages / chunk_count)
+            chunks = await asyncio.gather(*[
+                pool.run(TextExtractorAPI.extract_pdf_page_range, content, start, min(start + chunk_size, total_pages), mode)
+                for start in range(0, total_pages, chunk_size)
+            ])
+            raw_pages = [page for chunk in chunks for page in chunk]
+            return TextExtractorAPI.build_pdf_result(content, filename, total_pages, pdf_info, raw_pages)
+            
+        except ExtractionTimeout:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -102,45 +187,38 @@ class TextExtractorAPI:
             }
     
     @staticmethod
-    def extract_from_docx(file_path: str, filename: str) -> Dict:
-        """Extract text from DOCX file"""
+    def extract_from_docx(content: bytes, filename: str, max_chars: Optional[int] = None) -> Dict:
+        """Extract text from DOCX file contents, optionally stopping early at max_chars"""
         try:
-            doc = Document(file_path)
-            
-            # Extract paragraph text
+            # Extract paragraph and table text in document order
             paragraphs = []
-            full_text = ""
-            
-            for para in doc.paragraphs:
-                para_text = para.text.strip()
-                if para_text:
-                    paragraphs.append(para_text)
-                    full_text += para_text + "\n"
-            
-            # Extract text from tables
             table_texts = []
-            for table in doc.tables:
-                table_data = []
-                for row in table.rows:
-                    row_data = []
-                    for cell in row.cells:
-                        cell_text = cell.text.strip()
-                        row_data.append(cell_text)
-                        full_text += cell_text + " "
-                    table_data.append(row_data)
-                table_texts.append(table_data)
+            text_parts = []
+            stats = TextStats()
+            
+            with zipfile.ZipFile(io.BytesIO(content)) as package:
+                for block_type, block in iter_docx_blocks(package, max_chars):
+                    if block_type == "paragraph":
+                        paragraphs.append(block)
+                        text_parts.append(block + "\n")
+                        stats.add(text_parts[-1])
+                    else:
+                        table_texts.append(block)
+                        for row_data in block:
+                            for cell_text in row_data:
+                                text_parts.append(cell_text + " ")
+                                stats.add(text_parts[-1])
+                
+                # Extract document properties
+                core_props = read_core_properties(package)
+            full_text = "".join(text_parts)
             
-            # Extract document properties
-            core_props = doc.core_properties
             metadata = {
                 "file_type": "DOCX",
-                "file_size": os.path.getsize(file_path),
+                "file_size": len(content),
                 "paragraph_count": len(paragraphs),
                 "table_count": len(table_texts),
-                "title": core_props.title or "",
-                "author": core_props.author or "",
-                "subject": core_props.subject or "",
-                "keywords": core_props.keywords or ""
+                **core_props
             }
             
             return {
@@ -150,8 +228,8 @@ class TextExtractorAPI:
                 "paragraphs": paragraphs,
                 "tables": table_texts,
                 "metadata": metadata,
-                "word_count": len(full_text.split()),
-                "character_count": len(full_text),
+                "word_count": stats.words,
+                "character_count": stats.characters,
                 "file_type": "DOCX"
             }
             
@@ -161,6 +239,113 @@ class TextExtractorAPI:
                 "error_message": f"Error extracting DOCX: {str(e)}",
                 "filename": filename
             }
+    
+    @staticmethod
+    async def extract_cached(content: bytes, file_extension: str, filename: str, parallel: bool = False,
+                             max_pages: Optional[int] = None, max_chars: Optional[int] = None, mode: str = "layout") -> Dict:
+        """Extract text from uploaded bytes in the extraction pool, reusing the cached result for identical uploads"""
+        cache_mode = f"{file_extension}:{mode}:max_pages={max_pages}:max_chars={max_chars}"
+        cache_key = extraction_cache.make_key(content, "text_extractor_api", EXTRACTOR_VERSION, cache_mode)
+        cached = extraction_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "filename": filename}
+        
+        try:
+            with metrics.stage("extraction"):
+                if file_extension == '.pdf' and parallel and max_pages is None and max_chars is None:
+                    result = await TextExtractorAPI.extract_from_pdf_parallel(content, filename, mode=mode)
+                elif file_extension == '.pdf':
+                    result = await extraction_pool.run(TextExtractorAPI.extract_from_pdf, content, filename, max_pages, max_chars, mode)
+                else:  # .docx
+                    result = await extraction_pool.run(TextExtractorAPI.extract_from_docx, content, filename, max_chars)
+        except ExtractionTimeout as e:
+            result = {
+                "success": False,
+                "error_message": f"Error extracting {file_extension[1:].upper()}: {str(e)}",
+                "filename": filename
+            }
+        
+        # Failed extractions are not cached so a transient error can be retried
+        if result["success"]:
+            extraction_cache.put(cache_key, result)
+        else:
+            metrics.record_error("extraction")
+        return result
+    
+    @staticmethod
+    async def stream_extraction(content: bytes, file_extension: str, filename: str,
+                                max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                                mode: str = "layout", pool: ExtractionPool = extraction_pool) -> AsyncIterator[str]:
+        """
+        Yield NDJSON lines: one per page (PDF) or paragraph/table (DOCX) with running
+        word and character counts, then a final summary line.
+        
+        PDF pages are extracted in the pool STREAM_CHUNK_PAGES at a time and sent as each
+        batch finishes; a DOCX is read in one pool job. The whole stream gets the pool's
+        timeout: no new batch starts after it, and a batch that overruns it is killed.
+        """
+        stats = TextStats()
+        deadline = time.monotonic() + pool.timeout
+        try:
+            if file_extension == '.pdf':
+                total_pages, _ = await pool.run(TextExtractorAPI.read_pdf_overview, content)
+                if max_pages is not None:
+                    total_pages = min(total_pages, max_pages)
+                for start in range(0, total_pages, STREAM_CHUNK_PAGES):
+                    if time.monotonic() > deadline:
+                        raise ExtractionTimeout(f"Extraction timed out after {pool.timeout:g}s")
+                    remaining_chars = max_chars - stats.characters if max_chars is not None else None
+                    pages = await pool.run(
+                        TextExtractorAPI.extract_pdf_page_range, content,
+                        start, min(start + STREAM_CHUNK_PAGES, total_pages), mode, remaining_chars
+                    )
+                    characters = 0
+                    for page_num, page_text in pages:
+                        characters += len(page_text or "")
+                        if not page_text:
+                            continue
+                        stats.add(page_text + "\n\n")
+                        yield json.dumps({
+                            "type": "page",
+                            "page_number": page_num,
+                            "text": page_text.strip(),
+                            "word_count": stats.words,
+                            "character_count": stats.characters
+                        }) + "\n"
+                    if remaining_chars is not None and characters >= remaining_chars:
+                        break
+            else:  # .docx
+                for block_type, block in await pool.run(TextExtractorAPI.read_docx_blocks, content, max_chars):
+                    if block_type == "paragraph":
+                        stats.add(block + "\n")
+                    else:
+                        for row_data in block:
+                            for cell_text in row_data:
+                                stats.add(cell_text + " ")
+                    yield json.dumps({
+                        "type": block_type,
+                        "text" if block_type == "paragraph" else "rows": block,
+                        "word_count": stats.words,
+                        "character_count": stats.characters
+                    }) + "\n"
+            
+            yield json.dumps({
+                "type": "summary",
+                "success": True,
+                "filename": filename,
+                "word_count": stats.words,
+                "character_count": stats.characters,
+                "file_type": file_extension[1:].upper()
+            }) + "\n"
+            
+        except Exception as e:
+            metrics.record_error("extraction")
+            yield json.dumps({
+                "type": "summary",
+                "success": False,
+                "filename": filename,
+                "error_message": f"Error extracting {file_extension[1:].upper()}: {str(e)}"
+            }) + "\n"
 
 @app.get("/")
 async def root():
@@ -170,8 +355,10 @@ async def root():
         "version": "1.0.0",
         "supported_formats": ["PDF", "DOCX"],
         "endpoints": {
-            "/extract": "POST - Extract text from uploaded file (simple response)",
+            "/extract": "POST - Extract text from uploaded file (simple response, ?stream=true for NDJSON)",
             "/extract-detailed": "POST - Extract text with detailed structure",
+            "/cache-stats": "GET - Extraction cache hit/miss/eviction counters",
+            "/pool-stats": "GET - Extraction worker pool counters",
             "/health": "GET - Health check endpoint",
             "/docs": "GET - API documentation"
         }
@@ -182,12 +369,39 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Text extractor API is running"}
 
+@app.get("/cache-stats")
+async def cache_stats():
+    """Extraction cache counters, shared with the AI cover letter API"""
+    return extraction_cache.stats()
+
+@app.get("/pool-stats")
+async def pool_stats():
+    """Extraction worker pool counters, shared with the AI cover letter API"""
+    return extraction_pool.stats()
+
+async def stream_upload(content: bytes, file_extension: str, filename: str,
+                        max_pages: Optional[int], max_chars: Optional[int], mode: str) -> AsyncIterator[str]:
+    """Run stream_extraction in the extraction pool while holding the upload's memory reservation"""
+    async with upload_budget.reserve(len(content)):
+        async for line in TextExtractorAPI.stream_extraction(content, file_extension, filename, max_pages, max_chars, mode):
+            yield line
+
 @app.post("/extract", response_model=TextExtractionResponse)
-async def extract_text(file: UploadFile = File(...)):
+async def extract_text(
+    file: UploadFile = File(...),
+    stream: bool = Query(False),
+    max_pages: Optional[int] = Query(None, ge=1),
+    max_chars: Optional[int] = Query(None, ge=1),
+    mode: str = Query("layout", pattern=PDF_MODE_PATTERN)
+):
     """
     Extract text from uploaded PDF or DOCX file (simple response)
     
     - **file**: Upload a PDF or DOCX file
+    - **stream**: Stream NDJSON lines per page/paragraph as they are extracted, ending with a summary line
+    - **max_pages**: Stop after this many PDF pages
+    - **max_chars**: Stop once this many characters have been extracted
+    - **mode**: PDF extraction mode, "layout" (pdfplumber) or "fast" (plain text via pdfminer)
     
     Returns extracted text with basic information
     """
@@ -203,21 +417,17 @@ async def extract_text(file: UploadFile = File(...)):
             detail=f"Unsupported file type: {file_extension}. Supported types: .pdf, .docx"
         )
     
-    # Create temporary file
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        # Extract text based on file type
-        if file_extension == '.pdf':
-            result = TextExtractorAPI.extract_from_pdf(temp_file_path, file.filename)
-        else:  # .docx
-            result = TextExtractorAPI.extract_from_docx(temp_file_path, file.filename)
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
+        # Buffer the upload in memory (size-capped) and extract, reusing the cached result for a repeat upload
+        async with buffered_upload(file) as content:
+            if stream:
+                return StreamingResponse(
+                    stream_upload(content, file_extension, file.filename, max_pages, max_chars, mode),
+                    media_type="application/x-ndjson"
+                )
+            result = await TextExtractorAPI.extract_cached(
+                content, file_extension, file.filename, max_pages=max_pages, max_chars=max_chars, mode=mode
+            )
         
         # Return simple response
         if result["success"]:
@@ -236,19 +446,23 @@ async def extract_text(file: UploadFile = File(...)):
                 error_message=result["error_message"]
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
-        # Clean up temporary file if it exists
-        if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.post("/extract-detailed", response_model=DetailedExtractionResponse)
-async def extract_text_detailed(file: UploadFile = File(...)):
+async def extract_text_detailed(
+    file: UploadFile = File(...),
+    parallel: bool = Query(False),
+    mode: str = Query("layout", pattern=PDF_MODE_PATTERN)
+):
     """
     Extract text from uploaded PDF or DOCX file (detailed response)
     
     - **file**: Upload a PDF or DOCX file
+    - **parallel**: Split a long PDF's pages across extraction workers
+    - **mode**: PDF extraction mode, "layout" (pdfplumber) or "fast" (plain text via pdfminer)
     
     Returns extracted text with detailed structure (pages, paragraphs, tables, metadata)
     """
@@ -264,21 +478,10 @@ async def extract_text_detailed(file: UploadFile = File(...)):
             detail=f"Unsupported file type: {file_extension}. Supported types: .pdf, .docx"
         )
     
-    # Create temporary file
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        # Extract text based on file type
-        if file_extension == '.pdf':
-            result = TextExtractorAPI.extract_from_pdf(temp_file_path, file.filename)
-        else:  # .docx
-            result = TextExtractorAPI.extract_from_docx(temp_file_path, file.filename)
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
+        # Buffer the upload in memory (size-capped) and extract, reusing the cached result for a repeat upload
+        async with buffered_upload(file) as content:
+            result = await TextExtractorAPI.extract_cached(content, file_extension, file.filename, parallel, mode=mode)
         
         # Return detailed response
         if result["success"]:
@@ -300,19 +503,18 @@ async def extract_text_detailed(file: UploadFile = File(...)):
                 error_message=result["error_message"]
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
-        # Clean up temporary file if it exists
-        if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.post("/extract-text-only")
-async def extract_text_only(file: UploadFile = File(...)):
+async def extract_text_only(file: UploadFile = File(...), mode: str = Query("fast", pattern=PDF_MODE_PATTERN)):
     """
     Extract only the plain text from uploaded file (lightweight response)
     
     - **file**: Upload a PDF or DOCX file
+    - **mode**: PDF extraction mode, "fast" (default) or "layout"
     
     Returns only the extracted text as a string
     """
@@ -328,21 +530,10 @@ async def extract_text_only(file: UploadFile = File(...)):
             detail=f"Unsupported file type: {file_extension}. Supported types: .pdf, .docx"
         )
     
-    # Create temporary file
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        # Extract text based on file type
-        if file_extension == '.pdf':
-            result = TextExtractorAPI.extract_from_pdf(temp_file_path, file.filename)
-        else:  # .docx
-            result = TextExtractorAPI.extract_from_docx(temp_file_path, file.filename)
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
+        # Buffer the upload in memory (size-capped) and extract, reusing the cached result for a repeat upload
+        async with buffered_upload(file) as content:
+            result = await TextExtractorAPI.extract_cached(content, file_extension, file.filename, mode=mode)
         
         # Return just the text
         if result["success"]:
@@ -353,10 +544,6 @@ async def extract_text_only(file: UploadFile = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up temporary file if it exists
-        if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 if __name__ == "__main__":
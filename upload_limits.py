@@ -0,0 +1,135 @@
+"""
+Upload size limits and a process-wide memory budget for uploaded files.
+
+Uploads are read into memory in chunks and rejected with 413 as soon as they
+pass the per-file limit. Every buffered upload also reserves its size against a
+shared budget; when the budget is exhausted new uploads wait briefly for room
+and are turned away with 503 if none frees up.
+"""
+import os
+import asyncio
+import metrics
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException, UploadFile
+from starlette.responses import PlainTextResponse
+
+# Largest single file accepted
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+# Largest request body accepted: room for a resume, a job description and form fields
+MAX_REQUEST_BYTES = int(os.environ.get("MAX_REQUEST_BYTES", str(2 * MAX_UPLOAD_BYTES + 64 * 1024)))
+
+# Total bytes of uploads held in memory at once, and how long to queue for room
+UPLOAD_MEMORY_BUDGET = int(os.environ.get("UPLOAD_MEMORY_BUDGET", str(256 * 1024 * 1024)))
+UPLOAD_BUDGET_WAIT = float(os.environ.get("UPLOAD_BUDGET_WAIT", "5"))
+
+READ_CHUNK_SIZE = 64 * 1024
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload too large. Maximum size: {limit / (1024 * 1024):.1f} MB")
+
+class UploadMemoryBudget:
+    """Caps the bytes of uploads buffered in memory across all requests"""
+
+    def __init__(self, capacity: int, wait_timeout: float):
+        self.capacity = capacity
+        self.wait_timeout = wait_timeout
+        self.in_use = 0
+        self.rejected = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @asynccontextmanager
+    async def reserve(self, size: int) -> AsyncIterator[None]:
+        """Hold `size` bytes of the budget for the duration of the block"""
+        if size > self.capacity:
+            raise _too_large(self.capacity)
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        condition = self._condition
+
+        async with condition:
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self.in_use + size <= self.capacity),
+                    self.wait_timeout
+                )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is busy processing other uploads. Please retry shortly.",
+                    headers={"Retry-After": str(max(1, int(self.wait_timeout)))}
+                )
+            self.in_use += size
+        try:
+            yield
+        finally:
+            async with condition:
+                self.in_use -= size
+                condition.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "capacity_bytes": self.capacity,
+            "in_use_bytes": self.in_use,
+            "rejected": self.rejected
+        }
+
+upload_budget = UploadMemoryBudget(UPLOAD_MEMORY_BUDGET, UPLOAD_BUDGET_WAIT)
+
+async def read_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """Read an upload in chunks, failing with 413 as soon as it passes max_bytes"""
+    chunks = []
+    total = 0
+    with metrics.stage("upload_read"):
+        while True:
+            chunk = await file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise _too_large(max_bytes)
+            chunks.append(chunk)
+    metrics.count_bytes("upload_read", total)
+    return b"".join(chunks)
+
+@asynccontextmanager
+async def buffered_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> AsyncIterator[bytes]:
+    """Reserve memory for an upload and read it, releasing the reservation when the block exits"""
+    size = file.size if file.size is not None else max_bytes
+    if size > max_bytes:
+        raise _too_large(max_bytes)
+    async with upload_budget.reserve(size):
+        yield await read_upload(file, max_bytes)
+
+class RequestSizeLimitMiddleware:
+    """Rejects request bodies over max_bytes before they are parsed, whether or not Content-Length is sent"""
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = PlainTextResponse("Request body too large", status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
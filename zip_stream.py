@@ -0,0 +1,64 @@
+"""
+ZIP archives written straight into a streaming response.
+
+zipfile can write to a stream it cannot seek: each member's sizes and CRC go
+into a data descriptor after its data, and the central directory is written on
+close. ZipStream gives zipfile such a stream and hands back whatever bytes each
+call produced, so members can be sent to the client as soon as they are ready
+without holding the whole archive in memory.
+"""
+import io
+import time
+import zipfile
+from typing import List
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable file that collects what zipfile writes"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ZipStream:
+    """Incrementally built ZIP archive; every method returns the archive bytes it produced"""
+
+    def __init__(self):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w")
+        self._names = set()
+
+    def unique_name(self, name: str) -> str:
+        """name, or name with a -2, -3, ... suffix if a member of that name was already added"""
+        stem, dot, extension = name.rpartition(".")
+        if not dot:
+            stem, extension = name, ""
+        candidate, counter = name, 1
+        while candidate in self._names:
+            counter += 1
+            candidate = f"{stem}-{counter}{dot}{extension}"
+        return candidate
+
+    def add(self, name: str, data: bytes, compress: bool = True) -> bytes:
+        """Add a member; already-compressed data such as DOCX files is better stored as is"""
+        name = self.unique_name(name)
+        self._names.add(name)
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self._zip.writestr(info, data)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Write the central directory"""
+        self._zip.close()
+        return self._sink.drain()